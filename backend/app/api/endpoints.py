@@ -1,166 +1,355 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException
+from fastapi import APIRouter, UploadFile, File, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import Response, StreamingResponse
+import base64
+import logging
+import gzip
+import hashlib
+import json
+import shutil
+import tempfile
 import zipfile
-import io
-from typing import List
-from app.services.resume_parser import extract_text_from_pdf
-from app.services.vector_db import vector_db
-from app.services.matching_service import matching_service
-from app.api.schemas import MatchRequest, MatchResponse, UploadResponse
-from app.database import get_db
-from app.models import Candidate
+from typing import List, Literal, Optional
+from app.services.matching_service import matching_service, MATCH_SERVICES
+from app.services.ingestion_service import ingestion_service, INGEST_SERVICES
+from app.services.resume_cache import resume_cache
+from app.services.job_service import job_service
+from app.services.score_cache import score_cache
+from app.services.embedding_service import embedding_service
+from app.services.analytics_service import analytics_service
+from app.services.candidate_filters import has_skill
+from app.services.registry import service_registry
+from app.api.schemas import MatchRequest, MatchResponse, BatchMatchRequest, BatchMatchResponse, UploadResponse, JobResponse, JobFileStatus, DeleteCandidateResponse
+from app.database import get_db, SessionLocal
+from app.models import Candidate, IngestJob, IngestJobFile
+from sqlalchemy import String, and_, func, literal_column, or_, type_coerce
 from sqlalchemy.orm import Session
 from fastapi import Depends
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter()
 
-@router.post("/upload-resume", response_model=UploadResponse)
+async def wait_for_services(*names: str):
+    """
+    Waits for services still warming up at startup (without blocking the event loop);
+    503 if one of them could not be loaded.
+    """
+    try:
+        await service_registry.wait_ready(*names)
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"Service unavailable: {e}")
+
+def services_ready(*names: str):
+    """
+    Route dependency form of wait_for_services.
+    """
+    async def dependency():
+        await wait_for_services(*names)
+    return Depends(dependency)
+
+@router.post("/upload-resume", response_model=UploadResponse, dependencies=[services_ready(*INGEST_SERVICES)])
 async def upload_resume(file: UploadFile = File(...), db: Session = Depends(get_db)):
     if not file.filename.endswith(".pdf"):
         raise HTTPException(status_code=400, detail="Only PDF files are supported.")
     
     # Read file content
     try:
-        # Pypdf reads from a file-like object
-        # SpooledTemporaryFile is supported by extract_text_from_pdf logic
         content = await file.read() # Reading to memory might be heavy for large files, but resumes are small.
-        # However, PdfReader needs a stream. 
-        # Ideally we pass file.file directly if possible, but let's wrap contents in BytesIO if needed
-        # or just pass file.file (which behaves like a file).
-        
-        # Reset cursor just in case
-        await file.seek(0)
         
-        text = await extract_text_from_pdf(file.file)
+        # Parse, extract and embed (each step is skipped if this content was seen before)
+        processed = (await ingestion_service.process_pdfs(db, [(file.filename, content)]))[0]
         
-        if not text:
+        if not processed:
             raise HTTPException(status_code=400, detail="Could not extract text from PDF.")
             
-        # Extract structured data
-        from app.services.extraction_service import extraction_service
-        extracted_data = extraction_service.extract_data(text)
-        
-        # Store in Vector DB with structured data in metadata
-        metadata = {"filename": file.filename}
-        if extracted_data:
-            # Flatten or store as JSON string if DB has issues, but InMemory/FAISS simple docstore handles dicts fine.
-            metadata.update(extracted_data)
-
-        vector_db.add_resume(text, metadata)
-        
-        # Save to SQLite
-        try:
-            db_candidate = Candidate(
-                filename=file.filename,
-                name=extracted_data.get("name", "Unknown"),
-                email=extracted_data.get("job_roles", [""])[0] if "@" in extracted_data.get("job_roles", [""])[0] else None, # Hacky fallback from extraction service
-                experience_years=extracted_data.get("experience_years", 0.0),
-                skills=extracted_data.get("skills", []),
-                education=extracted_data.get("education", []),
-                extracted_text=text
-            )
-            db.add(db_candidate)
-            db.commit()
-            db.refresh(db_candidate)
-        except Exception as db_e:
-            # If duplicate filename or other db error, log but don't fail the upload
-            print(f"DB Save Error: {db_e}")
-            db.rollback()
+        # Upsert into SQLite, then index only if the row was saved (a re-upload replaces the old vector)
+        db_candidate = (await ingestion_service.save_candidates([processed]))[0]
+        if db_candidate is not None:
+            await run_in_threadpool(ingestion_service.index_candidates, [(processed, db_candidate)])
         
         return UploadResponse(
             filename=file.filename,
             message="Resume uploaded and processed successfully.",
-            extracted_data=extracted_data
+            extracted_data=processed.extracted_data
         )
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
-
-@router.post("/upload-zip", response_model=List[UploadResponse])
-async def upload_zip(file: UploadFile = File(...), db: Session = Depends(get_db)):
+@router.post("/upload-zip", response_model=JobResponse, status_code=202)
+async def upload_zip(file: UploadFile = File(...), stream: bool = False, db: Session = Depends(get_db)):
+    """
+    Ingests every PDF in a ZIP archive.
+    By default the archive is queued as a background job and a JobResponse is returned
+    right away; poll GET /jobs/{job_id} for progress.
+    With ?stream=true the archive is processed within the request and the response is
+    NDJSON: one line per resume as it completes, then a final {"status": "done"} line.
+    """
     if not file.filename.endswith(".zip"):
         raise HTTPException(status_code=400, detail="Only ZIP files are supported.")
     
     import logging
     logger = logging.getLogger(__name__)
 
+    if not stream:
+        try:
+            job = await run_in_threadpool(job_service.create_job, db, file.file, file.filename)
+        except zipfile.BadZipFile:
+            raise HTTPException(status_code=400, detail="Invalid ZIP file.")
+        await job_service.submit(job.id)
+        return job_to_response(job)
+
+    await wait_for_services(*INGEST_SERVICES)
+
+    # Spool the upload to a temp file on disk; members are then read one at a time,
+    # so the archive is never held in memory.
+    archive = tempfile.TemporaryFile()
     try:
-        content = await file.read()
-        zip_buffer = io.BytesIO(content)
-        
-        results = []
-        from app.services.extraction_service import extraction_service
-        
-        with zipfile.ZipFile(zip_buffer, 'r') as zip_ref:
-            for filename in zip_ref.namelist():
-                # Skip directories and non-PDFs
-                if filename.lower().endswith(".pdf") and not filename.startswith("__MACOSX") and not filename.endswith("/"):
-                    try:
-                        with zip_ref.open(filename) as pdf_file:
-                            pdf_bytes = pdf_file.read()
-                            pdf_io = io.BytesIO(pdf_bytes)
-                            
-                            # Extract text
-                            text = await extract_text_from_pdf(pdf_io)
-                            
-                            if text:
-                                # Extract Data
-                                extracted_data = extraction_service.extract_data(text)
-                                
-                                # Index in Vector DB
-                                metadata = {"filename": filename}
-                                if extracted_data:
-                                    metadata.update(extracted_data)
-                                vector_db.add_resume(text, metadata)
-                                
-                                # Save to DB
-                                try:
-                                    db_cand = Candidate(
-                                        filename=filename,
-                                        name=extracted_data.get("name", "Unknown"),
-                                        experience_years=extracted_data.get("experience_years", 0),
-                                        skills=extracted_data.get("skills", []),
-                                        education=extracted_data.get("education", []),
-                                        extracted_text=text
-                                    )
-                                    db.add(db_cand)
-                                    db.commit()
-                                except Exception as dbe:
-                                    print(f"DB Batch Error: {dbe}")
-                                    db.rollback()
-                                
-                                results.append(UploadResponse(
-                                    filename=filename,
-                                    message="Processed successfully",
-                                    extracted_data=extracted_data
-                                ))
-                            else:
-                                logger.warning(f"Empty text for file: {filename}")
-                    except Exception as inner_e:
-                        logger.error(f"Error processing matching file {filename} in zip: {inner_e}")
-                        continue
-                        
-        return results
-
-    except zipfile.BadZipFile:
-        raise HTTPException(status_code=400, detail="Invalid ZIP file.")
-    except Exception as e:
-        logger.error(f"Batch upload error: {e}")
-        raise HTTPException(status_code=500, detail=f"Batch processing failed: {str(e)}")
+        await run_in_threadpool(shutil.copyfileobj, file.file, archive, 1024 * 1024)
+        if not zipfile.is_zipfile(archive):
+            raise HTTPException(status_code=400, detail="Invalid ZIP file.")
+        archive.seek(0)
+    except Exception:
+        archive.close()
+        raise
+
+    async def events():
+        # The request-scoped session closes before the body is streamed, so use our own
+        session = SessionLocal()
+        processed = failed = 0
+        try:
+            async for event in ingestion_service.ingest_zip(session, archive):
+                if event["status"] == "processed":
+                    processed += 1
+                else:
+                    failed += 1
+                yield json.dumps(event) + "\n"
+            yield json.dumps({"status": "done", "processed": processed, "failed": failed}) + "\n"
+        except Exception as e:
+            logger.error(f"Batch upload error: {e}")
+            yield json.dumps({"status": "error", "message": f"Batch processing failed: {str(e)}"}) + "\n"
+        finally:
+            session.close()
+            archive.close()
 
-@router.post("/match-job", response_model=MatchResponse)
+    return StreamingResponse(events(), media_type="application/x-ndjson")
+
+def job_to_response(job: IngestJob, files: Optional[List[IngestJobFile]] = None) -> JobResponse:
+    return JobResponse(
+        job_id=job.id,
+        filename=job.filename,
+        status=job.status,
+        total_files=job.total_files,
+        processed_files=job.processed_files,
+        failed_files=job.failed_files,
+        error=job.error,
+        created_at=job.created_at,
+        updated_at=job.updated_at,
+        files=[JobFileStatus(filename=f.member_name, status=f.status, message=f.message) for f in files] if files is not None else None
+    )
+
+@router.get("/jobs/{job_id}", response_model=JobResponse)
+def get_job(job_id: str, include_files: bool = False, db: Session = Depends(get_db)):
+    job = db.get(IngestJob, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    files = None
+    if include_files:
+        files = (
+            db.query(IngestJobFile)
+            .filter(IngestJobFile.job_id == job_id)
+            .order_by(IngestJobFile.position)
+            .all()
+        )
+    return job_to_response(job, files)
+
+@router.post("/jobs/{job_id}/cancel", response_model=JobResponse)
+def cancel_job(job_id: str, db: Session = Depends(get_db)):
+    job = db.get(IngestJob, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job_to_response(job_service.cancel(db, job))
+
+@router.post("/match-job", response_model=MatchResponse, dependencies=[services_ready(*MATCH_SERVICES)])
 async def match_job(request: MatchRequest):
-    results = matching_service.match_jobs(request.job_description, request.min_score)
+    filters = request.filters.dict() if request.filters else None
+    search_params = request.search_params.dict(exclude_none=True) if request.search_params else None
+    results = await matching_service.amatch_jobs(
+        request.job_description,
+        request.min_score,
+        k=request.top_k,
+        filters=filters,
+        retrieval_k=request.retrieval_k,
+        llm_top_n=request.llm_top_n,
+        llm_budget=request.llm_budget,
+        search_params=search_params
+    )
     return MatchResponse(matches=results)
 
+def sse_event(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@router.post("/match-job/stream", dependencies=[services_ready(*MATCH_SERVICES)])
+async def match_job_stream(request: MatchRequest):
+    """
+    /match-job as Server-Sent Events, so results show up before the LLM stage finishes:
+    "shortlist" right after the vector search and local re-rank (rows still waiting for the
+    LLM have pending=true), "score" with each candidate's result as its LLM score arrives,
+    then "done" with the final ranking (the /match-job response).
+    A failure ends the stream with an "error" event.
+    """
+    filters = request.filters.dict() if request.filters else None
+    search_params = request.search_params.dict(exclude_none=True) if request.search_params else None
+
+    async def events():
+        try:
+            async for event, data in matching_service.astream_match(
+                request.job_description,
+                request.min_score,
+                k=request.top_k,
+                filters=filters,
+                retrieval_k=request.retrieval_k,
+                llm_top_n=request.llm_top_n,
+                llm_budget=request.llm_budget,
+                search_params=search_params
+            ):
+                yield sse_event(event, data)
+        except Exception as e:
+            logger.error(f"Streaming match error: {e}")
+            yield sse_event("error", {"message": f"Matching failed: {str(e)}"})
+
+    # No proxy buffering, so each event reaches the client as it is sent
+    return StreamingResponse(
+        events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.post("/match-jobs", response_model=BatchMatchResponse, dependencies=[services_ready(*MATCH_SERVICES)])
+async def match_jobs_batch(request: BatchMatchRequest):
+    filters = request.filters.dict() if request.filters else None
+    search_params = request.search_params.dict(exclude_none=True) if request.search_params else None
+    results = await matching_service.amatch_jobs_batch(
+        request.job_descriptions,
+        request.min_score,
+        k=request.top_k,
+        filters=filters,
+        retrieval_k=request.retrieval_k,
+        llm_top_n=request.llm_top_n,
+        llm_budget=request.llm_budget,
+        search_params=search_params
+    )
+    return BatchMatchResponse(results=[MatchResponse(matches=matches) for matches in results])
+
+# Sort keys for GET /candidates; the expressions match the Candidate indexes so each page is an index range scan
+CANDIDATE_SORTS = {
+    "id": Candidate.id,
+    "name": func.coalesce(Candidate.name, literal_column("''")),
+    "experience_years": func.coalesce(Candidate.experience_years, literal_column("0.0")),
+    # Compared as the stored text so cursor values round-trip exactly
+    "upload_date": type_coerce(Candidate.upload_date, String),
+}
+# Columns only loaded when requested via ?fields=
+CANDIDATE_OPTIONAL_FIELDS = {
+    "email": Candidate.email,
+    "education": Candidate.education,
+    "extracted_text": Candidate.extracted_text,
+    "upload_date": Candidate.upload_date,
+}
+GZIP_MIN_BYTES = 1024
+
+def encode_cursor(sort_value, candidate_id: int) -> str:
+    return base64.urlsafe_b64encode(json.dumps([sort_value, candidate_id]).encode("utf-8")).decode("ascii")
+
+def decode_cursor(cursor: str):
+    try:
+        sort_value, candidate_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return sort_value, int(candidate_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor.")
+
+def cached_json_response(request: Request, payload) -> Response:
+    """
+    JSON response with a content-hash ETag (an If-None-Match hit returns 304 with no body),
+    gzip-compressed when the client accepts it.
+    """
+    body = json.dumps(payload, separators=(",", ":"), default=str).encode("utf-8")
+    etag = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+    if len(body) >= GZIP_MIN_BYTES and "gzip" in request.headers.get("accept-encoding", ""):
+        body = gzip.compress(body, compresslevel=5)
+        headers["Content-Encoding"] = "gzip"
+    return Response(content=body, media_type="application/json", headers=headers)
+
 @router.get("/candidates")
-def get_candidates(db: Session = Depends(get_db)):
-    candidates = db.query(Candidate).all()
-    # Simple manual dictionary conversion or use Pydantic schema
-    return [
-        {
+def get_candidates(
+    request: Request,
+    limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = None,
+    sort: Literal["id", "name", "experience_years", "upload_date"] = "id",
+    order: Literal["asc", "desc"] = "asc",
+    name: Optional[str] = None,
+    skill: Optional[str] = None,
+    min_experience: Optional[float] = None,
+    max_experience: Optional[float] = None,
+    fields: Optional[str] = Query(None, description="Comma-separated extras: email, education, extracted_text, upload_date"),
+    db: Session = Depends(get_db)
+):
+    """
+    One page of the talent pool, keyset-paginated: pass the returned next_cursor to get the
+    following page. Only the listed columns are read, so the full resume text stays on disk
+    unless fields=extracted_text is asked for.
+    """
+    extras = [f.strip() for f in fields.split(",") if f.strip()] if fields else []
+    unknown = [f for f in extras if f not in CANDIDATE_OPTIONAL_FIELDS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+
+    sort_key = CANDIDATE_SORTS[sort]
+    query = db.query(
+        Candidate.id,
+        Candidate.name,
+        Candidate.filename,
+        Candidate.skills,
+        Candidate.experience_years,
+        sort_key.label("sort_value"),
+        *[CANDIDATE_OPTIONAL_FIELDS[f].label(f) for f in extras]
+    )
+
+    if name:
+        query = query.filter(Candidate.name.ilike(f"%{name}%"))
+    if skill:
+        query = query.filter(has_skill(skill))
+    if min_experience is not None:
+        query = query.filter(Candidate.experience_years >= min_experience)
+    if max_experience is not None:
+        query = query.filter(Candidate.experience_years <= max_experience)
+
+    if cursor:
+        sort_value, last_id = decode_cursor(cursor)
+        if sort == "id":
+            query = query.filter(Candidate.id > last_id if order == "asc" else Candidate.id < last_id)
+        elif order == "asc":
+            # Spelled out (not a row-value comparison) so SQLite seeks the index instead of scanning it
+            query = query.filter(and_(sort_key >= sort_value, or_(sort_key > sort_value, Candidate.id > last_id)))
+        else:
+            query = query.filter(and_(sort_key <= sort_value, or_(sort_key < sort_value, Candidate.id < last_id)))
+
+    if order == "asc":
+        query = query.order_by(sort_key.asc(), Candidate.id.asc())
+    else:
+        query = query.order_by(sort_key.desc(), Candidate.id.desc())
+
+    # One extra row tells us whether another page exists
+    rows = query.limit(limit + 1).all()
+    next_cursor = encode_cursor(rows[limit - 1].sort_value, rows[limit - 1].id) if len(rows) > limit else None
+
+    items = []
+    for c in rows[:limit]:
+        item = {
             "id": c.id,
             "name": c.name,
             "filename": c.filename,
@@ -172,5 +361,38 @@ def get_candidates(db: Session = Depends(get_db)):
                 "experience_years": c.experience_years
             }
         }
-        for c in candidates
-    ]
+        for f in extras:
+            item[f] = getattr(c, f)
+        items.append(item)
+
+    return cached_json_response(request, {"items": items, "next_cursor": next_cursor})
+
+@router.delete("/candidates/{candidate_id}", response_model=DeleteCandidateResponse, dependencies=[services_ready("vector_db")])
+async def delete_candidate(candidate_id: int):
+    """
+    Deletes a candidate from SQLite, the keyword index, the analytics aggregates, the score
+    cache and the vector index. The vector stops matching right away; its space is reclaimed
+    by the next background compaction.
+    """
+    filename = await ingestion_service.delete_candidate(candidate_id)
+    if filename is None:
+        raise HTTPException(status_code=404, detail="Candidate not found")
+    return DeleteCandidateResponse(id=candidate_id, filename=filename)
+
+@router.get("/analytics")
+def get_analytics(request: Request, top_skills: int = Query(10, ge=1, le=100), db: Session = Depends(get_db)):
+    """
+    Talent-pool dashboard data from the incrementally maintained aggregates;
+    the cost does not grow with the number of candidates.
+    """
+    return cached_json_response(request, analytics_service.summary(db, top_skills))
+
+@router.get("/cache/stats")
+def get_cache_stats():
+    return {
+        "resume_extraction": resume_cache.stats(),
+        "scoring": score_cache.stats(),
+        # Not loaded yet during startup; reading it here would load the model on the event loop
+        "query_embeddings": embedding_service.query_cache.stats() if service_registry.is_ready("embeddings") else None,
+        "embedding_batches": embedding_service.batcher.stats() if service_registry.is_ready("embeddings") else None
+    }
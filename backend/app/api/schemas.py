@@ -1,5 +1,6 @@
 from pydantic import BaseModel, Field
 from typing import List, Optional, Dict, Any
+from datetime import datetime
 
 class ResumeDataSchema(BaseModel):
     name: Optional[str] = None
@@ -10,9 +11,28 @@ class ResumeDataSchema(BaseModel):
     job_roles: List[str] = []
     error: Optional[str] = None
 
+class CandidateFilters(BaseModel):
+    # Applied inside retrieval, so the top_k comes from the candidates that pass
+    min_experience: Optional[float] = Field(default=None, ge=0)
+    max_experience: Optional[float] = Field(default=None, ge=0)
+    skills: List[str] = Field(default=[], description="Skills the candidate must all list (case-insensitive)")
+    uploaded_after: Optional[datetime] = None
+    uploaded_before: Optional[datetime] = None
+
+class AnnSearchParams(BaseModel):
+    # Accuracy/latency knobs for approximate vector indexes; ignored while the index is exact
+    nprobe: Optional[int] = Field(default=None, ge=1, le=65536, description="IVF lists probed")
+    ef_search: Optional[int] = Field(default=None, ge=1, le=4096, description="HNSW search candidate list size")
+
 class MatchRequest(BaseModel):
     job_description: str
     min_score: float = 0.0
+    top_k: int = Field(default=5, ge=1, le=100, description="Matches returned")
+    filters: Optional[CandidateFilters] = None
+    retrieval_k: Optional[int] = Field(default=None, ge=1, le=1000, description="Candidates retrieved for the local re-rank (server default if unset)")
+    llm_top_n: Optional[int] = Field(default=None, ge=0, le=100, description="Top re-ranked candidates sent to the LLM per job description (server default if unset)")
+    llm_budget: Optional[int] = Field(default=None, ge=0, description="Maximum uncached LLM calls for this request (no cap if unset)")
+    search_params: Optional[AnnSearchParams] = None
 
 class MatchResult(BaseModel):
     filename: str
@@ -22,11 +42,47 @@ class MatchResult(BaseModel):
     matched_skills: List[str] = []
     missing_skills: List[str] = []
     ai_explanation: str = ""
+    # Cascade stage that produced the score: llm, llm_cache, fallback, cross_encoder or local
+    stage: str = "llm"
 
 class MatchResponse(BaseModel):
     matches: List[MatchResult]
 
+class BatchMatchRequest(BaseModel):
+    job_descriptions: List[str] = Field(min_length=1, max_length=50)
+    min_score: float = 0.0
+    top_k: int = Field(default=5, ge=1, le=100, description="Matches returned per job description")
+    filters: Optional[CandidateFilters] = None
+    retrieval_k: Optional[int] = Field(default=None, ge=1, le=1000, description="Candidates retrieved for the local re-rank (server default if unset)")
+    llm_top_n: Optional[int] = Field(default=None, ge=0, le=100, description="Top re-ranked candidates sent to the LLM per job description (server default if unset)")
+    llm_budget: Optional[int] = Field(default=None, ge=0, description="Maximum uncached LLM calls for this request (no cap if unset)")
+    search_params: Optional[AnnSearchParams] = None
+
+class BatchMatchResponse(BaseModel):
+    results: List[MatchResponse] # one per job description, in request order
+
 class UploadResponse(BaseModel):
     filename: str
     message: str
     extracted_data: ResumeDataSchema
+
+class DeleteCandidateResponse(BaseModel):
+    id: int
+    filename: str
+
+class JobFileStatus(BaseModel):
+    filename: str
+    status: str
+    message: Optional[str] = None
+
+class JobResponse(BaseModel):
+    job_id: str
+    filename: str
+    status: str
+    total_files: int
+    processed_files: int
+    failed_files: int
+    error: Optional[str] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    files: Optional[List[JobFileStatus]] = None
@@ -0,0 +1,136 @@
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    return os.getenv(name, str(default)).strip().lower() in ("1", "true", "yes", "on")
+
+
+# --- Database ---
+# SQLAlchemy URL of the talent pool database (relative to backend/)
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./talent_pool.db")
+# How long a connection waits on SQLite's write lock before failing, in milliseconds
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+# Candidate rows per multi-row INSERT during bulk ingest (kept under SQLite's bound-parameter limit)
+DB_WRITE_CHUNK_SIZE = int(os.getenv("DB_WRITE_CHUNK_SIZE", "500"))
+
+# --- Vector Index Persistence ---
+# Directory where the FAISS index and its id mapping are saved (relative to backend/)
+VECTOR_INDEX_DIR = os.getenv("VECTOR_INDEX_DIR", "./vector_index")
+# Memory-map the saved index on startup instead of reading it fully into RAM
+VECTOR_INDEX_MMAP = _env_bool("VECTOR_INDEX_MMAP", True)
+# Seconds between background saves of the index (only written when it changed)
+VECTOR_INDEX_SAVE_INTERVAL = int(os.getenv("VECTOR_INDEX_SAVE_INTERVAL", "60"))
+# Rows per batch when catching the index up with the Candidate table
+VECTOR_INDEX_REBUILD_BATCH = int(os.getenv("VECTOR_INDEX_REBUILD_BATCH", "1000"))
+# Filtered searches over at most this many candidates score the subset directly;
+# larger subsets are searched with a FAISS id selector
+VECTOR_FILTER_BRUTE_FORCE_MAX = int(os.getenv("VECTOR_FILTER_BRUTE_FORCE_MAX", "20000"))
+# Replaced and deleted vectors are only hidden from search until the autosave thread compacts
+# the index, once they make up this fraction of it
+VECTOR_INDEX_COMPACT_RATIO = float(os.getenv("VECTOR_INDEX_COMPACT_RATIO", "0.1"))
+
+# --- Vector Index Type ---
+# FAISS index_factory string: "Flat" (exact), or an ANN index such as "IVF1024,Flat" or "HNSW32"
+# Compressed storage: "SQfp16" (2x smaller) or "SQ8" (4x), alone or after an ANN structure,
+# e.g. "IVF1024,SQ8" or "HNSW32,SQ8". Product quantization (32x with "PQ48") only inside IVF,
+# e.g. "IVF1024,PQ48": plain PQ and LSH can't filter by id, and HNSW over PQ codes misses the
+# recall target, so those are refused (the service stays on exact search).
+VECTOR_INDEX_FACTORY = os.getenv("VECTOR_INDEX_FACTORY", "Flat")
+# The pool is searched exactly until it holds this many vectors; then the configured index is trained and built
+VECTOR_INDEX_TRAIN_THRESHOLD = int(os.getenv("VECTOR_INDEX_TRAIN_THRESHOLD", "50000"))
+# Vectors sampled for training (IVF centroids); larger samples train slower for little gain
+VECTOR_INDEX_TRAIN_SAMPLE = int(os.getenv("VECTOR_INDEX_TRAIN_SAMPLE", "100000"))
+# Default search-time accuracy knobs, overridable per query: IVF lists probed, HNSW candidate list size
+VECTOR_INDEX_NPROBE = int(os.getenv("VECTOR_INDEX_NPROBE", "16"))
+VECTOR_INDEX_EF_SEARCH = int(os.getenv("VECTOR_INDEX_EF_SEARCH", "64"))
+# Compressed indexes fetch k times this many hits and re-rank them exactly with the float32
+# embeddings stored in SQLite (1 disables the re-rank)
+VECTOR_INDEX_RERANK_FACTOR = int(os.getenv("VECTOR_INDEX_RERANK_FACTOR", "4"))
+# Re-rank factor for PQ codes, whose distances are coarser: IVF1024,PQ48 reaches recall@10 of
+# 0.70 at 4x and 0.97 at 16x on the benchmark corpus (PQ96: 0.97 at 4x). Check other code sizes
+# with benchmark_vector_index.py
+VECTOR_INDEX_PQ_RERANK_FACTOR = int(os.getenv("VECTOR_INDEX_PQ_RERANK_FACTOR", "16"))
+
+# --- Embeddings ---
+# Texts per forward pass when embedding a batch of resumes (e.g. a ZIP upload)
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "32"))
+# Query (job description) embeddings kept in the LRU
+QUERY_EMBEDDING_CACHE_SIZE = int(os.getenv("QUERY_EMBEDDING_CACHE_SIZE", "1024"))
+# Micro-batching: concurrent embedding requests arriving within this many milliseconds of each
+# other share one forward pass of up to EMBEDDING_BATCH_MAX_SIZE texts (1 disables batching)
+EMBEDDING_BATCH_MAX_SIZE = int(os.getenv("EMBEDDING_BATCH_MAX_SIZE", "64"))
+EMBEDDING_BATCH_MAX_WAIT_MS = float(os.getenv("EMBEDDING_BATCH_MAX_WAIT_MS", "5"))
+# "torch" (sentence-transformers) or "onnx": the same model exported to ONNX with int8 dynamic
+# quantization, run by onnxruntime (needs optimum[onnxruntime]; falls back to torch if missing).
+# ONNX vectors stay within ~0.99 cosine of the torch ones (see benchmark_embeddings.py), so an
+# existing index keeps working after a switch.
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch").strip().lower()
+# Where the quantized ONNX export is cached (relative to backend/); created on first use
+EMBEDDING_ONNX_DIR = os.getenv("EMBEDDING_ONNX_DIR", "./onnx_models")
+# CPU threads for embedding inference (0 = the runtime's default, usually one per core)
+EMBEDDING_THREADS = int(os.getenv("EMBEDDING_THREADS", "0"))
+
+# --- PDF Parsing ---
+# ZIP members processed per batch during archive ingestion (bounds memory per upload)
+ZIP_CHUNK_SIZE = int(os.getenv("ZIP_CHUNK_SIZE", "32"))
+# Archive members larger than this are rejected instead of being read into memory
+MAX_PDF_BYTES = int(os.getenv("MAX_PDF_MB", "20")) * 1024 * 1024
+# Worker processes for PDF text extraction (defaults to all cores but one, leaving room for the event loop)
+PDF_PARSER_WORKERS = int(os.getenv("PDF_PARSER_WORKERS", str(max(1, (os.cpu_count() or 2) - 1))))
+
+# --- LLM ---
+# "fake" swaps in an offline chat model (see services/fake_llm.py) for throughput testing
+LLM_PROVIDER = os.getenv("LLM_PROVIDER", "").strip().lower()
+# Simulated per-call latency of the fake model, in seconds
+FAKE_LLM_LATENCY = float(os.getenv("FAKE_LLM_LATENCY", "0.5"))
+# Provider quotas shared by all LLM calls (0 disables a limit). Defaults match the Gemini free tier.
+LLM_REQUESTS_PER_MINUTE = int(os.getenv("LLM_REQUESTS_PER_MINUTE", "15"))
+LLM_TOKENS_PER_MINUTE = int(os.getenv("LLM_TOKENS_PER_MINUTE", "1000000"))
+# Maximum resume extraction calls in flight during bulk ingest
+EXTRACTION_CONCURRENCY = int(os.getenv("EXTRACTION_CONCURRENCY", "8"))
+# Maximum candidate scoring calls in flight for one match request
+SCORING_CONCURRENCY = int(os.getenv("SCORING_CONCURRENCY", "10"))
+
+# --- Caches ---
+# Entries kept in memory in front of the SQLite resume extraction cache
+RESUME_CACHE_SIZE = int(os.getenv("RESUME_CACHE_SIZE", "2048"))
+# In-memory scoring cache in front of the SQLite score_cache table
+SCORE_CACHE_SIZE = int(os.getenv("SCORE_CACHE_SIZE", "10000"))
+SCORE_CACHE_TTL = float(os.getenv("SCORE_CACHE_TTL", "3600"))
+
+# --- Background Ingestion Jobs ---
+# Where uploaded archives are kept until their job finishes (relative to backend/)
+JOBS_DIR = os.getenv("JOBS_DIR", "./ingest_jobs")
+# Jobs processed concurrently by the in-process worker pool
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+
+# --- Analytics ---
+# Experience histogram buckets are whole years; this one and above are grouped together
+ANALYTICS_MAX_EXPERIENCE_BUCKET = int(os.getenv("ANALYTICS_MAX_EXPERIENCE_BUCKET", "20"))
+
+# --- Hybrid Retrieval ---
+# Reciprocal rank fusion of vector and FTS5 (BM25) results before LLM scoring.
+# Setting HYBRID_LEXICAL_WEIGHT to 0 turns retrieval back into vector search only.
+HYBRID_VECTOR_WEIGHT = float(os.getenv("HYBRID_VECTOR_WEIGHT", "1.0"))
+HYBRID_LEXICAL_WEIGHT = float(os.getenv("HYBRID_LEXICAL_WEIGHT", "1.0"))
+# RRF damping constant: larger values flatten the advantage of the very top ranks
+HYBRID_RRF_K = int(os.getenv("HYBRID_RRF_K", "60"))
+# Results taken from each retriever before fusion (at least the requested top_k)
+HYBRID_CANDIDATE_POOL = int(os.getenv("HYBRID_CANDIDATE_POOL", "50"))
+# BM25 column weights for skills vs. the full resume text
+FTS_SKILLS_WEIGHT = float(os.getenv("FTS_SKILLS_WEIGHT", "2.0"))
+FTS_TEXT_WEIGHT = float(os.getenv("FTS_TEXT_WEIGHT", "1.0"))
+
+# --- Scoring Cascade ---
+# Candidates retrieved for the cheap local re-rank (deep recall)
+CASCADE_RETRIEVAL_K = int(os.getenv("CASCADE_RETRIEVAL_K", "50"))
+# Top candidates of the local re-rank sent to the LLM
+CASCADE_LLM_TOP_N = int(os.getenv("CASCADE_LLM_TOP_N", "5"))
+# Local score = this weight x skill overlap + the rest x semantic similarity
+CASCADE_SKILL_WEIGHT = float(os.getenv("CASCADE_SKILL_WEIGHT", "0.6"))
+# Optional CPU cross-encoder for the semantic part of the local score, e.g.
+# "cross-encoder/ms-marco-MiniLM-L-6-v2" (needs sentence-transformers); empty disables it
+CROSS_ENCODER_MODEL = os.getenv("CROSS_ENCODER_MODEL", "").strip()
@@ -1,16 +1,61 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, inspect, text
 from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.schema import CreateIndex
 from sqlalchemy.orm import sessionmaker
+from app.core.config import SQLITE_BUSY_TIMEOUT_MS, DATABASE_URL
 
-SQLALCHEMY_DATABASE_URL = "sqlite:///./talent_pool.db"
+SQLALCHEMY_DATABASE_URL = DATABASE_URL
 
 engine = create_engine(
     SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
 )
+
+@event.listens_for(engine, "connect")
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    """
+    WAL lets readers run alongside the single writer and turns most commits into an
+    append to the log instead of an fsync'd journal rewrite; synchronous=NORMAL is
+    durable across application crashes in WAL mode (only an OS crash can lose the last commits).
+    """
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+    cursor.execute("PRAGMA cache_size=-65536")  # 64 MB page cache
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.close()
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
 
+def add_missing_columns(bind=engine):
+    """
+    create_all only creates missing tables, so columns added to existing models
+    are appended here (SQLite ALTER TABLE ADD COLUMN, nullable columns only).
+    """
+    inspector = inspect(bind)
+    with bind.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {col["name"] for col in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in existing and column.nullable:
+                    col_type = column.type.compile(dialect=bind.dialect)
+                    conn.execute(text(f'ALTER TABLE {table.name} ADD COLUMN "{column.name}" {col_type}'))
+
+def create_missing_indexes(bind=engine):
+    """
+    create_all only creates indexes together with new tables, so indexes added to
+    existing models are created here.
+    """
+    # IF NOT EXISTS rather than checkfirst: SQLite reflection skips expression indexes
+    with bind.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                conn.execute(CreateIndex(index, if_not_exists=True))
+
 # Dependency
 def get_db():
     db = SessionLocal()
@@ -1,37 +1,90 @@
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.responses import JSONResponse
 from app.services.scoring_service import scoring_service
-from app.api.endpoints import router as api_router
+from app.services.vector_db import vector_db
+from app.services.resume_parser import shutdown_pdf_executor
+from app.services.job_service import job_service
+from app.services.db_writer import db_writer
+from app.services.analytics_service import analytics_service
+from app.services.lexical_search import lexical_search
+from app.services.registry import service_registry
+from app.api.endpoints import router as api_router, services_ready
 from pydantic import BaseModel
 from typing import List, Optional
-from app.database import engine, Base
+from app.database import engine, Base, SessionLocal, add_missing_columns, create_missing_indexes
 
 class QuestionRequest(BaseModel):
     job_description: str
     resume_data: dict
 
-# Create Tables
-Base.metadata.create_all(bind=engine)
+# Loaded in the background after startup, in this order; routes that need one wait for it
+WARM_UP_SERVICES = ("vector_db", "embeddings", "local_ranker", "scoring", "extraction")
 
-app = FastAPI(title="AI-Powered Resume Screening System")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Create tables (at startup rather than import, so importing the app stays cheap)
+    Base.metadata.create_all(bind=engine)
+    add_missing_columns(engine)
+    create_missing_indexes(engine)
+    lexical_search.ensure_index(engine)
+    db = SessionLocal()
+    try:
+        # Dashboard aggregates are maintained incrementally; rebuild them once if they don't cover the pool
+        analytics_service.ensure_consistent(db)
+    finally:
+        db.close()
+    # The vector index, embedding model and LLM clients load in the background, so the app
+    # answers (health checks, listings, auth) right away
+    warm_up = asyncio.create_task(service_registry.warm_up(WARM_UP_SERVICES))
+    # Background ingest workers; jobs interrupted by the last shutdown resume once the services are loaded
+    await job_service.start()
+    yield
+    await job_service.stop()
+    if not warm_up.done():
+        warm_up.cancel()
+    db_writer.stop()
+    # Not loaded yet means nothing to save
+    if service_registry.peek("vector_db") is not None:
+        vector_db.stop_autosave()
+    shutdown_pdf_executor()
+
+app = FastAPI(title="AI-Powered Resume Screening System", lifespan=lifespan)
 
 from app.api.auth import router as auth_router
 
 app.include_router(api_router, prefix="/api")
 app.include_router(auth_router, prefix="/api/auth")
 
-@app.post("/api/generate-questions")
+@app.post("/api/generate-questions", dependencies=[services_ready("scoring")])
 async def generate_questions(request: QuestionRequest):
-    return scoring_service.generate_interview_questions(request.resume_data, request.job_description)
+    return await scoring_service.agenerate_interview_questions(request.resume_data, request.job_description)
 
-@app.post("/api/estimate-salary")
+@app.post("/api/estimate-salary", dependencies=[services_ready("scoring")])
 async def estimate_salary(request: QuestionRequest):
-    return scoring_service.estimate_salary(request.resume_data, request.job_description)
+    return await scoring_service.aestimate_salary(request.resume_data, request.job_description)
 
 
 @app.get("/")
 async def root():
     return {"message": "Welcome to the AI-Powered Resume Screening System API"}
 
+@app.get("/health")
+async def health():
+    # Liveness: answers as soon as the app is up, even while services are still loading
+    return {"status": "ok"}
+
+@app.get("/ready")
+async def ready():
+    """
+    Readiness: 200 once every service has loaded, 503 before that; the body reports each
+    service's state (not_loaded, loading, ready, failed) and load time.
+    """
+    ready = service_registry.is_ready()
+    payload = {"status": "ready" if ready else "starting", "services": service_registry.status()}
+    return JSONResponse(payload, status_code=200 if ready else 503)
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
@@ -1,5 +1,5 @@
-from sqlalchemy import Column, Integer, String, Float, Text, JSON, DateTime
-from sqlalchemy.sql import func
+from sqlalchemy import Column, Integer, String, Float, Text, JSON, DateTime, LargeBinary, Index
+from sqlalchemy.sql import func, literal_column
 from .database import Base
 
 class Candidate(Base):
@@ -13,8 +13,19 @@ class Candidate(Base):
     skills = Column(JSON)  # Stores list of skills
     education = Column(JSON)
     extracted_text = Column(Text, nullable=True) # Full text for backup
+    resume_data = Column(JSON, nullable=True) # Full ResumeData dict from extraction (roles, tools, ...)
+    embedding = Column(LargeBinary, nullable=True) # float32 vector, used to rebuild the FAISS index
+    embedding_version = Column(Integer, nullable=True) # Bumped on every embedding write; the saved index records the one it holds
     upload_date = Column(DateTime(timezone=True), server_default=func.now())
 
+    # Keyset pagination of GET /candidates walks one of these (sort key, id) indexes.
+    # The expressions must match CANDIDATE_SORTS in api/endpoints.py for SQLite to use them.
+    __table_args__ = (
+        Index("ix_candidates_name_sort", func.coalesce(name, literal_column("''")), id),
+        Index("ix_candidates_experience_sort", func.coalesce(experience_years, literal_column("0.0")), id),
+        Index("ix_candidates_upload_date_sort", upload_date, id),
+    )
+
 class User(Base):
     __tablename__ = "users"
 
@@ -23,3 +34,68 @@ class User(Base):
     hashed_password = Column(String)
     security_question = Column(String)
     security_answer = Column(String) # Stored in lowercase for easier matching
+
+class ResumeCacheEntry(Base):
+    __tablename__ = "resume_cache"
+
+    # sha256 of the normalized extracted text
+    text_hash = Column(String, primary_key=True)
+    extracted_text = Column(Text)
+    resume_data = Column(JSON) # ResumeData dict from the extraction service
+    embedding = Column(LargeBinary, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+class ResumePdfHash(Base):
+    __tablename__ = "resume_pdf_hashes"
+
+    # sha256 of the raw PDF bytes -> text hash, so identical files skip PDF parsing too
+    pdf_hash = Column(String, primary_key=True)
+    text_hash = Column(String, index=True)
+
+class ScoreCacheEntry(Base):
+    __tablename__ = "score_cache"
+
+    jd_hash = Column(String, primary_key=True) # sha256 of the normalized job description
+    candidate_id = Column(Integer, primary_key=True, index=True) # indexed for deleting a candidate's scores
+    version = Column(String, primary_key=True) # fingerprint of model name + prompt + output schema
+    candidate_hash = Column(String) # fingerprint of the profile that was scored
+    result = Column(JSON) # AIScoreResult dict
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+class IngestJob(Base):
+    __tablename__ = "ingest_jobs"
+
+    id = Column(String, primary_key=True) # uuid hex
+    filename = Column(String)
+    archive_path = Column(String) # spooled copy of the upload, removed when the job finishes
+    status = Column(String, index=True) # queued, running, completed, failed, cancelled
+    total_files = Column(Integer, default=0)
+    processed_files = Column(Integer, default=0)
+    failed_files = Column(Integer, default=0)
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+class IngestJobFile(Base):
+    __tablename__ = "ingest_job_files"
+
+    id = Column(Integer, primary_key=True, index=True)
+    job_id = Column(String, index=True)
+    position = Column(Integer) # order within the archive
+    member_name = Column(String)
+    status = Column(String, index=True) # pending, processed, failed
+    message = Column(Text, nullable=True)
+
+class SkillCount(Base):
+    __tablename__ = "analytics_skill_counts"
+
+    skill = Column(String, primary_key=True) # lowercased skill name
+    label = Column(String) # spelling as first seen, for display
+    count = Column(Integer, default=0, index=True) # candidates listing this skill
+
+class ExperienceBucket(Base):
+    __tablename__ = "analytics_experience_buckets"
+
+    bucket = Column(Integer, primary_key=True) # whole years of experience; the last bucket is open-ended
+    count = Column(Integer, default=0)
+    years_sum = Column(Float, default=0.0)
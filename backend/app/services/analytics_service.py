@@ -0,0 +1,127 @@
+import logging
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+from sqlalchemy import func
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+from app.core.config import ANALYTICS_MAX_EXPERIENCE_BUCKET
+from app.models import Candidate, SkillCount, ExperienceBucket
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# (skills, experience_years) of one candidate row
+CandidateStats = Tuple[Optional[Sequence[str]], Optional[float]]
+
+def experience_bucket(years: Optional[float]) -> int:
+    return min(max(int(years or 0), 0), ANALYTICS_MAX_EXPERIENCE_BUCKET)
+
+class AnalyticsService:
+    def __init__(self, rebuild_batch: int = 1000):
+        """
+        Talent-pool aggregates (skill counts, experience histogram) kept in SQLite and
+        updated in the same transaction as every candidate insert, update or delete,
+        so reading them never scans the candidates table.
+        """
+        self.rebuild_batch = rebuild_batch
+
+    def apply(self, db: Session, added: Iterable[CandidateStats] = (), removed: Iterable[CandidateStats] = ()):
+        """
+        Adjusts the aggregates for added and removed candidates (an update is both).
+        Does not commit; the caller's transaction covers the candidate rows and the aggregates.
+        """
+        skill_deltas: Counter = Counter()
+        labels: Dict[str, str] = {}
+        bucket_counts: Counter = Counter()
+        bucket_years: Counter = Counter()
+
+        for sign, rows in ((1, added), (-1, removed)):
+            for skills, years in rows:
+                # A skill listed twice by one candidate still counts that candidate once
+                normalized: Dict[str, str] = {}
+                for s in skills or []:
+                    if isinstance(s, str) and s.strip():
+                        normalized.setdefault(s.strip().lower(), s.strip())
+                for key, label in normalized.items():
+                    skill_deltas[key] += sign
+                    labels.setdefault(key, label)
+                bucket = experience_bucket(years)
+                bucket_counts[bucket] += sign
+                bucket_years[bucket] += sign * float(years or 0.0)
+
+        skill_rows = [{"skill": s, "label": labels[s], "count": d} for s, d in skill_deltas.items() if d]
+        if skill_rows:
+            stmt = sqlite_insert(SkillCount).values(skill_rows)
+            db.execute(stmt.on_conflict_do_update(
+                index_elements=[SkillCount.skill],
+                set_={"count": SkillCount.count + stmt.excluded.count}
+            ))
+            db.query(SkillCount).filter(
+                SkillCount.skill.in_([r["skill"] for r in skill_rows if r["count"] < 0]),
+                SkillCount.count <= 0
+            ).delete(synchronize_session=False)
+
+        bucket_rows = [
+            {"bucket": b, "count": bucket_counts[b], "years_sum": bucket_years[b]}
+            for b in bucket_counts if bucket_counts[b] or bucket_years[b]
+        ]
+        if bucket_rows:
+            stmt = sqlite_insert(ExperienceBucket).values(bucket_rows)
+            db.execute(stmt.on_conflict_do_update(
+                index_elements=[ExperienceBucket.bucket],
+                set_={
+                    "count": ExperienceBucket.count + stmt.excluded.count,
+                    "years_sum": ExperienceBucket.years_sum + stmt.excluded.years_sum,
+                }
+            ))
+
+    def summary(self, db: Session, top_skills: int = 10) -> Dict:
+        buckets = db.query(ExperienceBucket).order_by(ExperienceBucket.bucket).all()
+        total = sum(b.count for b in buckets)
+        years = sum(b.years_sum for b in buckets)
+        skills = (
+            db.query(SkillCount.label, SkillCount.count)
+            .filter(SkillCount.count > 0)
+            .order_by(SkillCount.count.desc(), SkillCount.skill)
+            .limit(top_skills)
+            .all()
+        )
+        return {
+            "total_candidates": total,
+            "average_experience": round(years / total, 2) if total else 0.0,
+            "distinct_skills": db.query(func.count(SkillCount.skill)).filter(SkillCount.count > 0).scalar(),
+            "top_skills": [{"skill": label, "count": count} for label, count in skills],
+            "experience_distribution": [
+                {
+                    "years": f"{b.bucket}+" if b.bucket == ANALYTICS_MAX_EXPERIENCE_BUCKET else str(b.bucket),
+                    "count": b.count,
+                }
+                for b in buckets if b.count > 0
+            ],
+        }
+
+    def ensure_consistent(self, db: Session):
+        """
+        Rebuilds the aggregates if they don't cover the candidates table, e.g. for a
+        database created before they existed. Called once at startup.
+        """
+        tracked = db.query(func.coalesce(func.sum(ExperienceBucket.count), 0)).scalar()
+        actual = db.query(func.count(Candidate.id)).scalar()
+        if tracked != actual:
+            logger.info(f"Analytics cover {tracked} of {actual} candidates; rebuilding.")
+            self.rebuild(db)
+
+    def rebuild(self, db: Session):
+        db.query(SkillCount).delete()
+        db.query(ExperienceBucket).delete()
+        query = db.query(Candidate.skills, Candidate.experience_years).order_by(Candidate.id)
+        batch: List[CandidateStats] = []
+        for row in query.yield_per(self.rebuild_batch):
+            batch.append((row.skills, row.experience_years))
+            if len(batch) >= self.rebuild_batch:
+                self.apply(db, added=batch)
+                batch = []
+        self.apply(db, added=batch)
+        db.commit()
+
+analytics_service = AnalyticsService()
@@ -0,0 +1,128 @@
+import faiss
+import numpy as np
+from typing import Optional
+from app.core.config import VECTOR_INDEX_TRAIN_SAMPLE, VECTOR_INDEX_NPROBE, VECTOR_INDEX_EF_SEARCH
+
+# Exact L2 search; the index every pool starts with
+FLAT_FACTORY = "Flat"
+
+def build_index(
+    factory: str,
+    vectors: np.ndarray,
+    dimension: int,
+    labels: Optional[np.ndarray] = None,
+    train_sample: int = VECTOR_INDEX_TRAIN_SAMPLE
+):
+    """
+    Builds a FAISS index from an index_factory string and adds vectors under labels
+    (0..n-1 by default). Labels are stable: they don't shift when other vectors are removed,
+    and searches, reconstruct() and remove_ids() all use them.
+    Index types that need training are trained on up to train_sample of the vectors.
+    Raises ValueError for index types that can't filter by id (see check_factory).
+    """
+    index = faiss.index_factory(dimension, factory, faiss.METRIC_L2)
+    _check_filterable(index, factory)
+    if not index.is_trained:
+        sample = vectors
+        if len(vectors) > train_sample:
+            sample = vectors[np.random.default_rng(0).choice(len(vectors), train_sample, replace=False)]
+        index.train(sample)
+    ivf = faiss.try_extract_index_ivf(index)
+    if ivf is not None:
+        # IVF stores the labels itself; the hashtable direct map reconstructs and removes by label
+        ivf.set_direct_map_type(faiss.DirectMap.Hashtable)
+    else:
+        # Other indexes number vectors by position; the id map gives them stable labels
+        index = faiss.IndexIDMap2(index)
+    if labels is None:
+        labels = np.arange(len(vectors), dtype=np.int64)
+    if len(vectors):
+        index.add_with_ids(vectors, labels)
+    return index
+
+def check_factory(factory: str, dimension: int):
+    """
+    Raises ValueError if factory is not a valid index type for the vector store, without
+    training anything: every search after a delete, and every filtered search, passes an
+    id selector, which FAISS rejects for some index types.
+    """
+    _check_filterable(faiss.index_factory(dimension, factory, faiss.METRIC_L2), factory)
+
+def _check_filterable(index, factory: str):
+    if faiss.try_extract_index_ivf(index) is not None:
+        return
+    if isinstance(index, faiss.IndexPreTransform):
+        # An id map around a pre-transform would not translate id selectors for the inner index
+        raise ValueError(f"{factory}: pre-transforms (PCA, OPQ, ...) are only supported in front of an IVF index.")
+    # Flat product-quantized (PQ, PQ..fs) and LSH indexes fail any search with an id selector.
+    # HNSW over PQ codes accepts one, but walks the graph on distances too coarse to reach
+    # the recall target even with a 32x re-rank (see benchmark_vector_index.py).
+    if isinstance(index, faiss.IndexHNSWPQ) or not isinstance(
+        index, (faiss.IndexFlat, faiss.IndexScalarQuantizer, faiss.IndexHNSW)
+    ):
+        raise ValueError(f"{factory}: PQ codes are only supported inside an IVF index, e.g. \"IVF1024,PQ48\".")
+
+def unwrap(index):
+    # The index behind an id map, which only translates labels
+    index = faiss.downcast_index(index)
+    if isinstance(index, faiss.IndexIDMap2):
+        return faiss.downcast_index(index.index)
+    return index
+
+def supports_remove(index) -> bool:
+    """
+    False for graph indexes (HNSW), which can't drop vectors and have to be rebuilt instead.
+    """
+    return not isinstance(unwrap(index), faiss.IndexHNSW)
+
+def _behind_transform(index):
+    # The index a pre-transform (PCA, OPQ, ...) feeds
+    return faiss.downcast_index(index.index) if isinstance(index, faiss.IndexPreTransform) else index
+
+def search_parameters(index, selector=None, nprobe: Optional[int] = None, ef_search: Optional[int] = None):
+    """
+    FAISS search parameters for index: nprobe for IVF indexes, efSearch for HNSW, plus an
+    optional id selector. Returns None for a plain exact search.
+    """
+    outer = unwrap(index)
+    inner = _behind_transform(outer)
+    if faiss.try_extract_index_ivf(inner) is not None:
+        params = faiss.SearchParametersIVF()
+        params.nprobe = nprobe or VECTOR_INDEX_NPROBE
+    elif isinstance(inner, faiss.IndexHNSW):
+        params = faiss.SearchParametersHNSW()
+        params.efSearch = ef_search or VECTOR_INDEX_EF_SEARCH
+    elif selector is not None:
+        params = faiss.SearchParameters()
+    else:
+        return None
+    if selector is not None:
+        params.sel = selector
+    if inner is not outer:
+        wrapper = faiss.SearchParametersPreTransform()
+        wrapper.index_params = params
+        wrapper.referenced_objects = [params]  # keeps the inner parameters alive with the wrapper
+        params = wrapper
+    return params
+
+def is_exact(index) -> bool:
+    """
+    True when index keeps full-precision vectors (Flat, IVF..,Flat, HNSW..), so the distances
+    it reports are exact; False for scalar/product-quantized codes and pre-transforms.
+    """
+    index = unwrap(index)
+    if isinstance(index, faiss.IndexFlat):
+        return True
+    if isinstance(index, faiss.IndexHNSW):
+        return isinstance(faiss.downcast_index(index.storage), faiss.IndexFlat)
+    if isinstance(index, faiss.IndexIVF):
+        return isinstance(index, faiss.IndexIVFFlat)
+    return False
+
+def is_product_quantized(index) -> bool:
+    """
+    True for indexes storing PQ codes (IVF..,PQ..), whose distances are coarse enough to
+    need a deeper re-rank than scalar-quantized ones.
+    """
+    ivf = faiss.try_extract_index_ivf(_behind_transform(unwrap(index)))
+    return ivf is not None and isinstance(faiss.downcast_index(ivf), (faiss.IndexIVFPQ, faiss.IndexIVFPQFastScan))
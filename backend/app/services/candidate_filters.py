@@ -0,0 +1,61 @@
+import logging
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+from sqlalchemy import func, literal_column, select
+from sqlalchemy.orm import Session
+from app.database import SessionLocal
+from app.models import Candidate
+from .lexical_search import lexical_search
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def has_skill(skill: str):
+    """
+    SQL condition: the candidate's skills list contains `skill` (case-insensitive, whole entry).
+    """
+    skill_values = func.json_each(Candidate.skills).table_valued("value")
+    return select(skill_values.c.value).where(func.lower(skill_values.c.value) == skill.strip().lower()).exists()
+
+def as_utc(value: datetime) -> datetime:
+    # upload_date is SQLite CURRENT_TIMESTAMP: naive UTC
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+def resolve_candidate_ids(filters: Optional[Dict]) -> Optional[List[int]]:
+    """
+    Turns structured match filters into the ids of the candidates that pass them,
+    or None when there is nothing to filter on.
+    Filters: min_experience, max_experience, skills (all required), uploaded_after, uploaded_before.
+    Each condition is index-backed (experience and upload date indexes, the FTS5 skills column),
+    so a selective filter reads only the rows it keeps.
+    """
+    filters = {key: value for key, value in (filters or {}).items() if value not in (None, [])}
+    if not filters:
+        return None
+
+    db: Session = SessionLocal()
+    try:
+        query = db.query(Candidate.id)
+        # Same expression as ix_candidates_experience_sort
+        experience = func.coalesce(Candidate.experience_years, literal_column("0.0"))
+        if "min_experience" in filters:
+            query = query.filter(experience >= filters["min_experience"])
+        if "max_experience" in filters:
+            query = query.filter(experience <= filters["max_experience"])
+        if "uploaded_after" in filters:
+            query = query.filter(Candidate.upload_date >= as_utc(filters["uploaded_after"]))
+        if "uploaded_before" in filters:
+            query = query.filter(Candidate.upload_date < as_utc(filters["uploaded_before"]))
+        for n, skill in enumerate(filters.get("skills", [])):
+            if not skill.strip():
+                continue
+            # The inverted index narrows to rows mentioning the skill; json_each then checks the exact entry
+            prefilter = lexical_search.skill_match_ids(skill, f"skill_{n}")
+            if prefilter is not None:
+                query = query.filter(Candidate.id.in_(prefilter))
+            query = query.filter(has_skill(skill))
+        return [candidate_id for (candidate_id,) in query.all()]
+    finally:
+        db.close()
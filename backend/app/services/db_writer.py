@@ -0,0 +1,77 @@
+import asyncio
+import logging
+import queue
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Optional
+from sqlalchemy.orm import Session
+from app.database import SessionLocal
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class DBWriter:
+    def __init__(self):
+        """
+        Single thread that performs the bulk writes (candidate upserts, cache entries).
+        SQLite allows one writer at a time, so concurrent requests queue here instead of
+        contending for the write lock; each submitted function gets a fresh session and
+        runs as one transaction.
+        """
+        self._queue: "queue.Queue[Optional[tuple]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+
+    def submit(self, fn: Callable[..., Any], *args) -> Future:
+        """
+        Queues fn(db, *args) and returns a Future with its result.
+        fn is responsible for committing; the session is rolled back if it raises.
+        """
+        self._ensure_started()
+        future: Future = Future()
+        self._queue.put((fn, args, future))
+        return future
+
+    async def run(self, fn: Callable[..., Any], *args) -> Any:
+        """
+        Awaitable submit(): the event loop stays free while the write waits its turn.
+        """
+        return await asyncio.wrap_future(self.submit(fn, *args))
+
+    def stop(self):
+        """
+        Finishes the queued writes and stops the thread.
+        """
+        with self._start_lock:
+            if self._thread is None:
+                return
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+
+    def _ensure_started(self):
+        # Started lazily so scripts that never write (or never run the app lifespan) don't need it
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop, name="db-writer", daemon=True)
+                self._thread.start()
+
+    def _loop(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            fn, args, future = item
+            if not future.set_running_or_notify_cancel():
+                continue
+            db: Session = SessionLocal()
+            try:
+                future.set_result(fn(db, *args))
+            except Exception as e:
+                logger.error(f"Database write failed: {e}")
+                db.rollback()
+                future.set_exception(e)
+            finally:
+                db.close()
+
+db_writer = DBWriter()
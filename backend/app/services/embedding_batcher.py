@@ -0,0 +1,151 @@
+import logging
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Any, Callable, Deque, Dict, List, Optional, Sequence
+import numpy as np
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class _Request:
+    __slots__ = ("texts", "future", "submitted")
+
+    def __init__(self, texts: List[str]):
+        self.texts = texts
+        self.future: Future = Future()
+        self.submitted = time.monotonic()
+
+class EmbeddingBatcher:
+    def __init__(
+        self,
+        embed_fn: Callable[[List[str]], List[List[float]]],
+        max_batch_size: int,
+        max_wait: float,
+        window: int = 1000
+    ):
+        """
+        Dynamic micro-batching in front of the embedding model. Requests from concurrent
+        callers (match queries, single uploads) that arrive within max_wait seconds of each
+        other are joined into one forward pass of up to max_batch_size texts, and each caller
+        gets its own slice of the result. A single thread runs the model, so batch-1 passes no
+        longer compete for the CPU. A request larger than max_batch_size runs as its own batch.
+        max_batch_size <= 1 turns batching off: embed() then calls embed_fn directly.
+        """
+        self.embed_fn = embed_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self._queue: "queue.Queue[_Request]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+
+        # Metrics: totals plus a sliding window of recent batches for the distributions
+        self._stats_lock = threading.Lock()
+        self.batches = 0
+        self.requests = 0
+        self.texts = 0
+        self._fill: Deque[float] = deque(maxlen=window)
+        self._queue_delays: Deque[float] = deque(maxlen=window)
+        self._run_times: Deque[float] = deque(maxlen=window)
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_batch_size > 1
+
+    def submit(self, texts: Sequence[str]) -> Future:
+        """
+        Queues texts for the next batch and returns a Future with their vectors, in order.
+        """
+        self._ensure_started()
+        request = _Request(list(texts))
+        self._queue.put(request)
+        return request.future
+
+    def embed(self, texts: Sequence[str]) -> List[List[float]]:
+        """
+        Blocking submit(). Raises what the model raised for the batch the texts ran in.
+        """
+        if not texts:
+            return []
+        if not self.enabled:
+            return self.embed_fn(list(texts))
+        return self.submit(texts).result()
+
+    def _ensure_started(self):
+        # Started lazily so scripts that never embed don't need it
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop, name="embedding-batcher", daemon=True)
+                self._thread.start()
+
+    def _loop(self):
+        carried: Optional[_Request] = None
+        while True:
+            first = carried or self._queue.get()
+            carried = None
+            batch, size = [first], len(first.texts)
+            # The window is measured from the oldest request: one that already waited through the
+            # previous forward pass only picks up what is queued, without waiting any longer
+            deadline = first.submitted + self.max_wait
+            while size < self.max_batch_size:
+                timeout = deadline - time.monotonic()
+                try:
+                    request = self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if size + len(request.texts) > self.max_batch_size:
+                    carried = request  # starts the next batch
+                    break
+                batch.append(request)
+                size += len(request.texts)
+            self._run(batch, size)
+
+    def _run(self, batch: List[_Request], size: int):
+        start = time.monotonic()
+        texts = [text for request in batch for text in request.texts]
+        try:
+            vectors = self.embed_fn(texts)
+            if len(vectors) != len(texts):
+                raise ValueError(f"Model returned {len(vectors)} vectors for {len(texts)} texts")
+        except Exception as e:
+            logger.error(f"Embedding batch of {len(texts)} texts failed: {e}")
+            for request in batch:
+                request.future.set_exception(e)
+        else:
+            offset = 0
+            for request in batch:
+                request.future.set_result(vectors[offset:offset + len(request.texts)])
+                offset += len(request.texts)
+
+        with self._stats_lock:
+            self.batches += 1
+            self.requests += len(batch)
+            self.texts += size
+            self._fill.append(min(size / self.max_batch_size, 1.0))
+            self._queue_delays.extend(start - request.submitted for request in batch)
+            self._run_times.append(time.monotonic() - start)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            delays = np.array(self._queue_delays) * 1000
+            run_times = np.array(self._run_times) * 1000
+            return {
+                "enabled": self.enabled,
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait * 1000,
+                "batches": self.batches,
+                "requests": self.requests,
+                "texts": self.texts,
+                "mean_batch_size": round(self.texts / self.batches, 2) if self.batches else 0.0,
+                # Over the recent window
+                "fill_ratio": round(float(np.mean(self._fill)), 4) if self._fill else 0.0,
+                "queue_delay_ms": {
+                    "mean": round(float(delays.mean()), 3) if len(delays) else 0.0,
+                    "p50": round(float(np.percentile(delays, 50)), 3) if len(delays) else 0.0,
+                    "p99": round(float(np.percentile(delays, 99)), 3) if len(delays) else 0.0,
+                },
+                "batch_run_ms": round(float(run_times.mean()), 3) if len(run_times) else 0.0,
+                "queued": self._queue.qsize(),
+            }
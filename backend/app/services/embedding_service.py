@@ -1,37 +1,171 @@
+import hashlib
 import logging
-from langchain_huggingface import HuggingFaceEmbeddings
-from typing import List
+import numpy as np
+from typing import List, Optional, Sequence
+from app.core.config import (
+    QUERY_EMBEDDING_CACHE_SIZE,
+    EMBEDDING_BACKEND,
+    EMBEDDING_ONNX_DIR,
+    EMBEDDING_THREADS,
+    EMBEDDING_BATCH_SIZE,
+    EMBEDDING_BATCH_MAX_SIZE,
+    EMBEDDING_BATCH_MAX_WAIT_MS,
+)
+from .embedding_batcher import EmbeddingBatcher
+from .lru_cache import LRUCache
+from .registry import service_registry
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class EmbeddingService:
-    def __init__(self, model_name: str = "all-MiniLM-L6-v2"):
+    def __init__(
+        self,
+        model_name: str = "all-MiniLM-L6-v2",
+        query_cache_size: int = QUERY_EMBEDDING_CACHE_SIZE,
+        backend: str = EMBEDDING_BACKEND,
+        threads: int = EMBEDDING_THREADS,
+        embeddings=None
+    ):
         """
-        Initializes the embedding service with a specified HuggingFace model.
+        Initializes the embedding service with a specified HuggingFace model, run by PyTorch
+        ("torch") or as an int8-quantized ONNX export through onnxruntime ("onnx").
+        A LangChain Embeddings object passed as embeddings is used instead (e.g. a stub in tests).
         """
-        logger.info(f"Loading embedding model: {model_name}")
-        self.embeddings = HuggingFaceEmbeddings(model_name=model_name)
+        self.model_name = model_name
+        self.backend = backend
+        if embeddings is not None:
+            self.embeddings = embeddings
+            self.backend = "custom"
+        else:
+            self._load_model(model_name, threads)
+        # Every model call goes through the batcher, so concurrent single-text requests share forward passes
+        self.batcher = EmbeddingBatcher(self.embeddings.embed_documents, EMBEDDING_BATCH_MAX_SIZE, EMBEDDING_BATCH_MAX_WAIT_MS / 1000)
+        # Repeated job descriptions skip the forward pass
+        self.query_cache = LRUCache(query_cache_size)
+
+    def _load_model(self, model_name: str, threads: int):
+        logger.info(f"Loading embedding model: {model_name} ({self.backend} backend)")
+        if self.backend == "onnx":
+            try:
+                from .onnx_embeddings import OnnxEmbeddings
+                self.embeddings = OnnxEmbeddings(model_name, EMBEDDING_ONNX_DIR, threads, EMBEDDING_BATCH_SIZE)
+            except Exception as e:
+                logger.warning(f"ONNX embedding backend unavailable, using PyTorch: {e}")
+                self.backend = "torch"
+        if self.backend != "onnx":
+            self.backend = "torch"
+            # Imported here: the HuggingFace stack is slow to import and only needed once the model loads
+            from langchain_huggingface import HuggingFaceEmbeddings
+            if threads > 0:
+                import torch
+                torch.set_num_threads(threads)
+            self.embeddings = HuggingFaceEmbeddings(model_name=model_name)
 
     def embed_text(self, text: str) -> List[float]:
         """
         Generates an embedding for a single string of text.
         """
         try:
-            return self.embeddings.embed_query(text)
+            return self.batcher.embed([text])[0]
         except Exception as e:
             logger.error(f"Error generating embedding: {e}")
             return []
 
+    def embed_query(self, text: str) -> Optional[np.ndarray]:
+        """
+        Embeds a search query (job description), served from an LRU keyed by the
+        hash of the whitespace-normalized text. Returns None on failure.
+        The returned array is shared with the cache and must not be modified.
+        """
+        key = hashlib.sha256(" ".join(text.split()).encode("utf-8")).hexdigest()
+        vector = self.query_cache.get(key)
+        if vector is not None:
+            return vector
+        try:
+            vector = np.asarray(self.batcher.embed([text])[0], dtype=np.float32)
+        except Exception as e:
+            logger.error(f"Error generating query embedding: {e}")
+            return None
+        vector.flags.writeable = False
+        self.query_cache.put(key, vector)
+        return vector
+
+    def embed_queries(self, texts: List[str]) -> List[Optional[np.ndarray]]:
+        """
+        Batched embed_query: cache misses go through the model in a single forward pass.
+        Returns one read-only vector per input, None where embedding failed.
+        """
+        keys = [hashlib.sha256(" ".join(text.split()).encode("utf-8")).hexdigest() for text in texts]
+        vectors: List[Optional[np.ndarray]] = [self.query_cache.get(key) for key in keys]
+
+        # Duplicate queries in the batch are embedded once
+        missing = {}
+        for i, (key, vector) in enumerate(zip(keys, vectors)):
+            if vector is None:
+                missing.setdefault(key, []).append(i)
+        if not missing:
+            return vectors
+
+        positions = list(missing.values())
+        try:
+            # all-MiniLM-L6-v2 embeds queries and documents identically, so one batched call serves both
+            batch = self.batcher.embed([texts[p[0]] for p in positions])
+        except Exception as e:
+            logger.error(f"Error generating query embeddings: {e}")
+            batch = [None] * len(positions)
+
+        for key, indexes, raw in zip(missing, positions, batch):
+            if raw is None:
+                # Fall back to one at a time so one bad query only costs its own entry
+                vector = self.embed_query(texts[indexes[0]])
+            else:
+                vector = np.asarray(raw, dtype=np.float32)
+                vector.flags.writeable = False
+                self.query_cache.put(key, vector)
+            for i in indexes:
+                vectors[i] = vector
+        return vectors
+
     def embed_documents(self, texts: List[str]) -> List[List[float]]:
         """
         Generates embeddings for a list of documents.
         """
         try:
-            return self.embeddings.embed_documents(texts)
+            return self.batcher.embed(texts)
         except Exception as e:
             logger.error(f"Error generating embeddings for documents: {e}")
             return []
 
-# Singleton instance
-embedding_service = EmbeddingService()
+    def embed_documents_batched(self, texts: List[str], batch_size: int = 32) -> List[Optional[List[float]]]:
+        """
+        Embeds texts in chunks of batch_size so the model runs full batches.
+        Returns one entry per input; a chunk that fails is retried text by text
+        so a single bad document only costs its own entry (None).
+        """
+        results: List[Optional[List[float]]] = []
+        for start in range(0, len(texts), batch_size):
+            chunk = texts[start:start + batch_size]
+            vectors = self.embed_documents(chunk)
+            if len(vectors) != len(chunk):
+                vectors = []
+                for text in chunk:
+                    single = self.embed_documents([text])
+                    vectors.append(single[0] if single else None)
+            results.extend(vectors)
+        return results
+
+def serialize_embedding(vector: Sequence[float]) -> bytes:
+    """
+    Packs an embedding as raw float32 bytes for storage in SQLite.
+    """
+    return np.asarray(vector, dtype=np.float32).tobytes()
+
+def deserialize_embedding(blob: bytes) -> np.ndarray:
+    """
+    Unpacks an embedding stored with serialize_embedding.
+    """
+    return np.frombuffer(blob, dtype=np.float32)
+
+# Singleton instance, created on first use (see registry.py)
+embedding_service = service_registry.register("embeddings", EmbeddingService)
@@ -1,12 +1,15 @@
+import asyncio
 import logging
 import os
 import os
+import re
 from typing import Optional, List
 # from langchain_openai import ChatOpenAI
-from langchain_google_genai import ChatGoogleGenerativeAI
 from pydantic import BaseModel, Field
-from langchain_core.prompts import ChatPromptTemplate
 from dotenv import load_dotenv
+from app.core.config import LLM_PROVIDER, FAKE_LLM_LATENCY, EXTRACTION_CONCURRENCY
+from .rate_limiter import llm_rate_limiter, estimate_tokens
+from .registry import service_registry
 
 load_dotenv()
 
@@ -22,12 +25,33 @@ class ResumeData(BaseModel):
     tools: List[str] = Field(description="Specific tools, libraries, or frameworks used")
     job_roles: List[str] = Field(description="List of job titles or roles held")
 
+# Resumes are truncated to this many characters before being sent to the LLM
+MAX_RESUME_CHARS = 10000
+# Allowance for the structured response when reserving tokens against the quota
+EXTRACTION_COMPLETION_TOKENS = 500
+
+# LangChain is imported when the service is created, so importing this module stays cheap
+EXTRACTION_MESSAGES = [
+    ("system", "You are an expert resume parser. Extract the following information from the resume text."),
+    ("user", "{text}")
+]
+
 class ExtractionService:
-    def __init__(self):
+    def __init__(self, concurrency: int = EXTRACTION_CONCURRENCY):
+        from langchain_core.prompts import ChatPromptTemplate
+        self.prompt = ChatPromptTemplate.from_messages(EXTRACTION_MESSAGES)
         # Support both keys for flexibility, prioritize Google for now as requested
         self.api_key = os.getenv("GOOGLE_API_KEY") or os.getenv("OPENAI_API_KEY")
+        self.concurrency = concurrency
+        self.rate_limiter = llm_rate_limiter
         
-        if not self.api_key:
+        if LLM_PROVIDER == "fake":
+            # Offline model for throughput testing; no API calls are made
+            from .fake_llm import FakeStructuredChatModel
+            logger.info("Using fake LLM for resume extraction.")
+            self.llm = FakeStructuredChatModel(latency=FAKE_LLM_LATENCY)
+            self.structured_llm = self.llm.with_structured_output(ResumeData)
+        elif not self.api_key:
             logger.warning("No API Key found (OPENAI_API_KEY or GOOGLE_API_KEY). Validation will fail.")
             self.llm = None
         else:
@@ -35,6 +59,7 @@ class ExtractionService:
             if os.getenv("GOOGLE_API_KEY"):
                 # Using 2.0-flash as confirmed by list_models
                 print("--- INITIALIZING GEMINI 2.0 FLASH ---")
+                from langchain_google_genai import ChatGoogleGenerativeAI
                 self.llm = ChatGoogleGenerativeAI(
                     model="gemini-2.0-flash", 
                     temperature=0, 
@@ -48,63 +73,98 @@ class ExtractionService:
             
             self.structured_llm = self.llm.with_structured_output(ResumeData)
 
+    def _missing_llm_result(self) -> dict:
+        logger.error("Cannot extract data: OPENAI_API_KEY is missing.")
+        return {
+            "error": "OpenAI API Key missing. Data extraction disabled.",
+            "name": "Unknown",
+            "skills": [],
+            "experience_years": 0.0,
+            "education": [],
+            "tools": [],
+            "job_roles": []
+        }
+
+    def _prepare(self, text: str):
+        # We truncate text to avoid token limits if the resume is huge, 
+        # but usually resumes fit in context.
+        truncated_text = text[:MAX_RESUME_CHARS]
+        chain = self.prompt | self.structured_llm
+        return chain, {"text": truncated_text}, estimate_tokens(truncated_text, EXTRACTION_COMPLETION_TOKENS)
+
     def extract_data(self, text: str) -> Optional[dict]:
         """
         Extracts structured data from resume text using LLM.
         """
         if not self.llm:
-            logger.error("Cannot extract data: OPENAI_API_KEY is missing.")
-            return {
-                "error": "OpenAI API Key missing. Data extraction disabled.",
-                "name": "Unknown",
-                "skills": [],
-                "experience_years": 0.0,
-                "education": [],
-                "tools": [],
-                "job_roles": []
-            }
+            return self._missing_llm_result()
 
         try:
-            # We truncate text to avoid token limits if the resume is huge, 
-            # but usually resumes fit in context.
-            truncated_text = text[:10000] 
-            
-            prompt = ChatPromptTemplate.from_messages([
-                ("system", "You are an expert resume parser. Extract the following information from the resume text."),
-                ("user", "{text}")
-            ])
-            
-            chain = prompt | self.structured_llm
-            result = chain.invoke({"text": truncated_text})
+            chain, inputs, tokens = self._prepare(text)
+            self.rate_limiter.wait(tokens)
+            result = chain.invoke(inputs)
             
             return result.dict()
             
         except Exception as e:
             logger.error(f"Error extracting data with LLM: {e}")
-            
-            # --- IMPROVED FALLBACK LOGIC ---
-            import re
-            
-            # 1. Try to find Email
-            email_match = re.search(r'[\w\.-]+@[\w\.-]+', text)
-            email = email_match.group(0) if email_match else "Unknown Email"
-            
-            # 2. Try to guess Name (First non-empty line)
-            lines = [line.strip() for line in text.split('\n') if line.strip()]
-            name = lines[0] if lines else "Unknown Candidate"
-            
-            # 3. Simple Keyword Extraction for Skills
-            common_skills = ["Python", "Java", "C++", "JavaScript", "React", "Angular", "Vue", "Node.js", "Django", "FastAPI", "Flask", "SQL", "NoSQL", "Docker", "Kubernetes", "AWS", "Azure", "GCP", "Machine Learning", "Deep Learning", "NLP", "Git", "Communication", "Leadership", "Problem Solving"]
-            found_skills = [skill for skill in common_skills if skill.lower() in text.lower()]
-            
-            return {
-                "error": f"Extraction failed (using fallback): {str(e)}",
-                "name": name,
-                "skills": found_skills if found_skills else ["No skills found"],
-                "experience_years": 0.0,
-                "education": [],
-                "tools": [],
-                "job_roles": [email] # storing email in roles for visibility
-            }
-
-extraction_service = ExtractionService()
+            return self._fallback_data(text, e)
+
+    async def aextract_data(self, text: str) -> Optional[dict]:
+        """
+        Async variant of extract_data: waits on the shared rate limiter and uses ainvoke.
+        """
+        if not self.llm:
+            return self._missing_llm_result()
+
+        try:
+            chain, inputs, tokens = self._prepare(text)
+            await self.rate_limiter.acquire(tokens)
+            result = await chain.ainvoke(inputs)
+
+            return result.dict()
+
+        except Exception as e:
+            logger.error(f"Error extracting data with LLM: {e}")
+            return self._fallback_data(text, e)
+
+    async def aextract_batch(self, texts: List[str]) -> List[dict]:
+        """
+        Extracts structured data for many resumes concurrently.
+        At most `concurrency` calls are in flight; the rate limiter paces them to the
+        provider's RPM/TPM quota. Results are returned in input order.
+        """
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def run(text: str) -> dict:
+            async with semaphore:
+                return await self.aextract_data(text)
+
+        return await asyncio.gather(*(run(text) for text in texts))
+
+    def _fallback_data(self, text: str, e: Exception) -> dict:
+        # --- IMPROVED FALLBACK LOGIC ---
+        
+        # 1. Try to find Email
+        email_match = re.search(r'[\w\.-]+@[\w\.-]+', text)
+        email = email_match.group(0) if email_match else "Unknown Email"
+        
+        # 2. Try to guess Name (First non-empty line)
+        lines = [line.strip() for line in text.split('\n') if line.strip()]
+        name = lines[0] if lines else "Unknown Candidate"
+        
+        # 3. Simple Keyword Extraction for Skills
+        common_skills = ["Python", "Java", "C++", "JavaScript", "React", "Angular", "Vue", "Node.js", "Django", "FastAPI", "Flask", "SQL", "NoSQL", "Docker", "Kubernetes", "AWS", "Azure", "GCP", "Machine Learning", "Deep Learning", "NLP", "Git", "Communication", "Leadership", "Problem Solving"]
+        found_skills = [skill for skill in common_skills if skill.lower() in text.lower()]
+        
+        return {
+            "error": f"Extraction failed (using fallback): {str(e)}",
+            "name": name,
+            "skills": found_skills if found_skills else ["No skills found"],
+            "experience_years": 0.0,
+            "education": [],
+            "tools": [],
+            "job_roles": [email] # storing email in roles for visibility
+        }
+
+extraction_service = service_registry.register("extraction", ExtractionService)
@@ -0,0 +1,57 @@
+import asyncio
+import time
+import typing
+from typing import Any, List, Optional
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.runnables import RunnableLambda
+
+def _placeholder(annotation: Any) -> Any:
+    origin = typing.get_origin(annotation)
+    if origin in (list, List):
+        return []
+    if origin is typing.Union:
+        return None
+    if annotation is float:
+        return 0.0
+    if annotation is int:
+        return 0
+    if annotation is bool:
+        return False
+    return ""
+
+class FakeStructuredChatModel(BaseChatModel):
+    """
+    Offline stand-in for the Gemini/OpenAI chat models (LLM_PROVIDER=fake).
+    Sleeps for `latency` seconds per call and returns placeholder values for
+    structured output, so throughput and rate limiting can be measured without an API key.
+    """
+    latency: float = 0.5
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-structured"
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs) -> ChatResult:
+        time.sleep(self.latency)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content="{}"))])
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs) -> ChatResult:
+        await asyncio.sleep(self.latency)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content="{}"))])
+
+    def with_structured_output(self, schema, **kwargs):
+        def build(_input):
+            values = {name: _placeholder(field.annotation) for name, field in schema.model_fields.items()}
+            return schema(**values)
+
+        def invoke(_input):
+            time.sleep(self.latency)
+            return build(_input)
+
+        async def ainvoke(_input):
+            await asyncio.sleep(self.latency)
+            return build(_input)
+
+        return RunnableLambda(invoke, afunc=ainvoke)
@@ -0,0 +1,339 @@
+import asyncio
+import logging
+import zipfile
+from typing import AsyncIterator, BinaryIO, Dict, Iterator, List, Optional, Tuple
+from pydantic import BaseModel
+from sqlalchemy import func
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+from app.core.config import EMBEDDING_BATCH_SIZE, ZIP_CHUNK_SIZE, MAX_PDF_BYTES, DB_WRITE_CHUNK_SIZE
+from app.models import Candidate
+from .analytics_service import analytics_service
+from .db_writer import db_writer
+from .embedding_service import embedding_service, serialize_embedding
+from .extraction_service import extraction_service
+from .resume_cache import resume_cache, hash_bytes, hash_text
+from .resume_parser import extract_texts_from_pdfs
+from .score_cache import score_cache
+from .vector_db import vector_db, resume_metadata
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Services the upload pipeline needs loaded (see registry.py)
+INGEST_SERVICES = ("embeddings", "extraction", "vector_db")
+
+class ProcessedResume(BaseModel):
+    filename: str
+    text: str
+    extracted_data: dict
+    embedding: Optional[List[float]] = None
+    cached: bool = False
+
+class SavedCandidate(BaseModel):
+    id: int
+    filename: str
+    updated: bool = False  # True when an existing row with this filename was overwritten
+    embedding_version: Optional[int] = None
+
+def guess_email(extracted_data: dict) -> Optional[str]:
+    # The extraction fallback stores the email in job_roles (see ExtractionService._fallback_data)
+    for role in extracted_data.get("job_roles") or []:
+        if "@" in role:
+            return role
+    return None
+
+def pdf_members(zip_ref: zipfile.ZipFile) -> Iterator[zipfile.ZipInfo]:
+    """
+    Yields the PDF entries of an archive, skipping directories and macOS metadata.
+    """
+    for info in zip_ref.infolist():
+        filename = info.filename
+        if filename.lower().endswith(".pdf") and not filename.startswith("__MACOSX") and not filename.endswith("/"):
+            yield info
+
+def read_member(zip_ref: zipfile.ZipFile, info: zipfile.ZipInfo) -> bytes:
+    with zip_ref.open(info) as pdf_file:
+        return pdf_file.read()
+
+class IngestionService:
+    def __init__(self):
+        """
+        Shared upload pipeline: PDF bytes -> text -> structured data -> embedding -> SQLite + FAISS.
+        Every step is skipped for content already in the resume cache.
+        """
+        self.cache = resume_cache
+
+    async def process_pdfs(self, db: Session, files: List[Tuple[str, bytes]]) -> List[Optional[ProcessedResume]]:
+        """
+        Runs the pipeline for a batch of (filename, pdf_bytes).
+        Returns one entry per input, None where no text could be extracted.
+        """
+        results: List[Optional[ProcessedResume]] = [None] * len(files)
+        pdf_hashes = [hash_bytes(pdf_bytes) for _, pdf_bytes in files]
+
+        # 1. Identical PDF bytes: skip parsing entirely
+        # (cache lookups may read SQLite, so they run in a worker thread)
+        pdf_entries = await asyncio.to_thread(lambda: [self.cache.lookup_pdf(db, pdf_hash) for pdf_hash in pdf_hashes])
+        to_parse = []
+        for i, ((filename, _), entry) in enumerate(zip(files, pdf_entries)):
+            if entry is not None:
+                results[i] = self._from_cache(filename, entry)
+            else:
+                to_parse.append(i)
+
+        texts = await extract_texts_from_pdfs([files[i][1] for i in to_parse])
+
+        # 2. Identical text (e.g. the same resume re-exported): skip the LLM and embedding
+        text_hashes = {i: hash_text(text) for i, text in zip(to_parse, texts) if text}
+        text_entries = await asyncio.to_thread(
+            lambda: {text_hash: self.cache.lookup_text(db, text_hash) for text_hash in set(text_hashes.values())}
+        )
+        to_extract = {}  # text_hash -> (text, [result positions]); duplicates inside the batch run once
+        for i, text in zip(to_parse, texts):
+            filename = files[i][0]
+            if not text:
+                logger.warning(f"Empty text for file: {filename}")
+                continue
+            text_hash = text_hashes[i]
+            if text_hash in to_extract:
+                to_extract[text_hash][1].append(i)
+                continue
+            entry = text_entries[text_hash]
+            if entry is not None:
+                results[i] = self._from_cache(filename, entry)
+            else:
+                to_extract[text_hash] = (text, [i])
+
+        if not to_extract:
+            return results
+
+        # 3. New content: extract concurrently (paced to the LLM quota), then embed in batches
+        pending = list(to_extract.values())
+        extracted = await extraction_service.aextract_batch([text for text, _ in pending])
+        # In a worker thread: the forward passes queue in the embedding batcher without holding the event loop
+        embeddings = await asyncio.to_thread(
+            embedding_service.embed_documents_batched, [text for text, _ in pending], EMBEDDING_BATCH_SIZE
+        )
+
+        cache_entries = []
+        for (text, positions), extracted_data, embedding in zip(pending, extracted, embeddings):
+            for i in positions:
+                results[i] = ProcessedResume(
+                    filename=files[i][0],
+                    text=text,
+                    extracted_data=dict(extracted_data),
+                    embedding=embedding
+                )
+            cache_entries.append((pdf_hashes[positions[0]], text, extracted_data, embedding))
+        await db_writer.run(self.cache.store_many, cache_entries)
+
+        return results
+
+    def _from_cache(self, filename: str, entry: dict) -> ProcessedResume:
+        return ProcessedResume(
+            filename=filename,
+            text=entry["extracted_text"],
+            extracted_data=dict(entry["resume_data"]),
+            embedding=entry["embedding"],
+            cached=True
+        )
+
+    async def save_candidates(self, resumes: List[ProcessedResume]) -> List[Optional[SavedCandidate]]:
+        """
+        Upserts the candidate rows through the single DB writer, one transaction per call.
+        Returns one entry per resume, None where the row could not be saved.
+        """
+        if not resumes:
+            return []
+        return await db_writer.run(self._write_candidates, resumes)
+
+    def _write_candidates(self, db: Session, resumes: List[ProcessedResume]) -> List[Optional[SavedCandidate]]:
+        # Runs on the writer thread. A re-uploaded filename updates its existing row
+        # (ON CONFLICT DO UPDATE) instead of failing the insert.
+        # One new embedding version per call; the single writer makes max + 1 race-free
+        version = (db.query(func.max(Candidate.embedding_version)).scalar() or 0) + 1
+        rows = {}
+        for resume in resumes:
+            rows[resume.filename] = self._candidate_row(resume, version)  # last upload of a filename wins
+
+        saved = {}
+        rows = list(rows.values())
+        try:
+            for start in range(0, len(rows), DB_WRITE_CHUNK_SIZE):
+                saved.update(self._upsert_chunk(db, rows[start:start + DB_WRITE_CHUNK_SIZE]))
+            db.commit()
+        except Exception as db_e:
+            # Fall back to row-by-row so one bad row doesn't lose the whole batch
+            logger.error(f"DB Save Error: {db_e}")
+            db.rollback()
+            saved = {}
+            for row in rows:
+                try:
+                    saved.update(self._upsert_chunk(db, [row]))
+                    db.commit()
+                except Exception as row_e:
+                    logger.error(f"DB Save Error ({row['filename']}): {row_e}")
+                    db.rollback()
+
+        return [saved.get(resume.filename) for resume in resumes]
+
+    def _candidate_row(self, resume: ProcessedResume, embedding_version: int) -> Dict:
+        extracted_data = resume.extracted_data
+        return {
+            "filename": resume.filename,
+            "name": extracted_data.get("name", "Unknown"),
+            "email": guess_email(extracted_data),
+            "experience_years": extracted_data.get("experience_years", 0.0),
+            "skills": extracted_data.get("skills", []),
+            "education": extracted_data.get("education", []),
+            "resume_data": extracted_data,
+            "extracted_text": resume.text,
+            "embedding": serialize_embedding(resume.embedding) if resume.embedding is not None else None,
+            "embedding_version": embedding_version if resume.embedding is not None else None,
+        }
+
+    def _upsert_chunk(self, db: Session, rows: List[Dict]) -> Dict[str, SavedCandidate]:
+        filenames = [row["filename"] for row in rows]
+        existing = {
+            row.filename: row for row in
+            db.query(Candidate.filename, Candidate.skills, Candidate.experience_years)
+            .filter(Candidate.filename.in_(filenames))
+        }
+        stmt = sqlite_insert(Candidate).values(rows)
+        update = {name: stmt.excluded[name] for name in rows[0] if name != "filename"}
+        # A failed (NULL) embedding keeps the stored vector, matching the index, which keeps it too
+        update["embedding"] = func.coalesce(stmt.excluded.embedding, Candidate.embedding)
+        update["embedding_version"] = func.coalesce(stmt.excluded.embedding_version, Candidate.embedding_version)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[Candidate.filename], set_=update
+        ).returning(Candidate.id, Candidate.filename, Candidate.embedding_version)
+        saved = {
+            filename: SavedCandidate(
+                id=candidate_id, filename=filename, updated=filename in existing, embedding_version=embedding_version
+            )
+            for candidate_id, filename, embedding_version in db.execute(stmt)
+        }
+
+        # Same transaction as the rows, so the dashboard aggregates never drift from the table
+        analytics_service.apply(
+            db,
+            added=[(row["skills"], row["experience_years"]) for row in rows],
+            removed=[(row.skills, row.experience_years) for row in existing.values()]
+        )
+        return saved
+
+    def index_candidates(self, saved: List[Tuple[ProcessedResume, SavedCandidate]]):
+        """
+        Adds saved candidates to the vector index in one bulk insert (blocking; async callers
+        run it in a worker thread).
+        Only rows that made it into SQLite are indexed, and an updated row replaces its
+        candidate's existing vector, so the index never holds two vectors for one candidate.
+        """
+        latest = {}
+        for resume, candidate in saved:
+            if resume.embedding is None:
+                logger.error(f"No embedding for {resume.filename}; it will not be searchable.")
+                continue
+            latest[candidate.id] = (resume, candidate)  # the same filename twice in a batch maps to one row
+
+        embeddings, metadatas = [], []
+        for resume, candidate in latest.values():
+            # Store in Vector DB with structured data in metadata
+            metadata = resume_metadata(candidate.id, resume.filename, resume.extracted_data)
+            # Compared with the row on load, so a re-upload the saved index missed is detected
+            metadata["embedding_version"] = candidate.embedding_version
+            embeddings.append(resume.embedding)
+            metadatas.append(metadata)
+        vector_db.add_resumes(embeddings, metadatas)
+
+    async def delete_candidate(self, candidate_id: int) -> Optional[str]:
+        """
+        Removes a candidate from every store: the SQLite row (and with it the FTS entry),
+        the analytics aggregates, cached scores and the vector index.
+        Returns the deleted filename, or None if there was no such candidate.
+        """
+        filename = await db_writer.run(self._delete_candidate_row, candidate_id)
+        if filename is not None:
+            await asyncio.to_thread(vector_db.delete_candidates, [candidate_id])
+        return filename
+
+    def _delete_candidate_row(self, db: Session, candidate_id: int) -> Optional[str]:
+        # Runs on the writer thread; the row, its aggregates and its cached scores go in one transaction
+        candidate = db.get(Candidate, candidate_id)
+        if candidate is None:
+            return None
+        filename = candidate.filename
+        try:
+            analytics_service.apply(db, removed=[(candidate.skills, candidate.experience_years)])
+            score_cache.delete_candidate(db, candidate_id)
+            db.delete(candidate)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        return filename
+
+    async def ingest_zip(self, db: Session, archive: BinaryIO, chunk_size: int = ZIP_CHUNK_SIZE) -> AsyncIterator[Dict]:
+        """
+        Streams an archive through the pipeline, reading members one at a time and
+        processing them in chunks of chunk_size so batching still applies while memory
+        stays bounded by the chunk, not the archive.
+        Yields one event per PDF member once it is saved and indexed:
+        {"filename", "status": "processed" | "failed", "message", "extracted_data"?}.
+        """
+        with zipfile.ZipFile(archive, 'r') as zip_ref:
+            chunk = []
+            for info in pdf_members(zip_ref):
+                if info.file_size > MAX_PDF_BYTES:
+                    yield {"filename": info.filename, "status": "failed", "message": "File too large."}
+                    continue
+                try:
+                    chunk.append((info.filename, await asyncio.to_thread(read_member, zip_ref, info)))
+                except Exception as inner_e:
+                    logger.error(f"Error processing matching file {info.filename} in zip: {inner_e}")
+                    yield {"filename": info.filename, "status": "failed", "message": str(inner_e)}
+                    continue
+
+                if len(chunk) >= chunk_size:
+                    for event in await self.ingest_files(db, chunk):
+                        yield event
+                    chunk = []
+
+            if chunk:
+                for event in await self.ingest_files(db, chunk):
+                    yield event
+
+    async def ingest_files(self, db: Session, files: List[Tuple[str, bytes]]) -> List[Dict]:
+        """
+        Processes, saves and indexes a batch of (filename, pdf_bytes); returns one event per file, in order.
+        """
+        processed = await self.process_pdfs(db, files)
+
+        # Upsert the chunk in one transaction, then index it with a single bulk add
+        resumes = [resume for resume in processed if resume is not None]
+        saved_by_filename = {
+            candidate.filename: candidate for candidate in await self.save_candidates(resumes) if candidate is not None
+        }
+
+        events, saved = [], []
+        for (filename, _), resume in zip(files, processed):
+            if resume is None:
+                events.append({"filename": filename, "status": "failed", "message": "Could not extract text from PDF."})
+                continue
+            candidate = saved_by_filename.get(filename)
+            if candidate is None:
+                events.append({"filename": filename, "status": "failed", "message": "Could not save candidate."})
+                continue
+            saved.append((resume, candidate))
+            events.append({
+                "filename": filename,
+                "status": "processed",
+                "message": "Updated existing candidate" if candidate.updated else "Processed successfully",
+                "extracted_data": resume.extracted_data
+            })
+
+        await asyncio.to_thread(self.index_candidates, saved)
+        return events
+
+ingestion_service = IngestionService()
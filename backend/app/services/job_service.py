@@ -0,0 +1,220 @@
+import asyncio
+import logging
+import os
+import shutil
+import uuid
+import zipfile
+from typing import BinaryIO, List, Optional, Set, Tuple
+from sqlalchemy.orm import Session
+from app.core.config import JOBS_DIR, JOB_WORKERS, ZIP_CHUNK_SIZE, MAX_PDF_BYTES
+from app.database import SessionLocal
+from app.models import IngestJob, IngestJobFile
+from .ingestion_service import ingestion_service, pdf_members, read_member, INGEST_SERVICES
+from .registry import service_registry
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+ACTIVE_STATUSES = ("queued", "running")
+
+class JobService:
+    def __init__(self, workers: int = JOB_WORKERS, jobs_dir: str = JOBS_DIR):
+        """
+        Background ZIP ingestion backed only by SQLite and the local disk.
+        Each job keeps its archive under jobs_dir and one IngestJobFile row per PDF member,
+        updated after every chunk, so a restart resumes from the last completed chunk.
+        Assumes a single server process owns the job queue.
+        """
+        self.workers = workers
+        self.jobs_dir = jobs_dir
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._cancelled: Set[str] = set()
+
+    async def start(self):
+        """
+        Starts the worker pool and requeues jobs interrupted by the last shutdown.
+        """
+        self._queue = asyncio.Queue()
+        db = SessionLocal()
+        try:
+            interrupted = (
+                db.query(IngestJob.id)
+                .filter(IngestJob.status.in_(ACTIVE_STATUSES))
+                .order_by(IngestJob.created_at)
+                .all()
+            )
+        finally:
+            db.close()
+        for (job_id,) in interrupted:
+            logger.info(f"Resuming ingest job {job_id}.")
+            self._queue.put_nowait(job_id)
+
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self):
+        """
+        Stops the workers. Running jobs stay "running" in SQLite and resume on next start.
+        """
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def create_job(self, db: Session, upload: BinaryIO, filename: str) -> IngestJob:
+        """
+        Copies the uploaded archive under jobs_dir and records one pending row per PDF member.
+        Blocking (disk I/O); call from a worker thread. Raises zipfile.BadZipFile for invalid archives.
+        """
+        os.makedirs(self.jobs_dir, exist_ok=True)
+        job_id = uuid.uuid4().hex
+        archive_path = os.path.join(self.jobs_dir, f"{job_id}.zip")
+        with open(archive_path, "wb") as archive:
+            shutil.copyfileobj(upload, archive, 1024 * 1024)
+
+        try:
+            with zipfile.ZipFile(archive_path, 'r') as zip_ref:
+                members = [info.filename for info in pdf_members(zip_ref)]
+        except Exception:
+            os.remove(archive_path)
+            raise
+
+        job = IngestJob(
+            id=job_id,
+            filename=filename,
+            archive_path=archive_path,
+            status="queued",
+            total_files=len(members),
+            processed_files=0,
+            failed_files=0
+        )
+        db.add(job)
+        db.add_all([
+            IngestJobFile(job_id=job_id, position=position, member_name=name, status="pending")
+            for position, name in enumerate(members)
+        ])
+        db.commit()
+        db.refresh(job)
+        return job
+
+    async def submit(self, job_id: str):
+        await self._queue.put(job_id)
+
+    def cancel(self, db: Session, job: IngestJob) -> IngestJob:
+        """
+        Marks a job cancelled. A running job stops after its current chunk.
+        """
+        if job.status in ACTIVE_STATUSES:
+            self._cancelled.add(job.id)
+            job.status = "cancelled"
+            db.commit()
+            db.refresh(job)
+        return job
+
+    async def _worker(self):
+        while True:
+            job_id = await self._queue.get()
+            try:
+                # Jobs resumed at startup wait here until the model and the index are loaded
+                await service_registry.wait_ready(*INGEST_SERVICES)
+                status = await self._run_job(job_id)
+                if status is not None:
+                    await asyncio.to_thread(self._finish, job_id, status)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Ingest job {job_id} failed: {e}")
+                await asyncio.to_thread(self._finish, job_id, "failed", str(e))
+            finally:
+                self._queue.task_done()
+
+    async def _run_job(self, job_id: str) -> Optional[str]:
+        """
+        Processes the job's pending files chunk by chunk; returns the job's final status.
+        Session work runs in worker threads so a large job never stalls the event loop.
+        """
+        # This worker is the only writer of the job's rows, so they stay loaded across commits
+        # instead of being lazily re-read (on the event loop) after each one
+        db = SessionLocal(expire_on_commit=False)
+        try:
+            job, pending = await asyncio.to_thread(self._start, db, job_id)
+            if job is None:
+                return None
+            if pending is None:
+                return job.status
+
+            with zipfile.ZipFile(job.archive_path, 'r') as zip_ref:
+                for start in range(0, len(pending), ZIP_CHUNK_SIZE):
+                    if await asyncio.to_thread(self._is_cancelled, db, job):
+                        logger.info(f"Ingest job {job_id} cancelled.")
+                        return "cancelled"
+                    await self._run_chunk(db, job, zip_ref, pending[start:start + ZIP_CHUNK_SIZE])
+            return "completed"
+        finally:
+            db.close()
+
+    def _start(self, db: Session, job_id: str) -> Tuple[Optional[IngestJob], Optional[List[IngestJobFile]]]:
+        # Marks the job running and returns it with its pending files (None when it is no longer active)
+        job = db.get(IngestJob, job_id)
+        if job is None or job.status not in ACTIVE_STATUSES:
+            return job, None
+        job.status = "running"
+        db.commit()
+        pending = (
+            db.query(IngestJobFile)
+            .filter(IngestJobFile.job_id == job_id, IngestJobFile.status == "pending")
+            .order_by(IngestJobFile.position)
+            .all()
+        )
+        return job, pending
+
+    async def _run_chunk(self, db: Session, job: IngestJob, zip_ref: zipfile.ZipFile, rows: List[IngestJobFile]):
+        files, readable = [], []
+        for row in rows:
+            try:
+                info = zip_ref.getinfo(row.member_name)
+                if info.file_size > MAX_PDF_BYTES:
+                    raise ValueError("File too large.")
+                files.append((row.member_name, await asyncio.to_thread(read_member, zip_ref, info)))
+                readable.append(row)
+            except Exception as e:
+                self._record(job, row, "failed", str(e))
+
+        events = await ingestion_service.ingest_files(db, files) if files else []
+        for row, event in zip(readable, events):
+            self._record(job, row, event["status"], event["message"])
+
+        # One commit per chunk is the checkpoint a restart resumes from
+        await asyncio.to_thread(db.commit)
+
+    def _record(self, job: IngestJob, row: IngestJobFile, status: str, message: str):
+        row.status = status
+        row.message = message
+        if status == "processed":
+            job.processed_files += 1
+        else:
+            job.failed_files += 1
+
+    def _is_cancelled(self, db: Session, job: IngestJob) -> bool:
+        if job.id in self._cancelled:
+            return True
+        db.refresh(job)
+        return job.status == "cancelled"
+
+    def _finish(self, job_id: str, status: str, error: Optional[str] = None):
+        db = SessionLocal()
+        try:
+            job = db.get(IngestJob, job_id)
+            if job is None:
+                return
+            if job.status != "cancelled":
+                job.status = status
+                job.error = error
+            db.commit()
+            if job.archive_path and os.path.exists(job.archive_path):
+                os.remove(job.archive_path)
+        finally:
+            db.close()
+            self._cancelled.discard(job_id)
+
+job_service = JobService()
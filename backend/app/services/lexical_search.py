@@ -0,0 +1,136 @@
+import json
+import logging
+import re
+from typing import List, Optional, Tuple
+from sqlalchemy import column, text
+from app.core.config import FTS_SKILLS_WEIGHT, FTS_TEXT_WEIGHT
+from app.database import SessionLocal
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+FTS_TABLE = "candidates_fts"
+# Terms from the job description used in one MATCH query
+MAX_QUERY_TERMS = 64
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "has", "have", "in", "is", "it",
+    "of", "on", "or", "our", "that", "the", "this", "to", "we", "will", "with", "you", "your",
+}
+
+# External-content FTS5 table over the candidates table; the triggers keep it in step with
+# every insert, upsert and delete, whichever code path writes the row.
+FTS_DDL = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        skills, extracted_text, content='candidates', content_rowid='id', tokenize='porter unicode61'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON candidates BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, skills, extracted_text) VALUES (new.id, new.skills, new.extracted_text);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON candidates BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, skills, extracted_text)
+        VALUES ('delete', old.id, old.skills, old.extracted_text);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF skills, extracted_text ON candidates BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, skills, extracted_text)
+        VALUES ('delete', old.id, old.skills, old.extracted_text);
+        INSERT INTO {FTS_TABLE}(rowid, skills, extracted_text) VALUES (new.id, new.skills, new.extracted_text);
+    END
+    """,
+]
+
+def build_match_query(job_description: str) -> str:
+    """
+    Turns free text into an FTS5 OR-query of quoted terms (quoting keeps punctuation such as
+    "C++" or "node.js" from being read as query syntax). BM25 ranks candidates matching
+    more, and rarer, terms first.
+    """
+    terms = []
+    for term in re.findall(r"\w[\w+#.\-]*", job_description.lower()):
+        term = term.strip(".-")
+        if len(term) < 2 or term in STOPWORDS or term in terms:
+            continue
+        terms.append(term)
+        if len(terms) >= MAX_QUERY_TERMS:
+            break
+    return " OR ".join('"' + term.replace('"', '""') + '"' for term in terms)
+
+class LexicalSearchService:
+    def __init__(self):
+        """
+        BM25 keyword search over candidate skills and resume text (SQLite FTS5).
+        Complements the dense index, which tends to rank exact tool names poorly.
+        """
+        self.available = False
+
+    def ensure_index(self, bind):
+        """
+        Creates the FTS table and sync triggers, filling the table from existing rows on first run.
+        Lexical search stays disabled if this SQLite build lacks FTS5.
+        """
+        try:
+            with bind.begin() as conn:
+                exists = conn.execute(
+                    text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"), {"name": FTS_TABLE}
+                ).first() is not None
+                for statement in FTS_DDL:
+                    conn.execute(text(statement))
+                if not exists:
+                    logger.info("Building the full-text index from existing candidates.")
+                    conn.execute(text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"))
+            self.available = True
+        except Exception as e:
+            logger.error(f"Full-text search unavailable, retrieval falls back to vector search only: {e}")
+            self.available = False
+
+    def search(self, job_description: str, k: int, candidate_ids: Optional[List[int]] = None) -> List[Tuple[int, float]]:
+        """
+        Returns up to k (candidate_id, bm25) pairs, best first (FTS5 bm25 is lower-is-better).
+        With candidate_ids, only those candidates are ranked.
+        """
+        if not self.available:
+            return []
+        query = build_match_query(job_description)
+        if not query:
+            return []
+        sql = (
+            f"SELECT rowid, bm25({FTS_TABLE}, :skills_weight, :text_weight) AS rank "
+            f"FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH :query"
+        )
+        params = {"skills_weight": FTS_SKILLS_WEIGHT, "text_weight": FTS_TEXT_WEIGHT, "query": query, "k": k}
+        if candidate_ids is not None:
+            # One JSON parameter however many ids pass the filter
+            sql += " AND rowid IN (SELECT value FROM json_each(:candidate_ids))"
+            params["candidate_ids"] = json.dumps(list(candidate_ids))
+        db = SessionLocal()
+        try:
+            rows = db.execute(text(sql + " ORDER BY rank LIMIT :k"), params).all()
+            return [(int(candidate_id), float(rank)) for candidate_id, rank in rows]
+        except Exception as e:
+            logger.error(f"Error searching full-text index: {e}")
+            return []
+        finally:
+            db.close()
+
+    def skill_match_ids(self, skill: str, param: str):
+        """
+        Subquery of candidate ids whose skills column matches `skill` as a phrase, for use
+        in Candidate.id.in_(...); `param` names its bind parameter. None without FTS5.
+        """
+        if not self.available:
+            return None
+        phrase = '"' + skill.strip().replace('"', '""') + '"'
+        return (
+            text(f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH :{param}")
+            .bindparams(**{param: f"skills : {phrase}"})
+            .columns(column("rowid"))
+        )
+
+lexical_search = LexicalSearchService()
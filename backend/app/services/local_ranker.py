@@ -0,0 +1,88 @@
+import logging
+import math
+import re
+from typing import Dict, List, Sequence, Tuple
+from app.core.config import CASCADE_SKILL_WEIGHT, CROSS_ENCODER_MODEL
+from .registry import service_registry
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def _normalize(text: str) -> str:
+    # Lowercase word sequence padded with spaces, keeping the punctuation that is part of
+    # skill names ("c++", "c#", "node.js") and dropping sentence punctuation
+    tokens = (token.strip(".") for token in re.split(r"[^a-z0-9+#.]+", text.lower()))
+    return " " + " ".join(token for token in tokens if token) + " "
+
+def skill_overlap(skills: Sequence[str], job_description: str) -> Tuple[List[str], List[str]]:
+    """
+    Splits the candidate's skills into (matched, missing) by whole-word mentions in the JD,
+    so "Go" does not match "good" and "Java" does not match "JavaScript". Duplicates are dropped.
+    """
+    jd = _normalize(job_description)
+    matched, missing, seen = [], [], set()
+    for skill in skills or []:
+        key = _normalize(skill)
+        if not key.strip() or key in seen:
+            continue
+        seen.add(key)
+        (matched if key in jd else missing).append(skill)
+    return matched, missing
+
+class LocalRanker:
+    def __init__(self, skill_weight: float = CASCADE_SKILL_WEIGHT, cross_encoder_model: str = CROSS_ENCODER_MODEL):
+        """
+        Cheap second stage of the scoring cascade: re-ranks every retrieved candidate on
+        skill overlap blended with semantic similarity, so only the best few reach the LLM.
+        The semantic part comes from the vector distance, or from a small cross-encoder
+        when one is configured and sentence-transformers is installed.
+        """
+        self.skill_weight = skill_weight
+        self.cross_encoder = None
+        if cross_encoder_model:
+            try:
+                from sentence_transformers import CrossEncoder
+                self.cross_encoder = CrossEncoder(cross_encoder_model, device="cpu")
+                logger.info(f"Loaded cross-encoder {cross_encoder_model} for local re-ranking.")
+            except Exception as e:
+                logger.warning(f"Cross-encoder unavailable, re-ranking on vector similarity: {e}")
+
+    def rank(self, job_description: str, hits: List[Tuple[Dict, float]]) -> List[Tuple[Dict, float, Dict]]:
+        """
+        Scores (metadata, vector_distance) hits; returns (metadata, vector_distance, score dict)
+        best first (ties keep retrieval order). Score dicts have the AIScoreResult fields plus "stage".
+        """
+        if not hits:
+            return []
+        semantic, stage = self._semantic_scores(job_description, hits)
+        scored = []
+        for (metadata, distance), similarity in zip(hits, semantic):
+            matched, missing = skill_overlap(metadata.get("skills", []), job_description)
+            overlap = len(matched) / (len(matched) + len(missing)) if matched or missing else 0.0
+            score = 100 * (self.skill_weight * overlap + (1 - self.skill_weight) * similarity)
+            scored.append((metadata, distance, {
+                "stage": stage,
+                "match_score": round(score, 2),
+                "matched_skills": matched,
+                "missing_skills": missing,
+                "reasoning": f"Pre-screened locally: {len(matched)} of {len(matched) + len(missing)} listed skills appear in the job description."
+            }))
+        return sorted(scored, key=lambda item: item[2]["match_score"], reverse=True)
+
+    def _semantic_scores(self, job_description: str, hits: List[Tuple[Dict, float]]) -> Tuple[List[float], str]:
+        if self.cross_encoder is not None:
+            try:
+                pairs = [(job_description, self._profile_text(metadata)) for metadata, _ in hits]
+                return [1 / (1 + math.exp(-float(logit))) for logit in self.cross_encoder.predict(pairs)], "cross_encoder"
+            except Exception as e:
+                logger.error(f"Cross-encoder scoring failed: {e}")
+        # MiniLM vectors are unit length, so squared L2 d maps to cosine similarity 1 - d/2
+        return [min(max(1 - distance / 2, 0.0), 1.0) for _, distance in hits], "local"
+
+    def _profile_text(self, metadata: Dict) -> str:
+        return (
+            f"{metadata.get('name', '')}. Skills: {', '.join(metadata.get('skills', []))}. "
+            f"Experience: {metadata.get('experience_years', 0)} years. Roles: {', '.join(metadata.get('job_roles', []) or [])}"
+        )
+
+local_ranker = service_registry.register("local_ranker", LocalRanker)
@@ -1,54 +1,377 @@
+import asyncio
 import logging
-from typing import List, Dict, Any
-from .vector_db import vector_db
-from .scoring_service import scoring_service
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, List, Dict, Any, Optional, Tuple
+import numpy as np
+from .vector_db import vector_db, candidate_metadata
+from .lexical_search import lexical_search
+from .candidate_filters import resolve_candidate_ids
+from .embedding_service import embedding_service, deserialize_embedding
+from .scoring_service import scoring_service, AIScoreResult
+from .local_ranker import local_ranker
+from .score_cache import hash_job_description
+from app.core.config import (
+    SCORING_CONCURRENCY,
+    HYBRID_VECTOR_WEIGHT,
+    HYBRID_LEXICAL_WEIGHT,
+    HYBRID_RRF_K,
+    HYBRID_CANDIDATE_POOL,
+    CASCADE_RETRIEVAL_K,
+    CASCADE_LLM_TOP_N,
+)
+from app.database import SessionLocal
+from app.models import Candidate
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Services a match request needs loaded (see registry.py)
+MATCH_SERVICES = ("embeddings", "vector_db", "local_ranker", "scoring")
+
 class MatchingService:
-    def __init__(self):
+    def __init__(
+        self,
+        scoring_concurrency: int = SCORING_CONCURRENCY,
+        vector_weight: float = HYBRID_VECTOR_WEIGHT,
+        lexical_weight: float = HYBRID_LEXICAL_WEIGHT,
+        rrf_k: int = HYBRID_RRF_K,
+        candidate_pool: int = HYBRID_CANDIDATE_POOL,
+        retrieval_k: int = CASCADE_RETRIEVAL_K,
+        llm_top_n: int = CASCADE_LLM_TOP_N
+    ):
         self.vector_db = vector_db
+        self.lexical_search = lexical_search
         self.scoring_service = scoring_service
+        # Upper bound on LLM scoring calls in flight for a single match request
+        self.scoring_concurrency = scoring_concurrency
+        # Hybrid retrieval: reciprocal rank fusion weights and per-retriever depth
+        self.vector_weight = vector_weight
+        self.lexical_weight = lexical_weight
+        self.rrf_k = rrf_k
+        self.candidate_pool = candidate_pool
+        # Scoring cascade defaults: retrieval depth and how many of the re-ranked list reach the LLM
+        self.local_ranker = local_ranker
+        self.retrieval_k = retrieval_k
+        self.llm_top_n = llm_top_n
+
+    def match_jobs(
+        self,
+        job_description: str,
+        min_score_threshold: float = 0.0,
+        k: int = 5,
+        filters: Optional[Dict] = None,
+        retrieval_k: Optional[int] = None,
+        llm_top_n: Optional[int] = None,
+        llm_budget: Optional[int] = None,
+        search_params: Optional[Dict] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Matches a job description against stored resumes with a scoring cascade:
+        retrieval over retrieval_k candidates, a cheap local re-rank of all of them, then
+        the LLM for the best llm_top_n (at most llm_budget uncached calls). Returns the top k,
+        each marked with the stage that scored it.
+        filters (see candidate_filters.resolve_candidate_ids) restrict retrieval to matching candidates;
+        search_params ("nprobe", "ef_search") tune the ANN vector search for this request.
+        LLM calls run in parallel on a bounded thread pool.
+        """
+        # 1-2. Retrieval and local re-rank, then pick the pairs worth an LLM call
+        shortlists, plan = self._shortlist([job_description], k, filters, retrieval_k, llm_top_n, llm_budget, search_params)
+
+        # 3. Analysis Phase (LLM) for the planned pairs only
+        scored = {}
+        if plan:
+            with ThreadPoolExecutor(max_workers=min(self.scoring_concurrency, len(plan))) as pool:
+                results = list(pool.map(lambda pair: self.scoring_service.score_candidate_staged(*pair), plan.values()))
+            scored = dict(zip(plan, results))
+
+        return self._assemble([job_description], shortlists, scored, k, min_score_threshold)[0]
+
+    async def amatch_jobs(
+        self,
+        job_description: str,
+        min_score_threshold: float = 0.0,
+        k: int = 5,
+        filters: Optional[Dict] = None,
+        retrieval_k: Optional[int] = None,
+        llm_top_n: Optional[int] = None,
+        llm_budget: Optional[int] = None,
+        search_params: Optional[Dict] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Async variant of match_jobs: the LLM stage runs concurrently through the async
+        LLM API, at most scoring_concurrency calls at a time.
+        """
+        results = await self.amatch_jobs_batch(
+            [job_description], min_score_threshold, k, filters, retrieval_k, llm_top_n, llm_budget, search_params
+        )
+        return results[0]
+
+    async def amatch_jobs_batch(
+        self,
+        job_descriptions: List[str],
+        min_score_threshold: float = 0.0,
+        k: int = 5,
+        filters: Optional[Dict] = None,
+        retrieval_k: Optional[int] = None,
+        llm_top_n: Optional[int] = None,
+        llm_budget: Optional[int] = None,
+        search_params: Optional[Dict] = None
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Matches several job descriptions in one pass: one batched query embedding, one
+        matrix FAISS search, a local re-rank per JD, then every distinct (JD, candidate) pair
+        picked for the LLM is scored once, all pairs sharing the scoring_concurrency bound
+        and the llm_budget. Returns one ranked list per JD, in order.
+        """
+        # 1-2. Retrieval and local re-rank, then pick the pairs worth an LLM call. In a worker
+        # thread, so concurrent requests' query embeddings can share a batch (see EmbeddingBatcher)
+        shortlists, plan = await asyncio.to_thread(
+            self._shortlist, job_descriptions, k, filters, retrieval_k, llm_top_n, llm_budget, search_params
+        )
+
+        # 3. Analysis Phase (LLM) for the planned pairs only
+        scored = {key: result async for key, result in self._ascore_plan(plan)}
+
+        return self._assemble(job_descriptions, shortlists, scored, k, min_score_threshold)
+
+    async def astream_match(
+        self,
+        job_description: str,
+        min_score_threshold: float = 0.0,
+        k: int = 5,
+        filters: Optional[Dict] = None,
+        retrieval_k: Optional[int] = None,
+        llm_top_n: Optional[int] = None,
+        llm_budget: Optional[int] = None,
+        search_params: Optional[Dict] = None
+    ) -> AsyncIterator[Tuple[str, Dict]]:
+        """
+        Streaming variant of amatch_jobs, as (event, data) pairs:
+        "shortlist" once retrieval and the local re-rank are done (the top k plus every candidate
+        going to the LLM, in local order, the latter marked pending), then one "score" per
+        LLM-scored candidate as it completes, then "done" with the amatch_jobs result.
+        """
+        shortlists, plan = await asyncio.to_thread(
+            self._shortlist, [job_description], k, filters, retrieval_k, llm_top_n, llm_budget, search_params
+        )
+        jd_hash = hash_job_description(job_description)
+        distances, rows = {}, []
+        for rank, (metadata, vector_distance, local) in enumerate(shortlists[0]):
+            key = self._pair_key(jd_hash, metadata)
+            distances[key] = vector_distance
+            if rank < k or key in plan:
+                row = self._result(metadata, vector_distance, local, local["stage"])
+                row["pending"] = key in plan
+                rows.append(row)
+        yield "shortlist", {"matches": rows, "pending": len(plan)}
+
+        scored = {}
+        async for key, (score_result, stage) in self._ascore_plan(plan):
+            scored[key] = (score_result, stage)
+            yield "score", self._result(plan[key][0], distances[key], score_result.dict(), stage)
+
+        yield "done", {"matches": self._assemble([job_description], shortlists, scored, k, min_score_threshold)[0]}
+
+    async def _ascore_plan(
+        self, plan: Dict[Tuple[str, Any], Tuple[Dict, str]]
+    ) -> AsyncIterator[Tuple[Tuple[str, Any], Tuple[AIScoreResult, str]]]:
+        """
+        Scores the planned pairs through the async LLM API, at most scoring_concurrency at a time,
+        yielding (pair key, (score, stage)) in completion order.
+        """
+        semaphore = asyncio.Semaphore(self.scoring_concurrency)
+
+        async def score(key: Tuple[str, Any]):
+            async with semaphore:
+                return key, await self.scoring_service.ascore_candidate_staged(*plan[key])
+
+        tasks = [asyncio.ensure_future(score(key)) for key in plan]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            # A consumer that stops early (e.g. a closed stream) doesn't leave LLM calls running
+            for task in tasks:
+                task.cancel()
+
+    def _shortlist(
+        self,
+        job_descriptions: List[str],
+        k: int,
+        filters: Optional[Dict],
+        retrieval_k: Optional[int],
+        llm_top_n: Optional[int],
+        llm_budget: Optional[int],
+        search_params: Optional[Dict] = None
+    ) -> Tuple[List[List[Tuple[Dict, float, Dict]]], Dict[Tuple[str, Any], Tuple[Dict, str]]]:
+        depth = max(k, self.retrieval_k if retrieval_k is None else retrieval_k)
+        top_n = self.llm_top_n if llm_top_n is None else llm_top_n
+
+        # 1. Retrieval Phase: deep recall, cheap
+        raw_results = self.retrieve_batch(
+            job_descriptions, k=depth, candidate_ids=resolve_candidate_ids(filters), search_params=search_params
+        )
+
+        # 2. Local re-rank of every retrieved candidate (no LLM)
+        shortlists = [self.local_ranker.rank(jd, hits) for jd, hits in zip(job_descriptions, raw_results)]
+
+        # Pairs for the LLM: rank 1 of every JD first, then rank 2, ... so a tight budget is shared
+        # across JDs. Cached scores cost nothing and don't count against the budget; the same JD
+        # pasted twice (modulo case/whitespace) shares its pairs.
+        plan: Dict[Tuple[str, Any], Tuple[Dict, str]] = {}
+        spent = 0
+        jd_hashes = [hash_job_description(jd) for jd in job_descriptions]
+        for rank in range(top_n):
+            for job_description, jd_hash, shortlist in zip(job_descriptions, jd_hashes, shortlists):
+                if rank >= len(shortlist):
+                    continue
+                metadata = shortlist[rank][0]
+                key = self._pair_key(jd_hash, metadata)
+                if key in plan:
+                    continue
+                if self.scoring_service.cached_score(metadata, job_description) is None:
+                    if llm_budget is not None and spent >= llm_budget:
+                        continue
+                    spent += 1
+                plan[key] = (metadata, job_description)
+        return shortlists, plan
+
+    def _assemble(
+        self,
+        job_descriptions: List[str],
+        shortlists: List[List[Tuple[Dict, float, Dict]]],
+        scored: Dict[Tuple[str, Any], Tuple[AIScoreResult, str]],
+        k: int,
+        min_score_threshold: float
+    ) -> List[List[Dict[str, Any]]]:
+        ranked = []
+        for job_description, shortlist in zip(job_descriptions, shortlists):
+            jd_hash = hash_job_description(job_description)
+            llm_results, local_results = [], []
+            for metadata, vector_distance, local in shortlist:
+                key = self._pair_key(jd_hash, metadata)
+                if key in scored:
+                    score_result, stage = scored[key]
+                    llm_results.append(self._result(metadata, vector_distance, score_result.dict(), stage))
+                else:
+                    local_results.append(self._result(metadata, vector_distance, local, local["stage"]))
+
+            # Candidates that reached the LLM rank above those that stopped at the local stage;
+            # within each tier, by score (stable, so ties keep the earlier stage's order)
+            llm_results.sort(key=lambda x: x['score'], reverse=True)
+            matches = [m for m in llm_results + local_results if m['score'] >= min_score_threshold]
+            ranked.append(matches[:k])
+        return ranked
+
+    def _result(self, metadata: Dict, vector_distance: float, score_result: Dict, stage: str) -> Dict[str, Any]:
+        return {
+            "filename": metadata.get("filename"),
+            "score": score_result["match_score"],
+            "raw_distance": vector_distance,
+            "matched_skills": score_result["matched_skills"],
+            "missing_skills": score_result["missing_skills"],
+            "ai_explanation": score_result["reasoning"],
+            "stage": stage
+        }
+
+    def retrieve(
+        self,
+        job_description: str,
+        k: int = 5,
+        candidate_ids: Optional[List[int]] = None,
+        search_params: Optional[Dict] = None
+    ) -> List[Tuple[Dict, float]]:
+        """
+        First stage: the top k (metadata, vector_distance) hits by reciprocal rank fusion of
+        vector search and FTS5 BM25 search. Plain vector search when lexical search is off.
+        With candidate_ids, both searches rank only those candidates.
+        """
+        return self.retrieve_batch([job_description], k, candidate_ids, search_params)[0]
+
+    def retrieve_batch(
+        self,
+        job_descriptions: List[str],
+        k: int = 5,
+        candidate_ids: Optional[List[int]] = None,
+        search_params: Optional[Dict] = None
+    ) -> List[List[Tuple[Dict, float]]]:
+        """
+        retrieve() for many job descriptions, sharing one batched vector search.
+        """
+        if candidate_ids is not None and not candidate_ids:
+            return [[] for _ in job_descriptions]
+        if not self._hybrid_enabled():
+            return self.vector_db.search_similar_batch(job_descriptions, k, candidate_ids, search_params)
+        pool = max(k, self.candidate_pool)
+        dense_batch = self.vector_db.search_similar_batch(job_descriptions, pool, candidate_ids, search_params)
+        return [
+            self._fuse(job_description, dense, self.lexical_search.search(job_description, pool, candidate_ids), k)
+            for job_description, dense in zip(job_descriptions, dense_batch)
+        ]
+
+    def _hybrid_enabled(self) -> bool:
+        return self.lexical_weight > 0 and self.lexical_search.available
+
+    def _fuse(self, job_description: str, dense: List[Tuple[Dict, float]], lexical: List[Tuple[int, float]], k: int) -> List[Tuple[Dict, float]]:
+        # RRF: each list contributes weight / (rrf_k + rank); only ranks matter, so the
+        # incomparable L2 distances and BM25 scores never have to be normalized.
+        fused: Dict[Any, float] = defaultdict(float)
+        hits: Dict[Any, Tuple[Dict, float]] = {}
+        for rank, (metadata, distance) in enumerate(dense, start=1):
+            key = self._candidate_key(metadata)
+            fused[key] += self.vector_weight / (self.rrf_k + rank)
+            hits[key] = (metadata, distance)
+        for rank, (candidate_id, _) in enumerate(lexical, start=1):
+            fused[candidate_id] += self.lexical_weight / (self.rrf_k + rank)
+
+        # Stable sort: ties keep vector order
+        top = sorted(fused, key=lambda key: fused[key], reverse=True)[:k]
+        missing = [key for key in top if key not in hits]
+        if missing:
+            hits.update(self._load_hits(job_description, missing))
+        return [hits[key] for key in top if key in hits]
+
+    def _load_hits(self, job_description: str, candidate_ids: List[int]) -> Dict[int, Tuple[Dict, float]]:
+        """
+        Metadata and vector distance for keyword-only hits, read from their stored embeddings.
+        The metadata is built like the vector docstore's (full stored profile), so a candidate
+        gets the same prompt and score-cache key whichever retriever found it.
+        Rows without an embedding are left out, as they are from the vector index.
+        """
+        query = embedding_service.embed_query(job_description)
+        if query is None:
+            return {}
+        db = SessionLocal()
+        try:
+            rows = (
+                db.query(
+                    Candidate.id,
+                    Candidate.filename,
+                    Candidate.name,
+                    Candidate.skills,
+                    Candidate.experience_years,
+                    Candidate.education,
+                    Candidate.resume_data,
+                    Candidate.embedding,
+                )
+                .filter(Candidate.id.in_(candidate_ids), Candidate.embedding.isnot(None))
+                .all()
+            )
+        finally:
+            db.close()
+        hits = {}
+        for row in rows:
+            # Squared L2, the same measure IndexFlatL2 reports
+            distance = float(np.sum((deserialize_embedding(row.embedding) - query) ** 2))
+            hits[row.id] = (candidate_metadata(row), distance)
+        return hits
+
+    def _candidate_key(self, metadata: Dict) -> Any:
+        candidate = metadata.get("candidate_id")
+        return candidate if candidate is not None else ("file", metadata.get("filename"))
 
-    def match_jobs(self, job_description: str, min_score_threshold: float = 0.0) -> List[Dict[str, Any]]:
-        """
-        Matches a job description against stored resumes.
-        First gets candidates via vector search (Retrieval), then re-scores with LLM (Analysis).
-        """
-        # 1. Retrieval Phase
-        # Get top 5 candidates based on semantic similarity of the full text
-        raw_results = self.vector_db.search_similar(job_description, k=5)
-        
-        matches = []
-        for metadata, vector_distance in raw_results:
-            # 2. Analysis Phase
-            # Use the structured data we saved in metadata to perform detailed scoring
-            
-            # Fallback if no structured data exists
-            candidate_json = metadata 
-            
-            # Call LLM for scoring
-            score_result = self.scoring_service.score_candidate(candidate_json, job_description)
-            
-            # Combine results
-            # We prioritize the LLM score if available, otherwise fallback to vector distance conversion
-            final_score = score_result.match_score
-            
-            if final_score < min_score_threshold:
-                continue
-
-            result = {
-                "filename": metadata.get("filename"),
-                "score": final_score,
-                "raw_distance": vector_distance,
-                # New fields
-                "matched_skills": score_result.matched_skills,
-                "missing_skills": score_result.missing_skills,
-                "ai_explanation": score_result.reasoning
-            }
-            matches.append(result)
-            
-        return sorted(matches, key=lambda x: x['score'], reverse=True)
+    def _pair_key(self, jd_hash: str, metadata: Dict) -> Tuple[str, Any]:
+        return (jd_hash, self._candidate_key(metadata))
 
 matching_service = MatchingService()
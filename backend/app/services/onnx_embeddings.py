@@ -0,0 +1,107 @@
+import logging
+import os
+import platform
+from typing import List, Optional
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+QUANTIZED_FILE = "model_quantized.onnx"
+# all-MiniLM-L6-v2 is trained on (and sentence-transformers truncates to) 256 tokens
+MAX_SEQ_LENGTH = 256
+
+def hub_model_id(model_name: str) -> str:
+    # HuggingFaceEmbeddings accepts the short sentence-transformers names; the exporter needs the hub id
+    return model_name if "/" in model_name or os.path.isdir(model_name) else f"sentence-transformers/{model_name}"
+
+def _quantization_config():
+    from optimum.onnxruntime.configuration import AutoQuantizationConfig
+    # Dynamic int8 (weights quantized ahead of time, activations at run time), tuned for this CPU
+    if platform.machine().lower() in ("arm64", "aarch64"):
+        return AutoQuantizationConfig.arm64(is_static=False, per_channel=False)
+    flags = ""
+    try:
+        with open("/proc/cpuinfo") as f:
+            flags = f.read()
+    except OSError:
+        pass
+    if "avx512_vnni" in flags:
+        return AutoQuantizationConfig.avx512_vnni(is_static=False, per_channel=False)
+    if "avx512f" in flags:
+        return AutoQuantizationConfig.avx512(is_static=False, per_channel=False)
+    return AutoQuantizationConfig.avx2(is_static=False, per_channel=False)
+
+def export_quantized(model_name: str, output_dir: str) -> str:
+    """
+    Exports the model to ONNX and writes an int8 dynamically quantized copy plus the tokenizer
+    to output_dir. Needs optimum[onnxruntime] (and PyTorch, for the export only).
+    Returns the path of the quantized model.
+    """
+    from optimum.onnxruntime import ORTModelForFeatureExtraction, ORTQuantizer
+    from transformers import AutoTokenizer
+
+    model_id = hub_model_id(model_name)
+    logger.info(f"Exporting {model_id} to ONNX with int8 quantization in {output_dir} (one-time).")
+    os.makedirs(output_dir, exist_ok=True)
+    ORTModelForFeatureExtraction.from_pretrained(model_id, export=True).save_pretrained(output_dir)
+    AutoTokenizer.from_pretrained(model_id).save_pretrained(output_dir)
+    ORTQuantizer.from_pretrained(output_dir).quantize(save_dir=output_dir, quantization_config=_quantization_config())
+    return os.path.join(output_dir, QUANTIZED_FILE)
+
+class OnnxEmbeddings(Embeddings):
+    def __init__(self, model_name: str, model_dir: str, threads: int = 0, batch_size: int = 32):
+        """
+        Sentence embeddings from an int8-quantized ONNX export of a sentence-transformers model,
+        run with onnxruntime on the CPU. Matches the PyTorch pipeline of all-MiniLM-L6-v2:
+        mean pooling over the attention mask, then L2 normalization.
+        The export is created under model_dir on first use; later loads need neither PyTorch
+        nor optimum, only onnxruntime and the tokenizer.
+        threads sets onnxruntime's intra-op thread count (0 leaves it to the runtime).
+        """
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        model_dir = os.path.join(model_dir, hub_model_id(model_name).replace("/", "__"))
+        model_path = os.path.join(model_dir, QUANTIZED_FILE)
+        if not os.path.exists(model_path):
+            model_path = export_quantized(model_name, model_dir)
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads > 0:
+            options.intra_op_num_threads = threads
+            options.inter_op_num_threads = 1
+        self.session = ort.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+        self.input_names = {i.name for i in self.session.get_inputs()}
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir)
+        self.batch_size = batch_size
+        logger.info(f"Loaded ONNX embedding model {model_path} (threads={threads or 'auto'}).")
+
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        encoded = self.tokenizer(
+            texts, padding=True, truncation=True, max_length=MAX_SEQ_LENGTH, return_tensors="np"
+        )
+        inputs = {name: encoded[name].astype(np.int64) for name in self.input_names if name in encoded}
+        if "token_type_ids" in self.input_names and "token_type_ids" not in inputs:
+            inputs["token_type_ids"] = np.zeros_like(inputs["input_ids"])
+        token_embeddings = self.session.run(None, inputs)[0]
+
+        # Mean pooling over real tokens (padding masked out), then unit length
+        mask = encoded["attention_mask"][..., None].astype(np.float32)
+        pooled = (token_embeddings * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        return pooled / np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        # Texts of similar length are batched together so little compute goes to padding
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        vectors: List[Optional[List[float]]] = [None] * len(texts)
+        for start in range(0, len(order), self.batch_size):
+            batch = order[start:start + self.batch_size]
+            for i, vector in zip(batch, self._encode([texts[i] for i in batch])):
+                vectors[i] = vector.tolist()
+        return vectors
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._encode([text])[0].tolist()
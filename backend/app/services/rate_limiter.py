@@ -0,0 +1,75 @@
+import asyncio
+import threading
+import time
+from typing import Optional
+from app.core.config import LLM_REQUESTS_PER_MINUTE, LLM_TOKENS_PER_MINUTE
+
+class TokenBucket:
+    def __init__(self, capacity: float, refill_per_second: float):
+        """
+        Classic token bucket. Reservations may drive the balance negative; the caller
+        then waits until the deficit has refilled, which keeps callers in FIFO order.
+        """
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def reserve(self, amount: float) -> float:
+        """
+        Takes `amount` tokens and returns how many seconds the caller must wait before using them.
+        """
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.refill_per_second)
+        self.updated = now
+        # A single request larger than the bucket would otherwise never fit
+        self.tokens -= min(amount, self.capacity)
+        return max(0.0, -self.tokens / self.refill_per_second)
+
+class RateLimiter:
+    def __init__(self, requests_per_minute: int, tokens_per_minute: int):
+        """
+        Limits LLM calls to the provider's requests-per-minute and tokens-per-minute quotas.
+        A quota of 0 disables that bucket. Safe to share across threads and event loops.
+        """
+        self._lock = threading.Lock()
+        self.requests: Optional[TokenBucket] = (
+            TokenBucket(requests_per_minute, requests_per_minute / 60.0) if requests_per_minute > 0 else None
+        )
+        self.tokens: Optional[TokenBucket] = (
+            TokenBucket(tokens_per_minute, tokens_per_minute / 60.0) if tokens_per_minute > 0 else None
+        )
+
+    def _reserve(self, tokens: int) -> float:
+        with self._lock:
+            delay = 0.0
+            if self.requests is not None:
+                delay = max(delay, self.requests.reserve(1))
+            if self.tokens is not None:
+                delay = max(delay, self.tokens.reserve(tokens))
+            return delay
+
+    def wait(self, tokens: int = 0):
+        """
+        Blocks the calling thread until a request of `tokens` tokens fits the quota.
+        """
+        delay = self._reserve(tokens)
+        if delay > 0:
+            time.sleep(delay)
+
+    async def acquire(self, tokens: int = 0):
+        """
+        Waits (without blocking the event loop) until a request of `tokens` tokens fits the quota.
+        """
+        delay = self._reserve(tokens)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+def estimate_tokens(text: str, completion_tokens: int = 0) -> int:
+    """
+    Rough token count (~4 characters per token) for quota accounting.
+    """
+    return len(text) // 4 + 1 + completion_tokens
+
+# Shared by every service that calls the LLM provider, since the quota is per API key
+llm_rate_limiter = RateLimiter(LLM_REQUESTS_PER_MINUTE, LLM_TOKENS_PER_MINUTE)
@@ -0,0 +1,124 @@
+import asyncio
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Optional
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+NOT_LOADED = "not_loaded"
+LOADING = "loading"
+READY = "ready"
+FAILED = "failed"
+
+class _Entry:
+    def __init__(self, name: str, factory: Callable[[], Any]):
+        self.name = name
+        self.factory = factory
+        self.instance: Any = None
+        self.state = NOT_LOADED
+        self.load_seconds: Optional[float] = None
+        self.error: Optional[str] = None
+        self.lock = threading.Lock()
+
+class ServiceRegistry:
+    def __init__(self):
+        """
+        Creates expensive services (models, LLM clients, the vector index) on first use instead
+        of at import. The app warms them up in the background at startup; a request that needs
+        one before then waits for it instead of loading it a second time.
+        """
+        self._entries: Dict[str, _Entry] = {}
+
+    def register(self, name: str, factory: Callable[[], Any]) -> "LazyService":
+        """
+        Registers a factory and returns a proxy that stands in for the service at module level.
+        """
+        self._entries[name] = _Entry(name, factory)
+        return LazyService(self, name)
+
+    def get(self, name: str) -> Any:
+        """
+        Returns the service, creating it on the first call. Concurrent callers wait for
+        the same load. A failed load raises and is retried on the next call.
+        """
+        entry = self._entries[name]
+        if entry.state == READY:
+            return entry.instance
+        with entry.lock:
+            if entry.state == READY:
+                return entry.instance
+            entry.state = LOADING
+            start = time.perf_counter()
+            try:
+                instance = entry.factory()
+            except Exception as e:
+                entry.state = FAILED
+                entry.error = str(e)
+                logger.error(f"Could not load service {name}: {e}")
+                raise
+            entry.instance = instance
+            entry.load_seconds = round(time.perf_counter() - start, 3)
+            entry.error = None
+            entry.state = READY
+            logger.info(f"Loaded service {name} in {entry.load_seconds:.2f}s.")
+            return instance
+
+    def peek(self, name: str) -> Optional[Any]:
+        """
+        The service if it is already loaded, without triggering a load (e.g. at shutdown).
+        """
+        entry = self._entries[name]
+        return entry.instance if entry.state == READY else None
+
+    def is_ready(self, *names: str) -> bool:
+        return all(self._entries[name].state == READY for name in names or self._entries)
+
+    async def wait_ready(self, *names: str):
+        """
+        Waits without blocking the event loop until the named services (all if none) are loaded.
+        """
+        for name in names or list(self._entries):
+            if self._entries[name].state != READY:
+                await asyncio.to_thread(self.get, name)
+
+    async def warm_up(self, names: Optional[Iterable[str]] = None):
+        """
+        Loads services one after another in a worker thread; failures are logged and left
+        for the next get() to retry.
+        """
+        for name in names or list(self._entries):
+            try:
+                await asyncio.to_thread(self.get, name)
+            except Exception:
+                pass
+
+    def status(self) -> Dict[str, Dict]:
+        return {
+            name: {"state": entry.state, "load_seconds": entry.load_seconds, "error": entry.error}
+            for name, entry in self._entries.items()
+        }
+
+class LazyService:
+    """
+    Module-level stand-in for a registered service: attribute access loads the service
+    through the registry and forwards to it, so callers keep using it like the instance.
+    """
+    __slots__ = ("_registry", "_name")
+
+    def __init__(self, registry: ServiceRegistry, name: str):
+        object.__setattr__(self, "_registry", registry)
+        object.__setattr__(self, "_name", name)
+
+    def __getattr__(self, attr: str):
+        return getattr(self._registry.get(self._name), attr)
+
+    def __setattr__(self, attr: str, value):
+        setattr(self._registry.get(self._name), attr, value)
+
+    def __repr__(self) -> str:
+        return f"<lazy service {self._name}: {self._registry.status()[self._name]['state']}>"
+
+# Singleton instance
+service_registry = ServiceRegistry()
@@ -0,0 +1,117 @@
+import hashlib
+import logging
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy.orm import Session
+from app.core.config import RESUME_CACHE_SIZE
+from app.models import ResumeCacheEntry, ResumePdfHash
+from .embedding_service import serialize_embedding, deserialize_embedding
+from .lru_cache import LRUCache
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def hash_bytes(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+def hash_text(text: str) -> str:
+    # Whitespace differences between PDF exports shouldn't defeat the cache
+    return hashlib.sha256(" ".join(text.split()).encode("utf-8")).hexdigest()
+
+class ResumeCacheService:
+    def __init__(self, max_entries: int = RESUME_CACHE_SIZE):
+        """
+        Content-addressed cache of extraction results, so a repeated upload (or the same
+        file under another name) skips PDF parsing, the LLM call and embedding.
+        SQLite holds every entry; a bounded LRU sits in front of it.
+        Entries: {"text_hash", "extracted_text", "resume_data", "embedding"}.
+        """
+        self.entries = LRUCache(max_entries)
+        self.pdf_hashes = LRUCache(max_entries)
+        self.db_hits = 0
+        self.misses = 0
+
+    def lookup_pdf(self, db: Session, pdf_hash: str) -> Optional[Dict]:
+        """
+        Finds a cached result for identical PDF bytes.
+        """
+        text_hash = self.pdf_hashes.get(pdf_hash)
+        if text_hash is None:
+            row = db.get(ResumePdfHash, pdf_hash)
+            if row is None:
+                return None
+            text_hash = row.text_hash
+            self.pdf_hashes.put(pdf_hash, text_hash)
+        return self.lookup_text(db, text_hash)
+
+    def lookup_text(self, db: Session, text_hash: str) -> Optional[Dict]:
+        """
+        Finds a cached result for identical (whitespace-normalized) resume text.
+        """
+        entry = self.entries.get(text_hash)
+        if entry is not None:
+            return entry
+
+        row = db.get(ResumeCacheEntry, text_hash)
+        if row is None:
+            self.misses += 1
+            return None
+
+        self.db_hits += 1
+        entry = {
+            "text_hash": row.text_hash,
+            "extracted_text": row.extracted_text,
+            "resume_data": row.resume_data,
+            "embedding": deserialize_embedding(row.embedding).tolist() if row.embedding else None,
+        }
+        self.entries.put(text_hash, entry)
+        return entry
+
+    def store_many(self, db: Session, results: List[Tuple[Optional[str], str, Dict, Optional[List[float]]]]):
+        """
+        Saves extraction results, given as (pdf_hash, text, resume_data, embedding), in one
+        transaction. Fallback results (with an "error") are not cached, so a transient LLM
+        failure is retried on the next upload.
+        """
+        results = [r for r in results if r[2] and not r[2].get("error")]
+        if not results:
+            return
+        entries = []
+        try:
+            for pdf_hash, text, resume_data, embedding in results:
+                text_hash = hash_text(text)
+                db.merge(ResumeCacheEntry(
+                    text_hash=text_hash,
+                    extracted_text=text,
+                    resume_data=resume_data,
+                    embedding=serialize_embedding(embedding) if embedding is not None else None
+                ))
+                if pdf_hash:
+                    db.merge(ResumePdfHash(pdf_hash=pdf_hash, text_hash=text_hash))
+                entries.append((pdf_hash, text_hash, text, resume_data, embedding))
+            db.commit()
+        except Exception as e:
+            logger.error(f"Error saving resume cache entries: {e}")
+            db.rollback()
+            return
+
+        for pdf_hash, text_hash, text, resume_data, embedding in entries:
+            self.entries.put(text_hash, {
+                "text_hash": text_hash,
+                "extracted_text": text,
+                "resume_data": resume_data,
+                "embedding": list(embedding) if embedding is not None else None,
+            })
+            if pdf_hash:
+                self.pdf_hashes.put(pdf_hash, text_hash)
+
+    def stats(self) -> Dict:
+        memory = self.entries.stats()
+        lookups = memory["hits"] + self.db_hits + self.misses
+        return {
+            "memory": memory,
+            "db_hits": self.db_hits,
+            "misses": self.misses,
+            "hit_rate": round((memory["hits"] + self.db_hits) / lookups, 4) if lookups else 0.0,
+        }
+
+resume_cache = ResumeCacheService()
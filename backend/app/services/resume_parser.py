@@ -1,29 +1,109 @@
+import asyncio
+import io
 import logging
-from pypdf import PdfReader
-from typing import Optional
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import List, Optional
+from app.core.config import PDF_PARSER_WORKERS
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-async def extract_text_from_pdf(file_file) -> Optional[str]:
+_executor: Optional[ProcessPoolExecutor] = None
+
+def get_pdf_executor() -> ProcessPoolExecutor:
+    """
+    Returns the shared process pool used for PDF parsing, creating it on first use.
+    Workers are spawned (not forked) so they don't inherit the server's threads or loaded models.
+    """
+    global _executor
+    if _executor is None:
+        logger.info(f"Starting PDF parser pool with {PDF_PARSER_WORKERS} workers.")
+        _executor = ProcessPoolExecutor(
+            max_workers=PDF_PARSER_WORKERS,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+    return _executor
+
+def shutdown_pdf_executor():
+    """
+    Stops the PDF parser pool (called on application shutdown).
     """
-    Extracts text from a PDF file-like object.
-    
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=True, cancel_futures=True)
+        _executor = None
+
+def _replace_broken_executor(broken: ProcessPoolExecutor):
+    # A worker that died (crash, OOM on a hostile PDF) breaks the whole pool for good.
+    # Every caller that saw the same broken pool lands here; only the first one replaces it.
+    global _executor
+    if _executor is broken:
+        logger.warning("PDF parser pool is broken (a worker died); starting a new one.")
+        broken.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+def extract_text_from_pdf_bytes(pdf_bytes: bytes) -> Optional[str]:
+    """
+    Synchronous, CPU-bound text extraction. Runs inside a pool worker.
+
     Args:
-        file_file: A file-like object (BytesIO or SpooledTemporaryFile) containing the PDF data.
-        
+        pdf_bytes: Raw bytes of the PDF file.
+
     Returns:
         Extracted text as a single string, or None if extraction fails.
     """
+    # Imported in the worker, where it is needed, rather than by the server at startup
+    from pypdf import PdfReader
     try:
-        reader = PdfReader(file_file)
-        text = ""
+        reader = PdfReader(io.BytesIO(pdf_bytes))
+        pages = []
         for page in reader.pages:
             page_text = page.extract_text()
             if page_text:
-                text += page_text + "\n"
-        
-        return text.strip()
+                pages.append(page_text)
+
+        return "\n".join(pages).strip()
     except Exception as e:
         logger.error(f"Error extracting text from PDF: {e}")
         return None
+
+async def extract_text_from_pdf(file_file) -> Optional[str]:
+    """
+    Extracts text from a PDF file-like object without blocking the event loop.
+
+    Args:
+        file_file: A file-like object (BytesIO or SpooledTemporaryFile) containing the PDF data.
+
+    Returns:
+        Extracted text as a single string, or None if extraction fails.
+    """
+    return await extract_text_from_pdf_data(file_file.read())
+
+async def extract_text_from_pdf_data(pdf_bytes: bytes) -> Optional[str]:
+    """
+    Parses raw PDF bytes in the process pool.
+    If the pool breaks, it is replaced and the file is retried once in the new pool.
+    """
+    loop = asyncio.get_running_loop()
+    for attempt in range(2):
+        executor = get_pdf_executor()
+        try:
+            return await loop.run_in_executor(executor, extract_text_from_pdf_bytes, pdf_bytes)
+        except (BrokenProcessPool, OSError) as e:
+            # A pool that is still breaking can fail the submit with OSError ("handle is closed")
+            # before it reports BrokenProcessPool; the worker itself never raises
+            _replace_broken_executor(executor)
+            if attempt:
+                logger.error(f"Error extracting text from PDF: {e}")
+                return None
+        except Exception as e:
+            logger.error(f"Error extracting text from PDF: {e}")
+            return None
+
+async def extract_texts_from_pdfs(pdfs: List[bytes]) -> List[Optional[str]]:
+    """
+    Parses many PDFs concurrently across the process pool, preserving input order.
+    """
+    return await asyncio.gather(*(extract_text_from_pdf_data(pdf_bytes) for pdf_bytes in pdfs))
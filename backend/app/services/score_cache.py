@@ -0,0 +1,109 @@
+import asyncio
+import hashlib
+import logging
+from typing import Dict, Optional
+from sqlalchemy.orm import Session
+from app.core.config import SCORE_CACHE_SIZE, SCORE_CACHE_TTL
+from app.database import SessionLocal
+from app.models import ScoreCacheEntry
+from .db_writer import db_writer
+from .lru_cache import LRUCache
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def hash_job_description(job_description: str) -> str:
+    # Case and whitespace changes don't change the scoring outcome
+    return hashlib.sha256(" ".join(job_description.lower().split()).encode("utf-8")).hexdigest()
+
+def fingerprint(*parts: str) -> str:
+    return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()[:16]
+
+class ScoreCacheService:
+    def __init__(self, max_size: int = SCORE_CACHE_SIZE, ttl: float = SCORE_CACHE_TTL):
+        """
+        Two-level cache of LLM scores keyed by (JD hash, candidate id, version).
+        Level 1 is an in-process LRU with TTL, level 2 the SQLite score_cache table.
+        The version fingerprints model name, prompt and schema, so changing any of them
+        invalidates old entries automatically; candidate_hash does the same for edited profiles.
+        """
+        self.memory = LRUCache(max_size, ttl=ttl)
+        self.db_hits = 0
+        self.misses = 0
+
+    def get(self, jd_hash: str, candidate_id: int, version: str, candidate_hash: str) -> Optional[Dict]:
+        result = self._get_memory(jd_hash, candidate_id, version, candidate_hash)
+        if result is not None:
+            return result
+        return self._get_db(jd_hash, candidate_id, version, candidate_hash)
+
+    async def aget(self, jd_hash: str, candidate_id: int, version: str, candidate_hash: str) -> Optional[Dict]:
+        """
+        get() for async callers: memory hits return inline, the SQLite lookup runs in a worker thread.
+        """
+        result = self._get_memory(jd_hash, candidate_id, version, candidate_hash)
+        if result is not None:
+            return result
+        return await asyncio.to_thread(self._get_db, jd_hash, candidate_id, version, candidate_hash)
+
+    def _get_memory(self, jd_hash: str, candidate_id: int, version: str, candidate_hash: str) -> Optional[Dict]:
+        entry = self.memory.get((jd_hash, candidate_id, version))
+        if entry is not None and entry["candidate_hash"] == candidate_hash:
+            return entry["result"]
+        return None
+
+    def _get_db(self, jd_hash: str, candidate_id: int, version: str, candidate_hash: str) -> Optional[Dict]:
+        key = (jd_hash, candidate_id, version)
+        db = SessionLocal()
+        try:
+            row = db.get(ScoreCacheEntry, (jd_hash, candidate_id, version))
+            if row is None or row.candidate_hash != candidate_hash:
+                self.misses += 1
+                return None
+            self.db_hits += 1
+            self.memory.put(key, {"candidate_hash": row.candidate_hash, "result": row.result})
+            return row.result
+        except Exception as e:
+            logger.error(f"Error reading score cache: {e}")
+            return None
+        finally:
+            db.close()
+
+    def put(self, jd_hash: str, candidate_id: int, version: str, candidate_hash: str, result: Dict):
+        self.memory.put((jd_hash, candidate_id, version), {"candidate_hash": candidate_hash, "result": result})
+        # Persisted by the DB writer in the background; scoring doesn't wait for the write
+        db_writer.submit(self._write, jd_hash, candidate_id, version, candidate_hash, result)
+
+    def _write(self, db: Session, jd_hash: str, candidate_id: int, version: str, candidate_hash: str, result: Dict):
+        try:
+            db.merge(ScoreCacheEntry(
+                jd_hash=jd_hash,
+                candidate_id=candidate_id,
+                version=version,
+                candidate_hash=candidate_hash,
+                result=result
+            ))
+            db.commit()
+        except Exception as e:
+            logger.error(f"Error saving score cache entry: {e}")
+            db.rollback()
+
+    def delete_candidate(self, db: Session, candidate_id: int):
+        """
+        Drops every cached score of a deleted candidate. Runs on the DB writer inside the
+        caller's transaction; the caller commits.
+        """
+        self.memory.pop_where(lambda key: key[1] == candidate_id)
+        db.query(ScoreCacheEntry).filter(ScoreCacheEntry.candidate_id == candidate_id).delete(synchronize_session=False)
+
+    def stats(self) -> Dict:
+        memory = self.memory.stats()
+        lookups = memory["hits"] + self.db_hits + self.misses
+        return {
+            "memory": memory,
+            "db_hits": self.db_hits,
+            "misses": self.misses,
+            "hit_rate": round((memory["hits"] + self.db_hits) / lookups, 4) if lookups else 0.0,
+        }
+
+score_cache = ScoreCacheService()
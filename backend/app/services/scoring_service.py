@@ -1,12 +1,16 @@
+import json
 import logging
 import os
 import os
-from typing import List, Optional
+from typing import List, Optional, Tuple
 # from langchain_openai import ChatOpenAI
-from langchain_google_genai import ChatGoogleGenerativeAI
 from pydantic import BaseModel, Field
-from langchain_core.prompts import ChatPromptTemplate
 from dotenv import load_dotenv
+from app.core.config import LLM_PROVIDER, FAKE_LLM_LATENCY
+from .rate_limiter import llm_rate_limiter, estimate_tokens
+from .registry import service_registry
+from .score_cache import score_cache, hash_job_description, fingerprint
+from .local_ranker import skill_overlap
 
 load_dotenv()
 
@@ -20,12 +24,47 @@ class AIScoreResult(BaseModel):
     missing_skills: List[str] = Field(description="Key skills required by the job that are missing in the resume")
     reasoning: str = Field(description="Short natural language explanation of the score")
 
+class QuestionList(BaseModel):
+    questions: List[str] = Field(description="List of 5 interview questions")
+
+class SalaryEstimate(BaseModel):
+    salary_range: str = Field(description="Estimated salary range")
+    reasoning: str = Field(description="Why this range?")
+
+# Allowance for the structured response when reserving tokens against the quota
+SCORING_COMPLETION_TOKENS = 300
+QUESTIONS_COMPLETION_TOKENS = 400
+SALARY_COMPLETION_TOKENS = 150
+
+# LangChain is imported when the service is created, so importing this module stays cheap
+SCORING_MESSAGES = [
+    ("system", "You are an expert HR AI. specificy. You must evaluate the candidate for the job based on: Skill match (highest weight), Experience relevance, Tool/technology overlap, Role similarity."),
+    ("user", "JOB DESCRIPTION:\n{job_description}\n\nCANDIDATE PROFILE:\n{candidate_summary}")
+]
+QUESTION_MESSAGES = [
+    ("system", "You are a senior technical interviewer. Generate 5 specific interview questions for this candidate based on the job description and their profile. Focus on their missing skills or gaps. Return the output as a JSON list of strings under the key 'questions'."),
+    ("user", "JOB DESCRIPTION:\n{job_description}\n\nCANDIDATE PROFILE:\n{candidate_summary}")
+]
+SALARY_MESSAGES = [
+    ("system", "You are an expert compensation analyst. Estimate a competitive annual salary range (in USD) for this candidate applied to this job role. Be realistic based on experience years and skills. Return JSON with keys 'salary_range' (e.g. '$80,000 - $100,000') and 'reasoning' (1 sentence)."),
+    ("user", "JOB DESCRIPTION SUMMARY:\n{job_description}\n\nCANDIDATE EXPERIENCE:\n{experience} years, Skills: {skills}")
+]
+
 class ScoringService:
     def __init__(self):
+        from langchain_core.prompts import ChatPromptTemplate
+        self.prompt = ChatPromptTemplate.from_messages(SCORING_MESSAGES)
         self.api_key = os.getenv("GOOGLE_API_KEY") or os.getenv("OPENAI_API_KEY")
+        self.rate_limiter = llm_rate_limiter
         
-        if self.api_key:
+        if LLM_PROVIDER == "fake":
+            # Offline model for throughput testing; no API calls are made
+            from .fake_llm import FakeStructuredChatModel
+            self.llm = FakeStructuredChatModel(latency=FAKE_LLM_LATENCY)
+            self.structured_llm = self.llm.with_structured_output(AIScoreResult)
+        elif self.api_key:
             if os.getenv("GOOGLE_API_KEY"):
+                from langchain_google_genai import ChatGoogleGenerativeAI
                 self.llm = ChatGoogleGenerativeAI(
                     model="gemini-2.0-flash", 
                     temperature=0, 
@@ -40,88 +79,181 @@ class ScoringService:
         else:
             self.llm = None
 
-    def score_candidate(self, resume_data: dict, job_description: str) -> AIScoreResult:
+        if self.llm:
+            # Built once; the sync and async variants share them
+            self.question_chain = ChatPromptTemplate.from_messages(QUESTION_MESSAGES) | self.llm.with_structured_output(QuestionList)
+            self.salary_chain = ChatPromptTemplate.from_messages(SALARY_MESSAGES) | self.llm.with_structured_output(SalaryEstimate)
+
+        self.cache = score_cache
+        # Cached scores are only reused while model, prompt and output schema stay the same
+        model_name = getattr(self.llm, "model", None) or getattr(self.llm, "model_name", None) or type(self.llm).__name__
+        self.version = fingerprint(
+            str(model_name),
+            "\n".join(m.prompt.template for m in self.prompt.messages),
+            json.dumps(AIScoreResult.model_json_schema(), sort_keys=True)
+        )
+
+    def _cache_key(self, resume_data: dict, job_description: str, inputs: dict):
+        # Only indexed candidates have a stable id to cache against
+        candidate_id = resume_data.get("candidate_id")
+        if candidate_id is None:
+            return None
+        return (hash_job_description(job_description), candidate_id, self.version, fingerprint(inputs["candidate_summary"]))
+
+    def local_score(self, resume_data: dict, job_description: str) -> AIScoreResult:
         """
-        Compares a candidate's structured data against a job description.
+        Fallback Logic (Local Scoring): share of the candidate's skills named in the JD.
         """
-        # Fallback Logic (Local Scoring)
-        def local_score():
-            logger.warning("Using local keyword scoring fallback.")
-            jd_lower = job_description.lower()
-            skills = resume_data.get('skills', [])
-            matched = [s for s in skills if s.lower() in jd_lower]
-            missing = [s for s in skills if s.lower() not in jd_lower]
-            
-            # Simple score: (matched / total_skills) * 100
-            # Plus some base points for vector similarity context (handled in matching_service, but we mimic here)
-            score = 0
-            if skills:
-                score = (len(matched) / len(skills)) * 100
-            
-            return AIScoreResult(
-                match_score=round(score, 2),
-                matched_skills=matched,
-                missing_skills=missing,
-                reasoning="Scored using local keyword matching (AI Service Error: Check Console Logs)."
-            )
+        matched, missing = skill_overlap(resume_data.get('skills', []), job_description)
+
+        # Simple score: (matched / total_skills) * 100
+        score = 0
+        if matched or missing:
+            score = (len(matched) / (len(matched) + len(missing))) * 100
+
+        return AIScoreResult(
+            match_score=round(score, 2),
+            matched_skills=matched,
+            missing_skills=missing,
+            reasoning="Scored using local keyword matching (AI Service Error: Check Console Logs)."
+        )
 
+    def cached_score(self, resume_data: dict, job_description: str) -> Optional[AIScoreResult]:
+        """
+        The stored LLM score for this candidate and JD, if any (no LLM call is made).
+        """
         if not self.llm:
-            return local_score()
+            return None
+        inputs = self._scoring_inputs(resume_data, job_description)
+        cache_key = self._cache_key(resume_data, job_description, inputs)
+        if not cache_key:
+            return None
+        cached = self.cache.get(*cache_key)
+        return AIScoreResult(**cached) if cached is not None else None
 
-        try:
-            # Prepare a concise summary of the candidate for the prompt
-            candidate_summary = f"""
+    def _scoring_inputs(self, resume_data: dict, job_description: str) -> dict:
+        # Prepare a concise summary of the candidate for the prompt
+        candidate_summary = f"""
             Name: {resume_data.get('name', 'Unknown')}
             Skills: {', '.join(resume_data.get('skills', []))}
             Experience: {resume_data.get('experience_years', 0)} years
             Current Role: {', '.join(resume_data.get('job_roles', []))}
             """
+        return {"job_description": job_description, "candidate_summary": candidate_summary}
+
+    def score_candidate(self, resume_data: dict, job_description: str) -> AIScoreResult:
+        """
+        Compares a candidate's structured data against a job description.
+        """
+        return self.score_candidate_staged(resume_data, job_description)[0]
+
+    def score_candidate_staged(self, resume_data: dict, job_description: str) -> Tuple[AIScoreResult, str]:
+        """
+        score_candidate that also reports where the score came from:
+        "llm", "llm_cache", or "fallback" (local keyword score after an LLM failure or without an LLM).
+        """
+        if not self.llm:
+            return self.local_score(resume_data, job_description), "fallback"
+
+        try:
+            inputs = self._scoring_inputs(resume_data, job_description)
+            cache_key = self._cache_key(resume_data, job_description, inputs)
+            if cache_key:
+                cached = self.cache.get(*cache_key)
+                if cached is not None:
+                    return AIScoreResult(**cached), "llm_cache"
+
+            self.rate_limiter.wait(estimate_tokens(job_description + inputs["candidate_summary"], SCORING_COMPLETION_TOKENS))
             
-            prompt = ChatPromptTemplate.from_messages([
-                ("system", "You are an expert HR AI. specificy. You must evaluate the candidate for the job based on: Skill match (highest weight), Experience relevance, Tool/technology overlap, Role similarity."),
-                ("user", "JOB DESCRIPTION:\n{job_description}\n\nCANDIDATE PROFILE:\n{candidate_summary}")
-            ])
-            
-            
-            chain = prompt | self.structured_llm
-            result = chain.invoke({"job_description": job_description, "candidate_summary": candidate_summary})
+            chain = self.prompt | self.structured_llm
+            result = chain.invoke(inputs)
             
-            return result
+            if cache_key:
+                self.cache.put(*cache_key, result.dict())
+            return result, "llm"
         except Exception as e:
             logger.error(f"Error evaluating candidate: {e}")
             # On 429 or other errors, use fallback
-            return local_score()
+            logger.warning("Using local keyword scoring fallback.")
+            return self.local_score(resume_data, job_description), "fallback"
 
-    def generate_interview_questions(self, resume_data: dict, job_description: str) -> dict:
+    async def ascore_candidate(self, resume_data: dict, job_description: str) -> AIScoreResult:
         """
-        Generates 5 technical and behavioral interview questions.
+        Async variant of score_candidate, so many candidates can be scored at once.
+        """
+        return (await self.ascore_candidate_staged(resume_data, job_description))[0]
+
+    async def ascore_candidate_staged(self, resume_data: dict, job_description: str) -> Tuple[AIScoreResult, str]:
+        """
+        Async variant of score_candidate_staged.
         """
         if not self.llm:
-            return {"questions": ["Unable to generate questions (LLM Unavailable)."]}
+            return self.local_score(resume_data, job_description), "fallback"
 
         try:
-            candidate_summary = f"""
+            inputs = self._scoring_inputs(resume_data, job_description)
+            cache_key = self._cache_key(resume_data, job_description, inputs)
+            if cache_key:
+                cached = await self.cache.aget(*cache_key)
+                if cached is not None:
+                    return AIScoreResult(**cached), "llm_cache"
+
+            await self.rate_limiter.acquire(estimate_tokens(job_description + inputs["candidate_summary"], SCORING_COMPLETION_TOKENS))
+
+            chain = self.prompt | self.structured_llm
+            result = await chain.ainvoke(inputs)
+
+            if cache_key:
+                self.cache.put(*cache_key, result.dict())
+            return result, "llm"
+        except Exception as e:
+            logger.error(f"Error evaluating candidate: {e}")
+            # On 429 or other errors, use fallback
+            logger.warning("Using local keyword scoring fallback.")
+            return self.local_score(resume_data, job_description), "fallback"
+
+    def _question_inputs(self, resume_data: dict, job_description: str) -> dict:
+        candidate_summary = f"""
             Name: {resume_data.get('name', 'Unknown')}
             Skills: {', '.join(resume_data.get('skills', []))}
             Experience: {resume_data.get('experience_years', 0)} years
             """
-            
-            prompt = ChatPromptTemplate.from_messages([
-                ("system", "You are a senior technical interviewer. Generate 5 specific interview questions for this candidate based on the job description and their profile. Focus on their missing skills or gaps. Return the output as a JSON list of strings under the key 'questions'."),
-                ("user", "JOB DESCRIPTION:\n{job_description}\n\nCANDIDATE PROFILE:\n{candidate_summary}")
-            ])
-            
-            # Use basic LLM for free text or unstructured, but let's try structured if we define a schema
-            # For simplicity, let's just ask for JSON text and parse it manually or assume standard Invocation if we used structured_output.
-            
-            # Let's use a new simple schema for questions
-            class QuestionList(BaseModel):
-                questions: List[str] = Field(description="List of 5 interview questions")
-                
-            question_llm = self.llm.with_structured_output(QuestionList)
-            chain = prompt | question_llm
-            result = chain.invoke({"job_description": job_description, "candidate_summary": candidate_summary})
-            
+        return {"job_description": job_description, "candidate_summary": candidate_summary}
+
+    def _salary_inputs(self, resume_data: dict, job_description: str) -> dict:
+        return {
+            "job_description": job_description[:1000],
+            "experience": resume_data.get('experience_years', 0),
+            "skills": ', '.join(resume_data.get('skills', [])[:10])  # limit skills for context window
+        }
+
+    def generate_interview_questions(self, resume_data: dict, job_description: str) -> dict:
+        """
+        Generates 5 technical and behavioral interview questions.
+        """
+        if not self.llm:
+            return {"questions": ["Unable to generate questions (LLM Unavailable)."]}
+
+        try:
+            inputs = self._question_inputs(resume_data, job_description)
+            self.rate_limiter.wait(estimate_tokens(job_description + inputs["candidate_summary"], QUESTIONS_COMPLETION_TOKENS))
+            result = self.question_chain.invoke(inputs)
+            return {"questions": result.questions}
+        except Exception as e:
+            logger.error(f"Error generating questions: {e}")
+            return {"questions": ["Error generating questions. Please try again."]}
+
+    async def agenerate_interview_questions(self, resume_data: dict, job_description: str) -> dict:
+        """
+        Async variant of generate_interview_questions.
+        """
+        if not self.llm:
+            return {"questions": ["Unable to generate questions (LLM Unavailable)."]}
+
+        try:
+            inputs = self._question_inputs(resume_data, job_description)
+            await self.rate_limiter.acquire(estimate_tokens(job_description + inputs["candidate_summary"], QUESTIONS_COMPLETION_TOKENS))
+            result = await self.question_chain.ainvoke(inputs)
             return {"questions": result.questions}
         except Exception as e:
             logger.error(f"Error generating questions: {e}")
@@ -133,28 +265,30 @@ class ScoringService:
         """
         if not self.llm:
             return {"salary_range": "Unknown", "reasoning": "LLM Unavailable"}
-        
+
         try:
-            prompt = ChatPromptTemplate.from_messages([
-                ("system", "You are an expert compensation analyst. Estimate a competitive annual salary range (in USD) for this candidate applied to this job role. Be realistic based on experience years and skills. Return JSON with keys 'salary_range' (e.g. '$80,000 - $100,000') and 'reasoning' (1 sentence)."),
-                ("user", "JOB DESCRIPTION SUMMARY:\n{job_description}\n\nCANDIDATE EXPERIENCE:\n{experience} years, Skills: {skills}")
-            ])
-            
-            experience = resume_data.get('experience_years', 0)
-            skills = ', '.join(resume_data.get('skills', [])[:10]) # limit skills for context window
-            
-            # Simple schema
-            class SalaryEstimate(BaseModel):
-                salary_range: str = Field(description="Estimated salary range")
-                reasoning: str = Field(description="Why this range?")
-                
-            salary_llm = self.llm.with_structured_output(SalaryEstimate)
-            chain = prompt | salary_llm
-            result = chain.invoke({"job_description": job_description[:1000], "experience": experience, "skills": skills})
-            
+            inputs = self._salary_inputs(resume_data, job_description)
+            self.rate_limiter.wait(estimate_tokens(inputs["job_description"] + inputs["skills"], SALARY_COMPLETION_TOKENS))
+            result = self.salary_chain.invoke(inputs)
+            return {"salary_range": result.salary_range, "reasoning": result.reasoning}
+        except Exception as e:
+            logger.error(f"Error estimating salary: {e}")
+            return {"salary_range": "N/A", "reasoning": "Could not estimate."}
+
+    async def aestimate_salary(self, resume_data: dict, job_description: str) -> dict:
+        """
+        Async variant of estimate_salary.
+        """
+        if not self.llm:
+            return {"salary_range": "Unknown", "reasoning": "LLM Unavailable"}
+
+        try:
+            inputs = self._salary_inputs(resume_data, job_description)
+            await self.rate_limiter.acquire(estimate_tokens(inputs["job_description"] + inputs["skills"], SALARY_COMPLETION_TOKENS))
+            result = await self.salary_chain.ainvoke(inputs)
             return {"salary_range": result.salary_range, "reasoning": result.reasoning}
         except Exception as e:
             logger.error(f"Error estimating salary: {e}")
             return {"salary_range": "N/A", "reasoning": "Could not estimate."}
 
-scoring_service = ScoringService()
+scoring_service = service_registry.register("scoring", ScoringService)
@@ -1,75 +1,691 @@
+import json
 import logging
+import os
+import pickle
+import threading
+import time
 import faiss
 import numpy as np
-from typing import List, Dict, Tuple
-from langchain_community.vectorstores import FAISS
-from langchain_community.docstore.in_memory import InMemoryDocstore
-from .embedding_service import embedding_service
+from typing import Collection, List, Dict, Set, Tuple, Optional, Sequence
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from .ann_index import (
+    FLAT_FACTORY, build_index, check_factory, search_parameters, is_exact, is_product_quantized, supports_remove
+)
+from .embedding_service import embedding_service, serialize_embedding, deserialize_embedding
+from .registry import service_registry
+from app.core.config import (
+    VECTOR_INDEX_DIR,
+    VECTOR_INDEX_MMAP,
+    VECTOR_INDEX_REBUILD_BATCH,
+    VECTOR_FILTER_BRUTE_FORCE_MAX,
+    VECTOR_INDEX_COMPACT_RATIO,
+    VECTOR_INDEX_FACTORY,
+    VECTOR_INDEX_TRAIN_THRESHOLD,
+    VECTOR_INDEX_RERANK_FACTOR,
+    VECTOR_INDEX_PQ_RERANK_FACTOR,
+    VECTOR_INDEX_SAVE_INTERVAL,
+)
+from app.database import SessionLocal
+from app.models import Candidate
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+INDEX_FILE = "index.faiss"
+MAPPING_FILE = "mapping.pkl"
+META_FILE = "meta.json"
+# Bumped when the saved layout changes; older saves are rebuilt from SQLite
+INDEX_FORMAT = 2
+
+def resume_metadata(candidate_id: Optional[int], filename: str, resume_data: Dict) -> Dict:
+    """
+    Builds the docstore metadata for a resume: its full extracted ResumeData plus the
+    filename and candidate id. Used for live ingest and for rebuilds from SQLite alike, so a
+    candidate's profile (and its score-cache fingerprint) doesn't depend on how it was indexed.
+    """
+    metadata = {"filename": filename}
+    metadata.update(resume_data)
+    metadata["candidate_id"] = candidate_id
+    return metadata
+
+def candidate_metadata(candidate) -> Dict:
+    """
+    Builds the docstore metadata for a Candidate row (or a row tuple with the same attributes).
+    Rows saved before the full ResumeData was stored fall back to their columns.
+    """
+    resume_data = getattr(candidate, "resume_data", None)
+    if resume_data is None:
+        resume_data = {
+            "name": candidate.name,
+            "skills": candidate.skills or [],
+            "experience_years": candidate.experience_years or 0.0,
+            "education": candidate.education or [],
+        }
+    return resume_metadata(candidate.id, candidate.filename, resume_data)
+
 class VectorDBService:
-    def __init__(self):
+    def __init__(
+        self,
+        index_dir: str = VECTOR_INDEX_DIR,
+        index_factory: str = VECTOR_INDEX_FACTORY,
+        train_threshold: int = VECTOR_INDEX_TRAIN_THRESHOLD,
+        rerank_factor: int = VECTOR_INDEX_RERANK_FACTOR,
+        pq_rerank_factor: int = VECTOR_INDEX_PQ_RERANK_FACTOR
+    ):
         """
         Initializes the Vector DB (FAISS).
-        Since FAISS is in-memory by default, this simple implementation will reset on restart.
-        For persistence, we would need to save/load the index.
+        The index starts empty; call load() at startup to restore it from disk and
+        catch it up with the Candidate table, and start_autosave() to persist it.
+        Small pools use an exact flat index; once the pool reaches train_threshold vectors
+        the index_factory index (e.g. IVF or HNSW) is trained and takes over.
+        With a compressed index (e.g. SQ8), each search fetches rerank_factor times more hits
+        (pq_rerank_factor for PQ codes) and re-ranks them exactly against the float32
+        embeddings stored in SQLite.
         """
-        self.embeddings = embedding_service.embeddings
-        
-        # Initialize an empty FAISS index
         # We need to know the dimension of the embeddings. all-MiniLM-L6-v2 is 384.
-        self.dimension = 384 
-        self.index = faiss.IndexFlatL2(self.dimension)
-        
-        # LangChain FAISS wrapper needs a docstore and index_to_docstore_id
-        self.docstore = InMemoryDocstore({})
-        self.index_to_docstore_id = {}
-        
-        self.vector_store = FAISS(
-            embedding_function=self.embeddings,
-            index=self.index,
-            docstore=self.docstore,
-            index_to_docstore_id=self.index_to_docstore_id
-        )
+        self.dimension = 384
+        self.index_dir = index_dir
+        self.index_factory = index_factory
+        try:
+            check_factory(index_factory, self.dimension)
+        except Exception as e:
+            # Reported at startup rather than once the pool reaches train_threshold
+            logger.error(f"Unusable VECTOR_INDEX_FACTORY; staying on exact search: {e}")
+            self.index_factory = FLAT_FACTORY
+        self.train_threshold = train_threshold
+        self.rerank_factor = rerank_factor
+        self.pq_rerank_factor = pq_rerank_factor
+
+        # Guards the index and docstore: FAISS is not safe for concurrent add + search
+        self._lock = threading.RLock()
+        self._dirty = False
+        # True while _maybe_build_ann_index trains the configured index outside the lock
+        self._building = False
+        # Highest Candidate.id present in the index, and how many candidate vectors it holds
+        self._max_candidate_id = 0
+        self._candidate_count = 0
+
+        self._stop_autosave = threading.Event()
+        self._autosave_thread: Optional[threading.Thread] = None
+
+        self._reset()
         logger.info("Vector DB initialized.")
 
-    def add_resume(self, text: str, metadata: Dict):
+    def _reset(
+        self,
+        index=None,
+        docstore_dict: Optional[Dict] = None,
+        index_to_docstore_id: Optional[Dict] = None,
+        active_factory: str = FLAT_FACTORY,
+        tombstones: Optional[Collection[int]] = None,
+        next_label: int = 0
+    ):
+        # Initialize the FAISS index (empty unless restored from disk). Every vector gets a
+        # stable label that never shifts when other vectors are removed.
+        if index is None:
+            index = build_index(FLAT_FACTORY, np.empty((0, self.dimension), dtype=np.float32), self.dimension)
+        self.index = index
+        # Factory string of the index in use: "Flat" until the pool is large enough for index_factory
+        self.active_factory = active_factory
+        self._fetch_factor = self._fetch_factor_for(self.index)
+
+        # Docstore (candidate metadata) and index_to_docstore_id (label -> docstore id, which is
+        # the candidate id as a string), laid out as in LangChain's FAISS vector store.
+        # LangChain is imported here rather than at module level to keep app startup fast.
+        from langchain_community.docstore.in_memory import InMemoryDocstore
+        self.docstore = InMemoryDocstore(docstore_dict or {})
+        self.index_to_docstore_id = index_to_docstore_id or {}
+
+        # docstore id -> label of its live vector
+        self._label_of: Dict[str, int] = {docstore_id: label for label, docstore_id in self.index_to_docstore_id.items()}
+        # Labels of replaced or deleted vectors: still stored in the index, never returned, dropped by compact()
+        self._tombstones: Set[int] = set(tombstones or ())
+        self._live_selector = None
+        self._next_label = next_label
+
+    def _set_index(self, index, active_factory: str):
+        # Swaps the FAISS index under the same docstore; the labels must be unchanged
+        self.index = index
+        self.active_factory = active_factory
+        self._fetch_factor = self._fetch_factor_for(index)
+
+    def _fetch_factor_for(self, index) -> int:
+        # How many times k a search fetches before the exact re-rank (1: none, distances are exact)
+        if is_exact(index):
+            return 1
+        return self.pq_rerank_factor if is_product_quantized(index) else self.rerank_factor
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.index_dir, name)
+
+    def add_resume(self, text: str, metadata: Dict, embedding: Optional[Sequence[float]] = None):
         """
         Adds a resume to the vector store.
-        Metadata should now include the structured data if available.
+        Metadata should now include the structured data if available, and "candidate_id"
+        once the resume is saved to SQLite so the index can be rebuilt from that row.
+        Pass a precomputed embedding to skip the model call.
         """
         try:
-            self.vector_store.add_texts(texts=[text], metadatas=[metadata])
+            if embedding is None:
+                embedding = embedding_service.embed_documents([text])[0]
+            self._add_embeddings([embedding], [metadata])
+            self._maybe_build_ann_index()
             logger.info(f"Added resume for {metadata.get('filename', 'unknown')} to Vector DB.")
         except Exception as e:
             logger.error(f"Error adding resume to Vector DB: {e}")
 
-    def search_similar(self, query: str, k: int = 5) -> List[Tuple[Dict, float]]:
+    def add_resumes(self, embeddings: Sequence[Sequence[float]], metadatas: List[Dict]):
+        """
+        Adds many pre-embedded resumes to the vector store in a single index insertion.
+        """
+        if not embeddings:
+            return
+        try:
+            self._add_embeddings(embeddings, metadatas)
+            logger.info(f"Added {len(embeddings)} resumes to Vector DB.")
+            self._maybe_build_ann_index()
+        except Exception as e:
+            logger.error(f"Error adding resumes to Vector DB: {e}")
+
+    def delete_candidates(self, candidate_ids: Collection[int]) -> int:
+        """
+        Removes candidates from search immediately. Their vectors are tombstoned and the
+        space is reclaimed by the next compaction. Returns the number of candidates removed.
+        """
+        with self._lock:
+            docstore_ids = [str(candidate_id) for candidate_id in candidate_ids if str(candidate_id) in self._label_of]
+            if docstore_ids:
+                self._tombstone(docstore_ids)
+                self._candidate_count -= len(docstore_ids)
+            return len(docstore_ids)
+
+    def _add_embeddings(self, embeddings: Sequence[Sequence[float]], metadatas: List[Dict]):
+        # The full resume text already lives in Candidate.extracted_text, so the docstore only
+        # keeps the filename as page content to keep the saved mapping small.
+        from langchain_core.documents import Document
+        entries = {}
+        for embedding, metadata in zip(embeddings, metadatas):
+            candidate_id = metadata.get("candidate_id")
+            docstore_id = str(candidate_id) if candidate_id is not None else self._anonymous_id()
+            entries[docstore_id] = (embedding, metadata)  # the last vector of a candidate in the batch wins
+
+        with self._lock:
+            # A candidate that is already indexed (re-uploaded under the same filename) gets its new
+            # vector under a new label; the old one is tombstoned and no longer returned
+            replaced = [docstore_id for docstore_id in entries if docstore_id in self._label_of]
+            if replaced:
+                self._tombstone(replaced)
+                self._candidate_count -= len(replaced)
+
+            labels = np.arange(self._next_label, self._next_label + len(entries), dtype=np.int64)
+            self._next_label += len(entries)
+            vectors = np.asarray([embedding for embedding, _ in entries.values()], dtype=np.float32)
+            self.index.add_with_ids(vectors, labels)
+            self.docstore.add({
+                docstore_id: Document(page_content=metadata.get("filename") or "", metadata=metadata)
+                for docstore_id, (_, metadata) in entries.items()
+            })
+            for label, docstore_id in zip(labels.tolist(), entries):
+                self.index_to_docstore_id[label] = docstore_id
+                self._label_of[docstore_id] = label
+
+            for _, metadata in entries.values():
+                candidate_id = metadata.get("candidate_id")
+                if candidate_id is not None:
+                    self._candidate_count += 1
+                    self._max_candidate_id = max(self._max_candidate_id, candidate_id)
+            self._dirty = True
+
+    def _tombstone(self, docstore_ids: List[str]):
+        for docstore_id in docstore_ids:
+            label = self._label_of.pop(docstore_id)
+            del self.index_to_docstore_id[label]
+            self._tombstones.add(label)
+        self.docstore.delete(docstore_ids)
+        self._live_selector = None
+        self._dirty = True
+
+    def _maybe_build_ann_index(self):
+        # One-time switch from the exact flat index to the configured index once the pool is big enough.
+        # Training can take minutes, so like compact() it builds from a snapshot outside the lock,
+        # then catches up with what changed in the meantime; searches and adds keep running.
+        with self._lock:
+            if self._building or self.index_factory == FLAT_FACTORY or self.active_factory != FLAT_FACTORY:
+                return
+            if len(self.index_to_docstore_id) < self.train_threshold:
+                return
+            self._building = True
+            labels = np.fromiter(self.index_to_docstore_id, dtype=np.int64, count=len(self.index_to_docstore_id))
+            vectors = self.index.reconstruct_batch(labels)
+            previous, next_label = self.index, self._next_label
+
+        try:
+            logger.info(f"Vector pool reached {len(labels)} vectors; building {self.index_factory} index.")
+            start = time.perf_counter()
+            try:
+                index = build_index(self.index_factory, vectors, self.dimension, labels)
+            except Exception as e:
+                logger.error(f"Could not build {self.index_factory} index; staying on exact search: {e}")
+                self.index_factory = FLAT_FACTORY
+                return
+
+            with self._lock:
+                if self.index is not previous:  # replaced meanwhile (e.g. reloaded)
+                    return
+                added = np.array([label for label in self.index_to_docstore_id if label >= next_label], dtype=np.int64)
+                if len(added):
+                    index.add_with_ids(self.index.reconstruct_batch(added), added)
+                # Only live vectors are carried over, so this also compacts the index; vectors
+                # tombstoned during the build are in the new index too
+                self._tombstones = {label for label in labels.tolist() if label not in self.index_to_docstore_id}
+                self._set_index(index, self.index_factory)
+                self._live_selector = None
+                self._dirty = True
+            logger.info(f"Built {self.index_factory} index in {time.perf_counter() - start:.1f}s.")
+        finally:
+            self._building = False
+
+    def compact(self) -> int:
+        """
+        Physically removes tombstoned vectors, so index size and search cost follow the live
+        pool rather than the upload history. Returns the number of vectors reclaimed.
+        """
+        with self._lock:
+            if not self._tombstones:
+                return 0
+            if supports_remove(self.index):
+                reclaimed = self.index.remove_ids(np.fromiter(self._tombstones, dtype=np.int64, count=len(self._tombstones)))
+                self._tombstones.clear()
+                self._live_selector = None
+                self._dirty = True
+                logger.info(f"Compacted vector index: {reclaimed} vectors reclaimed.")
+                return reclaimed
+
+            # Graph indexes can't drop nodes: rebuild from the live vectors outside the lock,
+            # then catch up with what changed in the meantime
+            labels = np.fromiter(self.index_to_docstore_id, dtype=np.int64, count=len(self.index_to_docstore_id))
+            vectors = self.index.reconstruct_batch(labels)
+            previous, next_label, reclaimed = self.index, self._next_label, len(self._tombstones)
+
+        start = time.perf_counter()
+        index = build_index(self.active_factory, vectors, self.dimension, labels)
+
+        with self._lock:
+            if self.index is not previous:
+                return 0
+            added = np.array([label for label in self.index_to_docstore_id if label >= next_label], dtype=np.int64)
+            if len(added):
+                index.add_with_ids(self.index.reconstruct_batch(added), added)
+            # Vectors tombstoned during the rebuild are in the new index too
+            self._tombstones = {label for label in labels.tolist() if label not in self.index_to_docstore_id}
+            self._set_index(index, self.active_factory)
+            self._live_selector = None
+            self._dirty = True
+        logger.info(f"Rebuilt vector index in {time.perf_counter() - start:.1f}s: {reclaimed} vectors reclaimed.")
+        return reclaimed
+
+    def needs_compaction(self, ratio: float = VECTOR_INDEX_COMPACT_RATIO) -> bool:
+        return bool(self._tombstones) and len(self._tombstones) >= ratio * self.index.ntotal
+
+    def _anonymous_id(self) -> str:
+        # Vectors without a Candidate row (e.g. the DB save failed) still get a unique docstore id
+        return f"anon-{self._next_label}-{os.urandom(4).hex()}"
+
+    def search_similar(
+        self,
+        query: str,
+        k: int = 5,
+        candidate_ids: Optional[Collection[int]] = None,
+        search_params: Optional[Dict] = None
+    ) -> List[Tuple[Dict, float]]:
         """
         Searches for similar documents (resumes).
-        Returns a list of (metadata, score).
-        FAISS returns L2 distance (lower is better), but LangChain wrapper might return similarity.
-        Let's use similarity_search_with_score.
+        Returns a list of (metadata, score), where score is the L2 distance (lower is better).
+        With candidate_ids, the top k is taken from those candidates only.
+        search_params may set "nprobe" (IVF) or "ef_search" (HNSW) for this query; they are
+        ignored while the index is exact.
+        """
+        return self.search_similar_batch([query], k, candidate_ids, search_params)[0]
+
+    def search_similar_batch(
+        self,
+        queries: List[str],
+        k: int = 5,
+        candidate_ids: Optional[Collection[int]] = None,
+        search_params: Optional[Dict] = None
+    ) -> List[List[Tuple[Dict, float]]]:
         """
+        search_similar for many queries at once: the queries are embedded in one batch and
+        searched with a single matrix FAISS call. Returns one result list per query, in order
+        (empty where the query could not be embedded).
+        """
+        results: List[List[Tuple[Dict, float]]] = [[] for _ in queries]
         try:
-            # results is a list of (Document, score)
-            results = self.vector_store.similarity_search_with_score(query, k=k)
-            
-            # Convert results to a friendlier format
-            # Note: FAISS usually returns L2 distance. 
-            # We might want to normalize it or just return it as is.
-            # Lower score = better match in L2.
-            
-            formatted_results = []
-            for doc, score in results:
-                formatted_results.append((doc.metadata, float(score)))
-                
-            return formatted_results
+            # Query vectors come from the embedding service's LRU, so repeated JDs skip the model
+            embeddings = embedding_service.embed_queries(queries)
+            valid = [i for i, vector in enumerate(embeddings) if vector is not None]
+            if not valid:
+                return results
+            matrix = np.vstack([embeddings[i] for i in valid])
+
+            search_params = search_params or {}
+            with self._lock:
+                # Compressed codes only approximate distances: over-fetch, then re-rank exactly below
+                fetch_k = k * max(self._fetch_factor, 1)
+                if candidate_ids is None:
+                    distances, labels = self._search(matrix, fetch_k, **search_params, selector=self._live())
+                else:
+                    distances, labels = self._search_subset(
+                        matrix, fetch_k, self._labels_for(candidate_ids), **search_params
+                    )
+                for row, i in enumerate(valid):
+                    for distance, label in zip(distances[row], labels[row]):
+                        docstore_id = self.index_to_docstore_id.get(int(label))
+                        if docstore_id is None:  # -1 (fewer hits than k) or a tombstone
+                            continue
+                        doc = self.docstore.search(docstore_id)
+                        results[i].append((doc.metadata, float(distance)))
+            if fetch_k > k:
+                self._rerank(matrix, valid, results, k)
+            return results
         except Exception as e:
             logger.error(f"Error searching Vector DB: {e}")
-            return []
+            return results
+
+    def _rerank(self, matrix: np.ndarray, valid: List[int], results: List[List[Tuple[Dict, float]]], k: int):
+        # Re-scores each query's hits with the full-precision embeddings kept in SQLite and
+        # keeps the k nearest; hits without a stored embedding keep their approximate distance
+        candidate_ids = {
+            metadata["candidate_id"] for i in valid for metadata, _ in results[i] if metadata.get("candidate_id") is not None
+        }
+        db = SessionLocal()
+        try:
+            rows = (
+                db.query(Candidate.id, Candidate.embedding)
+                .filter(Candidate.id.in_(candidate_ids), Candidate.embedding.isnot(None))
+                .all()
+            )
+        finally:
+            db.close()
+        vectors = {row.id: deserialize_embedding(row.embedding) for row in rows}
+
+        for row, i in enumerate(valid):
+            rescored = []
+            for metadata, distance in results[i]:
+                vector = vectors.get(metadata.get("candidate_id"))
+                if vector is not None:
+                    # Squared L2, the same measure IndexFlatL2 reports
+                    distance = float(np.sum((vector - matrix[row]) ** 2))
+                rescored.append((metadata, distance))
+            rescored.sort(key=lambda hit: hit[1])
+            results[i] = rescored[:k]
+
+    def _search(
+        self, matrix: np.ndarray, k: int, nprobe: Optional[int] = None, ef_search: Optional[int] = None, selector=None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        k = min(k, len(self.index_to_docstore_id))
+        if k == 0:
+            return np.empty((len(matrix), 0), dtype=np.float32), np.empty((len(matrix), 0), dtype=np.int64)
+        return self.index.search(matrix, k, params=search_parameters(self.index, selector, nprobe, ef_search))
+
+    def _search_subset(
+        self, matrix: np.ndarray, k: int, labels: np.ndarray, nprobe: Optional[int] = None, ef_search: Optional[int] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        # Selective filters: score just the allowed vectors, so the cost follows the subset, not the pool.
+        # Broad filters: let FAISS skip disallowed ids during its own scan.
+        # Only live labels are passed in, so tombstones are excluded either way.
+        k = min(k, len(labels))
+        if k == 0:
+            return np.empty((len(matrix), 0), dtype=np.float32), np.empty((len(matrix), 0), dtype=np.int64)
+        if len(labels) > VECTOR_FILTER_BRUTE_FORCE_MAX:
+            return self._search(matrix, k, nprobe, ef_search, selector=faiss.IDSelectorBatch(labels))
+
+        vectors = self.index.reconstruct_batch(labels)
+        # Squared L2 as |q|^2 - 2 q.v + |v|^2, like IndexFlatL2, without a queries x vectors x dim temporary
+        distances = (matrix ** 2).sum(axis=1)[:, None] - 2.0 * matrix @ vectors.T + (vectors ** 2).sum(axis=1)[None, :]
+        np.maximum(distances, 0.0, out=distances)
+        top = np.argpartition(distances, k - 1, axis=1)[:, :k]
+        top_distances = np.take_along_axis(distances, top, axis=1)
+        order = np.argsort(top_distances, axis=1, kind="stable")
+        return np.take_along_axis(top_distances, order, axis=1), labels[np.take_along_axis(top, order, axis=1)]
+
+    def _labels_for(self, candidate_ids: Collection[int]) -> np.ndarray:
+        labels = [self._label_of.get(str(candidate_id)) for candidate_id in candidate_ids]
+        return np.array(sorted(label for label in labels if label is not None), dtype=np.int64)
+
+    def _live(self):
+        # Selector that skips tombstoned labels during unfiltered searches (None when there are none)
+        if not self._tombstones:
+            return None
+        if self._live_selector is None:
+            dead = faiss.IDSelectorBatch(np.fromiter(self._tombstones, dtype=np.int64, count=len(self._tombstones)))
+            self._live_selector = faiss.IDSelectorNot(dead)
+            self._live_selector.referenced_objects = [dead]
+        return self._live_selector
+
+    # --- Persistence ---
+
+    def load(self, db: Session):
+        """
+        Restores the saved index and brings it up to date with the Candidate table.
+        Falls back to a full rebuild from stored embeddings if the saved copy is missing or stale.
+        """
+        with self._lock:
+            if not self._load_from_disk() or self._is_stale(db):
+                logger.info("No usable saved vector index; rebuilding from the talent pool.")
+                self._reset()
+                self._max_candidate_id = 0
+                self._candidate_count = 0
+        added = self.sync_from_db(db)
+        # A pool saved before the threshold (or index type) was configured switches over here
+        self._maybe_build_ann_index()
+        if added or self._dirty:
+            self.save()
+        logger.info(
+            f"Vector DB ready with {self.index.ntotal} vectors "
+            f"({self.active_factory} index, {added} added from the database)."
+        )
+
+    def _load_from_disk(self) -> bool:
+        try:
+            if not all(os.path.exists(self._path(f)) for f in (INDEX_FILE, MAPPING_FILE, META_FILE)):
+                return False
+            with open(self._path(META_FILE), "r") as f:
+                meta = json.load(f)
+            if meta.get("format") != INDEX_FORMAT:
+                logger.info("Saved vector index uses an older format; rebuilding.")
+                return False
+            active_factory = meta.get("index_factory", FLAT_FACTORY)
+            if active_factory not in (FLAT_FACTORY, self.index_factory):
+                logger.info(f"Saved vector index is {active_factory}, configured {self.index_factory}; rebuilding.")
+                return False
+            # Only flat indexes are memory-mapped: IVF lists read through mmap are read-only
+            io_flags = faiss.IO_FLAG_MMAP if VECTOR_INDEX_MMAP and active_factory == FLAT_FACTORY else 0
+            index = faiss.read_index(self._path(INDEX_FILE), io_flags)
+            with open(self._path(MAPPING_FILE), "rb") as f:
+                docstore_dict, index_to_docstore_id, tombstones = pickle.load(f)
+
+            stored = len(index_to_docstore_id) + len(tombstones)
+            if index.d != self.dimension or not (index.ntotal == meta["ntotal"] == stored):
+                logger.warning("Saved vector index does not match its mapping; ignoring it.")
+                return False
+
+            self._reset(index, docstore_dict, index_to_docstore_id, active_factory, tombstones, meta["next_label"])
+            self._max_candidate_id = meta["max_candidate_id"]
+            self._candidate_count = meta["candidate_count"]
+            self._dirty = False
+            return True
+        except Exception as e:
+            logger.error(f"Error loading saved vector index: {e}")
+            return False
+
+    def _is_stale(self, db: Session) -> bool:
+        # Every stored embedding covered by the watermark must be indexed at the version it has in
+        # SQLite; otherwise candidates were removed or re-uploaded after the last save (and the
+        # process died before the next one), or the database was replaced.
+        rows = (
+            db.query(Candidate.id, Candidate.embedding_version)
+            .filter(Candidate.id <= self._max_candidate_id, Candidate.embedding.isnot(None))
+        )
+        covered = 0
+        for candidate_id, embedding_version in rows:
+            document = self.docstore._dict.get(str(candidate_id))
+            if document is None or document.metadata.get("embedding_version") != embedding_version:
+                return True
+            covered += 1
+        return covered != self._candidate_count
+
+    def sync_from_db(self, db: Session, batch_size: int = VECTOR_INDEX_REBUILD_BATCH) -> int:
+        """
+        Adds Candidate rows newer than the index watermark using their stored embeddings.
+        Rows saved before embeddings were stored are embedded once and written back.
+        Returns the number of vectors added.
+        """
+        self._backfill_embeddings(db, batch_size)
+
+        query = (
+            db.query(
+                Candidate.id,
+                Candidate.filename,
+                Candidate.name,
+                Candidate.skills,
+                Candidate.experience_years,
+                Candidate.education,
+                Candidate.resume_data,
+                Candidate.embedding,
+                Candidate.embedding_version,
+            )
+            .filter(Candidate.id > self._max_candidate_id, Candidate.embedding.isnot(None))
+            .order_by(Candidate.id)
+        )
+
+        added = 0
+        vectors, metadatas = [], []
+        for row in query.yield_per(batch_size):
+            vectors.append(deserialize_embedding(row.embedding))
+            metadata = candidate_metadata(row)
+            metadata["embedding_version"] = row.embedding_version
+            metadatas.append(metadata)
+            if len(vectors) >= batch_size:
+                self._add_embeddings(vectors, metadatas)
+                added += len(vectors)
+                vectors, metadatas = [], []
+        if vectors:
+            self._add_embeddings(vectors, metadatas)
+            added += len(vectors)
+        return added
+
+    def _backfill_embeddings(self, db: Session, batch_size: int):
+        while True:
+            pending = (
+                db.query(Candidate)
+                .filter(
+                    Candidate.id > self._max_candidate_id,
+                    Candidate.embedding.is_(None),
+                    Candidate.extracted_text.isnot(None),
+                )
+                .order_by(Candidate.id)
+                .limit(batch_size)
+                .all()
+            )
+            if not pending:
+                return
+            logger.info(f"Embedding {len(pending)} stored resumes that have no saved vector.")
+            vectors = embedding_service.embed_documents([c.extracted_text for c in pending])
+            if len(vectors) != len(pending):
+                logger.error("Embedding backfill failed; those candidates stay out of the index.")
+                return
+            version = (db.query(func.max(Candidate.embedding_version)).scalar() or 0) + 1
+            for candidate, vector in zip(pending, vectors):
+                candidate.embedding = serialize_embedding(vector)
+                candidate.embedding_version = version
+            db.commit()
+
+    def save(self):
+        """
+        Writes the index, docstore mapping and metadata to index_dir.
+        Each file is written to a temp path and swapped in; meta.json goes last and
+        load() rejects a set whose counts disagree.
+        """
+        with self._lock:
+            index_bytes = faiss.serialize_index(self.index)
+            mapping = (dict(self.docstore._dict), dict(self.index_to_docstore_id), set(self._tombstones))
+            meta = {
+                "format": INDEX_FORMAT,
+                "ntotal": int(self.index.ntotal),
+                "dimension": self.dimension,
+                "index_factory": self.active_factory,
+                "max_candidate_id": self._max_candidate_id,
+                "candidate_count": self._candidate_count,
+                "next_label": self._next_label,
+            }
+            self._dirty = False
+
+        try:
+            os.makedirs(self.index_dir, exist_ok=True)
+            self._write_atomic(INDEX_FILE, index_bytes.tobytes())
+            self._write_atomic(MAPPING_FILE, pickle.dumps(mapping, protocol=pickle.HIGHEST_PROTOCOL))
+            self._write_atomic(META_FILE, json.dumps(meta).encode("utf-8"))
+            logger.info(f"Saved vector index ({meta['ntotal']} vectors) to {self.index_dir}.")
+        except Exception as e:
+            logger.error(f"Error saving vector index: {e}")
+            self._dirty = True
+
+    def _write_atomic(self, name: str, data: bytes):
+        tmp_path = self._path(name + ".tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self._path(name))
+
+    def start_autosave(self, interval: float):
+        """
+        Saves the index every `interval` seconds from a daemon thread, skipping unchanged intervals.
+        Compacts it first once tombstoned vectors make up VECTOR_INDEX_COMPACT_RATIO of the index.
+        """
+        if self._autosave_thread is not None or interval <= 0:
+            return
+        self._stop_autosave.clear()
+
+        def run():
+            while not self._stop_autosave.wait(interval):
+                if self.needs_compaction():
+                    try:
+                        self.compact()
+                    except Exception as e:
+                        logger.error(f"Error compacting vector index: {e}")
+                if self._dirty:
+                    self.save()
+
+        self._autosave_thread = threading.Thread(target=run, name="vector-index-autosave", daemon=True)
+        self._autosave_thread.start()
+
+    def stop_autosave(self):
+        """
+        Stops the autosave thread and flushes any unsaved changes.
+        """
+        if self._autosave_thread is not None:
+            self._stop_autosave.set()
+            self._autosave_thread.join()
+            self._autosave_thread = None
+        if self._dirty:
+            self.save()
+
+def create_vector_db() -> VectorDBService:
+    """
+    Restores the index from disk (or rebuilds it from stored embeddings) and starts autosaving,
+    so the service is only handed out once it is up to date with the Candidate table.
+    """
+    service = VectorDBService()
+    db = SessionLocal()
+    try:
+        service.load(db)
+    finally:
+        db.close()
+    service.start_autosave(VECTOR_INDEX_SAVE_INTERVAL)
+    return service
 
-# Singleton instance
-vector_db = VectorDBService()
+# Singleton instance, created on first use (see registry.py)
+vector_db = service_registry.register("vector_db", create_vector_db)
@@ -0,0 +1,128 @@
+"""
+Compares the embedding backends (PyTorch vs. int8-quantized ONNX): documents/sec, peak resident
+memory and parity. Each backend runs in its own process so their memory doesn't mix.
+Exits non-zero when the minimum cosine similarity between the two backends' vectors falls
+below --min-cosine.
+
+Usage (from backend/):
+    python benchmark_embeddings.py --docs 500 --threads 4
+    python benchmark_embeddings.py --from-db --docs 2000
+"""
+import sys
+import os
+import json
+import time
+import random
+import argparse
+import resource
+import subprocess
+import tempfile
+import numpy as np
+
+# Ensure we can import from app
+sys.path.append(os.getcwd())
+
+BACKENDS = ("torch", "onnx")
+WORDS = (
+    "python java sql docker kubernetes aws react django fastapi spark airflow pandas kafka terraform "
+    "led designed built migrated optimized mentored team pipeline platform service latency throughput "
+    "senior engineer developer analyst manager university bachelor master experience years project"
+).split()
+
+def synthetic_resumes(count: int, seed: int = 0):
+    # Resume-like texts from a few dozen to ~400 words, so some exceed the model's 256-token window
+    rng = random.Random(seed)
+    return [f"Candidate {i}\n" + " ".join(rng.choices(WORDS, k=rng.randint(30, 400))) for i in range(count)]
+
+def resumes_from_db(count: int):
+    from app.database import SessionLocal
+    from app.models import Candidate
+    db = SessionLocal()
+    try:
+        rows = db.query(Candidate.extracted_text).filter(Candidate.extracted_text.isnot(None)).limit(count).all()
+    finally:
+        db.close()
+    return [row.extracted_text for row in rows]
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is in KB on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+def run_backend(backend: str, texts_path: str, vectors_path: str, threads: int, batch_size: int):
+    # Worker mode: load one backend, embed the texts, report timings and memory as JSON on stdout
+    from app.services.embedding_service import EmbeddingService
+
+    with open(texts_path) as f:
+        texts = json.load(f)
+    start = time.perf_counter()
+    service = EmbeddingService(backend=backend, threads=threads)
+    load_seconds = time.perf_counter() - start
+
+    service.embed_documents(texts[:batch_size])  # warm-up, not timed
+    start = time.perf_counter()
+    vectors = service.embed_documents_batched(texts, batch_size)
+    elapsed = time.perf_counter() - start
+
+    np.save(vectors_path, np.asarray(vectors, dtype=np.float32))
+    print(json.dumps({
+        "backend": service.backend,
+        "load_seconds": load_seconds,
+        "docs_per_second": len(texts) / elapsed,
+        "peak_rss_mb": peak_rss_mb(),
+    }))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs", type=int, default=500)
+    parser.add_argument("--from-db", action="store_true", help="Use resumes from the talent pool instead of synthetic text")
+    parser.add_argument("--threads", type=int, default=0, help="Inference threads (0 = runtime default)")
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--min-cosine", type=float, default=0.99)
+    parser.add_argument("--worker", choices=BACKENDS, help=argparse.SUPPRESS)
+    parser.add_argument("--texts", help=argparse.SUPPRESS)
+    parser.add_argument("--vectors", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_backend(args.worker, args.texts, args.vectors, args.threads, args.batch_size)
+        return
+
+    texts = resumes_from_db(args.docs) if args.from_db else synthetic_resumes(args.docs)
+    print(f"{len(texts)} documents, threads={args.threads or 'auto'}, batch size {args.batch_size}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        texts_path = os.path.join(tmp, "texts.json")
+        with open(texts_path, "w") as f:
+            json.dump(texts, f)
+
+        vectors = {}
+        for backend in BACKENDS:
+            vectors_path = os.path.join(tmp, f"{backend}.npy")
+            result = subprocess.run(
+                [sys.executable, __file__, "--worker", backend, "--texts", texts_path, "--vectors", vectors_path,
+                 "--threads", str(args.threads), "--batch-size", str(args.batch_size)],
+                capture_output=True, text=True
+            )
+            if result.returncode != 0:
+                print(f"{backend}: failed\n{result.stderr[-2000:]}")
+                sys.exit(1)
+            report = json.loads(result.stdout.strip().splitlines()[-1])
+            if report["backend"] != backend:
+                print(f"{backend}: not available (fell back to {report['backend']})\n{result.stderr[-2000:]}")
+                sys.exit(1)
+            vectors[backend] = np.load(vectors_path)
+            print(
+                f"{backend:<6} load {report['load_seconds']:6.1f}s  {report['docs_per_second']:8.1f} docs/s  "
+                f"peak RSS {report['peak_rss_mb']:7.0f} MB"
+            )
+
+    torch_vectors, onnx_vectors = (v / np.linalg.norm(v, axis=1, keepdims=True) for v in (vectors["torch"], vectors["onnx"]))
+    cosine = np.sum(torch_vectors * onnx_vectors, axis=1)
+    print(f"Parity: cosine min {cosine.min():.4f}  mean {cosine.mean():.4f}  p1 {np.percentile(cosine, 1):.4f}")
+    if cosine.min() < args.min_cosine:
+        print(f"Parity check failed: minimum cosine {cosine.min():.4f} < {args.min_cosine}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""
+Load test for event-loop blocking: measures the latency of a trivial endpoint (GET /health)
+on its own, then again while --concurrency requests to a heavy endpoint are in flight.
+If anything on the request path blocks the event loop (a synchronous LLM call, SQLite query
+or model forward pass), /health has to wait behind it and its p99 climbs with the load.
+Exits non-zero when the loaded p99 exceeds the idle p99 by more than --tolerance-ms.
+
+Starts its own server unless --url is given; use a populated talent pool and, for offline
+runs, the fake LLM with a realistic latency.
+
+Usage (from backend/):
+    LLM_PROVIDER=fake FAKE_LLM_LATENCY=0.5 python benchmark_event_loop.py
+    python benchmark_event_loop.py --endpoint generate-questions --concurrency 50 --duration 20
+    python benchmark_event_loop.py --url http://127.0.0.1:8000
+"""
+import sys
+import os
+import time
+import asyncio
+import argparse
+import subprocess
+import uuid
+import numpy as np
+import httpx
+
+# Per run, so scores cached by an earlier run (they persist in SQLite) are not reused
+RUN_ID = uuid.uuid4().hex[:8]
+RESUME = {"name": "Jane Doe", "skills": ["python", "sql", "docker"], "experience_years": 5, "job_roles": ["Backend Engineer"]}
+
+def request_for(endpoint: str, i: int):
+    # Distinct job descriptions, so neither the query-embedding nor the score cache answers them
+    job_description = f"Backend engineer #{RUN_ID}-{i}: python, sql, docker, kubernetes; {i % 7 + 2}+ years of experience"
+    if endpoint == "match-job":
+        return "/api/match-job", {"job_description": job_description, "top_k": 5}
+    return f"/api/{endpoint}", {"job_description": job_description, "resume_data": RESUME}
+
+def percentiles(latencies):
+    values = np.array(latencies) * 1000
+    return {"p50": float(np.percentile(values, 50)), "p99": float(np.percentile(values, 99)), "max": float(values.max())}
+
+async def probe(client: httpx.AsyncClient, stop: asyncio.Event, interval: float):
+    latencies = []
+    while not stop.is_set():
+        start = time.perf_counter()
+        response = await client.get("/health")
+        response.raise_for_status()
+        latencies.append(time.perf_counter() - start)
+        await asyncio.sleep(interval)
+    return latencies
+
+async def load(client: httpx.AsyncClient, stop: asyncio.Event, window: dict, endpoint: str, worker: int, concurrency: int):
+    # Only requests that complete inside the measured window count
+    latencies, errors, i = [], 0, worker
+    while not stop.is_set():
+        path, body = request_for(endpoint, i)
+        i += concurrency
+        start = time.perf_counter()
+        try:
+            response = await client.post(path, json=body)
+            response.raise_for_status()
+            if window["start"] is not None and not stop.is_set():
+                latencies.append(time.perf_counter() - start)
+        except httpx.HTTPError:
+            errors += 1
+    return latencies, errors
+
+async def run(url: str, endpoint: str, concurrency: int, duration: float, interval: float):
+    limits = httpx.Limits(max_connections=concurrency + 1)
+    # Separate clients, so probes never queue behind the load for a pooled connection
+    async with httpx.AsyncClient(base_url=url, timeout=300) as probe_client, \
+            httpx.AsyncClient(base_url=url, timeout=300, limits=limits) as load_client:
+        stop = asyncio.Event()
+        probing = asyncio.create_task(probe(probe_client, stop, interval))
+        await asyncio.sleep(duration / 2)
+        stop.set()
+        idle = await probing
+
+        stop, window = asyncio.Event(), {"start": None}
+        workers = [asyncio.create_task(load(load_client, stop, window, endpoint, w, concurrency)) for w in range(concurrency)]
+        await asyncio.sleep(1)  # let every worker get a request in flight
+        probing = asyncio.create_task(probe(probe_client, stop, interval))
+        window["start"] = time.perf_counter()
+        await asyncio.sleep(duration)
+        stop.set()
+        elapsed = time.perf_counter() - window["start"]
+        loaded = await probing
+        results = await asyncio.gather(*workers)
+    heavy = [latency for latencies, _ in results for latency in latencies]
+    errors = sum(errors for _, errors in results)
+    return idle, loaded, heavy, errors, elapsed
+
+def wait_ready(url: str, server: subprocess.Popen, timeout: float):
+    start = time.perf_counter()
+    while time.perf_counter() - start < timeout:
+        if server.poll() is not None:
+            raise RuntimeError(f"Server exited with code {server.returncode}")
+        try:
+            if httpx.get(url + "/ready", timeout=1).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"Services not ready after {timeout:.0f}s")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--endpoint", choices=("match-job", "generate-questions", "estimate-salary"), default="match-job")
+    parser.add_argument("--concurrency", type=int, default=50, help="Heavy requests kept in flight")
+    parser.add_argument("--duration", type=float, default=10, help="Seconds of load")
+    parser.add_argument("--interval", type=float, default=0.02, help="Seconds between /health probes")
+    parser.add_argument("--tolerance-ms", type=float, default=50, help="Allowed p99 increase of /health under load")
+    parser.add_argument("--url", help="Test a running server instead of starting one")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--timeout", type=float, default=300, help="Seconds to wait for the started server to be ready")
+    args = parser.parse_args()
+
+    url, server = args.url, None
+    if url is None:
+        url = f"http://127.0.0.1:{args.port}"
+        server = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(args.port), "--log-level", "warning"],
+            cwd=os.getcwd()
+        )
+    try:
+        if server is not None:
+            wait_ready(url, server, args.timeout)
+        idle, loaded, heavy, errors, elapsed = asyncio.run(
+            run(url, args.endpoint, args.concurrency, args.duration, args.interval)
+        )
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    idle_stats, loaded_stats = percentiles(idle), percentiles(loaded)
+    print(f"/health idle:   p50 {idle_stats['p50']:7.1f}ms  p99 {idle_stats['p99']:7.1f}ms  max {idle_stats['max']:7.1f}ms  ({len(idle)} probes)")
+    print(f"/health loaded: p50 {loaded_stats['p50']:7.1f}ms  p99 {loaded_stats['p99']:7.1f}ms  max {loaded_stats['max']:7.1f}ms  ({len(loaded)} probes)")
+    if heavy:
+        heavy_stats = percentiles(heavy)
+        print(
+            f"/{args.endpoint} x{args.concurrency}: {len(heavy) / elapsed:.1f} req/s  "
+            f"p50 {heavy_stats['p50']:.0f}ms  p99 {heavy_stats['p99']:.0f}ms  {errors} errors"
+        )
+    else:
+        print(f"/{args.endpoint}: no request completed ({errors} errors)")
+
+    if loaded_stats["p99"] > idle_stats["p99"] + args.tolerance_ms:
+        print(f"/health p99 grew by {loaded_stats['p99'] - idle_stats['p99']:.1f}ms under load (tolerance {args.tolerance_ms:.0f}ms): the event loop is blocked or the host is out of CPU.")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
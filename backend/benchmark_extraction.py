@@ -0,0 +1,33 @@
+"""
+Measures bulk resume extraction throughput offline.
+
+Usage (from backend/):
+    LLM_PROVIDER=fake FAKE_LLM_LATENCY=0.5 LLM_REQUESTS_PER_MINUTE=600 python benchmark_extraction.py 200
+"""
+import sys
+import os
+import time
+import asyncio
+
+# Ensure we can import from app
+sys.path.append(os.getcwd())
+
+from app.services.extraction_service import extraction_service
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    texts = [f"Candidate {i}\nPython developer with {i % 10} years of experience." for i in range(count)]
+
+    limiter = extraction_service.rate_limiter
+    rpm = limiter.requests.capacity if limiter.requests else 0
+    print(f"Extracting {count} resumes (concurrency={extraction_service.concurrency}, rpm={rpm or 'unlimited'})...")
+
+    start = time.perf_counter()
+    results = asyncio.run(extraction_service.aextract_batch(texts))
+    elapsed = time.perf_counter() - start
+
+    failures = sum(1 for r in results if r.get("error"))
+    print(f"Done in {elapsed:.2f}s -> {count / elapsed:.1f} resumes/s ({count / elapsed * 60:.0f}/min), {failures} failures")
+
+if __name__ == "__main__":
+    main()
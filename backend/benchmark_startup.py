@@ -0,0 +1,117 @@
+"""
+Measures application startup: the import cost of app.main (with the slowest imports),
+cold start to the first healthy response, and the time until every service reports ready.
+Exits non-zero when importing app.main exceeds --import-budget, so a regression can fail CI.
+
+Usage (from backend/):
+    python benchmark_startup.py
+    LLM_PROVIDER=fake python benchmark_startup.py --import-budget 1.5 --top 15
+"""
+import sys
+import os
+import re
+import json
+import time
+import argparse
+import subprocess
+import urllib.error
+import urllib.request
+
+IMPORT_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+def import_profile():
+    # -X importtime reports self and cumulative microseconds per module, indented by nesting depth
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        cwd=os.getcwd(), capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing app.main failed:\n{result.stderr[-2000:]}")
+    modules = []
+    for line in result.stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            modules.append((name, len(indent) // 2, int(self_us) / 1e6, int(cumulative_us) / 1e6))
+    return modules
+
+def import_seconds() -> float:
+    # Wall clock in a fresh interpreter, without the importtime instrumentation overhead
+    code = "import time; start = time.perf_counter(); import app.main; print(time.perf_counter() - start)"
+    result = subprocess.run([sys.executable, "-c", code], cwd=os.getcwd(), capture_output=True, text=True)
+    return float(result.stdout.strip().splitlines()[-1])
+
+def get(url: str):
+    try:
+        with urllib.request.urlopen(url, timeout=1) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read() or b"null")
+    except (urllib.error.URLError, ConnectionError, OSError):
+        return None, None
+
+def cold_start(port: int, timeout: float):
+    """
+    Starts uvicorn and polls /health, then /ready. Returns (seconds to healthy,
+    seconds to ready or None on timeout, last /ready body).
+    """
+    base = f"http://127.0.0.1:{port}"
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=os.getcwd()
+    )
+    try:
+        healthy = ready = None
+        body = None
+        while time.perf_counter() - start < timeout:
+            if server.poll() is not None:
+                raise RuntimeError(f"Server exited with code {server.returncode}")
+            if healthy is None:
+                if get(base + "/health")[0] == 200:
+                    healthy = time.perf_counter() - start
+            else:
+                status, body = get(base + "/ready")
+                if status == 200:
+                    ready = time.perf_counter() - start
+                    break
+            time.sleep(0.02)
+        return healthy, ready, body
+    finally:
+        server.terminate()
+        server.wait()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--top", type=int, default=10, help="Slowest imports to list")
+    parser.add_argument("--import-budget", type=float, default=None, help="Fail if importing app.main takes longer (seconds)")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--timeout", type=float, default=300, help="Seconds to wait for all services to be ready")
+    parser.add_argument("--skip-server", action="store_true", help="Only measure imports")
+    args = parser.parse_args()
+
+    modules = import_profile()
+    print("Slowest imports of app.main (cumulative, direct imports only):")
+    for name, _, _, cumulative in sorted((m for m in modules if m[1] == 1), key=lambda m: -m[3])[:args.top]:
+        print(f"  {cumulative * 1000:8.1f}ms  {name}")
+    print("Slowest modules (self time):")
+    for name, _, self_seconds, _ in sorted(modules, key=lambda m: -m[2])[:args.top]:
+        print(f"  {self_seconds * 1000:8.1f}ms  {name}")
+
+    seconds = import_seconds()
+    print(f"import app.main: {seconds:.3f}s")
+
+    if not args.skip_server:
+        healthy, ready, body = cold_start(args.port, args.timeout)
+        print(f"Cold start to first healthy response: {healthy:.3f}s" if healthy else "Server never became healthy")
+        print(f"Cold start to all services ready: {ready:.3f}s" if ready else f"Services not ready after {args.timeout:.0f}s")
+        for name, service in ((body or {}).get("services") or {}).items():
+            load = f"{service['load_seconds']:.2f}s" if service["load_seconds"] is not None else "-"
+            print(f"  {name:<14} {service['state']:<10} {load}" + (f"  {service['error']}" if service["error"] else ""))
+
+    if args.import_budget is not None and seconds > args.import_budget:
+        print(f"Import time {seconds:.3f}s is over the {args.import_budget:.3f}s budget.")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""
+Compares FAISS index types against the exact flat baseline on a synthetic corpus:
+build time, bytes per vector, recall@k and p50/p99 single-query latency for each
+nprobe / efSearch setting. Compressed indexes are also measured with the exact re-rank
+VectorDBService applies (k x rerank hits re-scored with the float32 vectors; by default
+the app's VECTOR_INDEX_RERANK_FACTOR, or VECTOR_INDEX_PQ_RERANK_FACTOR for PQ codes).
+Each index is also checked with the id selectors VectorDBService searches with after a
+delete and under a filter; the script exits non-zero if any index fails that check.
+
+Usage (from backend/):
+    python benchmark_vector_index.py --size 200000 --factories "IVF1024,Flat" HNSW32 --nprobe 8 16 64 --ef-search 32 64 128
+    python benchmark_vector_index.py --factories SQfp16 SQ8 "IVF1024,SQ8" "IVF1024,PQ48"
+    python benchmark_vector_index.py --factories "IVF1024,PQ48" "IVF1024,PQ96" --rerank 4 --nprobe 16
+"""
+import sys
+import os
+import time
+import argparse
+import faiss
+import numpy as np
+
+# Ensure we can import from app
+sys.path.append(os.getcwd())
+
+from app.core.config import VECTOR_INDEX_RERANK_FACTOR, VECTOR_INDEX_PQ_RERANK_FACTOR
+from app.services.ann_index import FLAT_FACTORY, build_index, search_parameters, is_exact, is_product_quantized
+
+DIMENSION = 384  # all-MiniLM-L6-v2
+
+def synthetic_corpus(size: int, queries: int, clusters: int, seed: int = 0):
+    # Unit vectors drawn around random centers, like sentence embeddings of resumes in a few fields
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, DIMENSION)).astype(np.float32)
+
+    def sample(n):
+        points = centers[rng.integers(0, clusters, n)] + 0.6 * rng.standard_normal((n, DIMENSION)).astype(np.float32)
+        return points / np.linalg.norm(points, axis=1, keepdims=True)
+
+    return sample(size), sample(queries)
+
+def run_queries(index, queries: np.ndarray, k: int, params, vectors: np.ndarray = None, rerank: int = 1):
+    # One query per call, as a match request would issue it. With rerank > 1, k x rerank hits
+    # are re-scored against the full-precision vectors (the float32 embeddings in SQLite in the app).
+    latencies, results = [], []
+    for query in queries:
+        start = time.perf_counter()
+        _, positions = index.search(query[None, :], k * rerank, params=params)
+        positions = positions[0]
+        if rerank > 1:
+            positions = positions[positions >= 0]
+            exact = ((vectors[positions] - query) ** 2).sum(axis=1)
+            positions = positions[np.argsort(exact, kind="stable")[:k]]
+        latencies.append(time.perf_counter() - start)
+        results.append(positions)
+    return results, np.array(latencies) * 1000
+
+def recall_at_k(results, truth) -> float:
+    k = len(truth[0])
+    return float(np.mean([len(set(r) & set(t)) / k for r, t in zip(results, truth)]))
+
+def bytes_per_vector(index) -> float:
+    return len(faiss.serialize_index(index)) / max(index.ntotal, 1)
+
+def check_selectors(index, queries: np.ndarray, truth, k: int, settings: dict) -> str:
+    """
+    Delete-then-search: tombstones each query's nearest neighbour and searches with the
+    exclusion selector, then with an allow-list of half the corpus (a broad filter).
+    Returns an error message, or "" if every query got k hits that respect the selector.
+    """
+    deleted = np.unique([t[0] for t in truth]).astype(np.int64)
+    allowed = np.arange(0, index.ntotal, 2, dtype=np.int64)
+    checks = [
+        ("after delete", faiss.IDSelectorNot(faiss.IDSelectorBatch(deleted)), lambda hits: not np.isin(hits, deleted).any()),
+        ("filtered", faiss.IDSelectorBatch(allowed), lambda hits: np.isin(hits, allowed).all()),
+    ]
+    for name, selector, respects in checks:
+        try:
+            _, hits = index.search(queries, k, params=search_parameters(index, selector, **settings))
+        except RuntimeError as e:
+            return f"search {name} failed: {str(e).splitlines()[0]}"
+        if (hits < 0).any() or not respects(hits):
+            return f"search {name} returned missing or excluded ids"
+    return ""
+
+def report(label: str, build_seconds: float, size: float, recall: float, latencies: np.ndarray):
+    print(
+        f"{label:<40} build {build_seconds:7.1f}s  {size:7.1f} B/vec  recall {recall:6.3f}  "
+        f"p50 {np.percentile(latencies, 50):7.3f}ms  p99 {np.percentile(latencies, 99):7.3f}ms"
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=100000, help="Vectors in the corpus")
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--clusters", type=int, default=200)
+    parser.add_argument("-k", type=int, default=10)
+    parser.add_argument("--factories", nargs="+", default=["IVF1024,Flat", "HNSW32"])
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[8, 16, 64])
+    parser.add_argument("--ef-search", type=int, nargs="+", default=[32, 64, 128])
+    parser.add_argument("--rerank", type=int, help="Re-rank factor for compressed indexes (1 disables; default: the app's)")
+    args = parser.parse_args()
+
+    vectors, queries = synthetic_corpus(args.size, args.queries, args.clusters)
+    print(f"{args.size} vectors, {args.queries} queries, k={args.k}")
+
+    start = time.perf_counter()
+    flat = build_index(FLAT_FACTORY, vectors, DIMENSION)
+    build_seconds = time.perf_counter() - start
+    truth, latencies = run_queries(flat, queries, args.k, None)
+    report(FLAT_FACTORY, build_seconds, bytes_per_vector(flat), 1.0, latencies)
+
+    failed = []
+    for factory in args.factories:
+        start = time.perf_counter()
+        try:
+            index = build_index(factory, vectors, DIMENSION)
+        except ValueError as e:
+            print(f"{factory:<40} not supported: {e}")
+            continue
+        build_seconds = time.perf_counter() - start
+        size = bytes_per_vector(index)
+        rerank = args.rerank
+        if rerank is None:
+            rerank = VECTOR_INDEX_PQ_RERANK_FACTOR if is_product_quantized(index) else VECTOR_INDEX_RERANK_FACTOR
+        reranks = [1] if is_exact(index) or rerank <= 1 else [1, rerank]
+
+        if "IVF" in factory:
+            settings = [(f"nprobe={n}", {"nprobe": n}) for n in args.nprobe]
+        elif "HNSW" in factory:
+            settings = [(f"efSearch={ef}", {"ef_search": ef}) for ef in args.ef_search]
+        else:
+            settings = [("", {})]
+        for setting, kwargs in settings:
+            params = search_parameters(index, **kwargs)
+            for rerank in reranks:
+                label = " ".join(part for part in (factory, setting, f"rerank x{rerank}" if rerank > 1 else "") if part)
+                results, latencies = run_queries(index, queries, args.k, params, vectors, rerank)
+                report(label, build_seconds, size, recall_at_k(results, truth), latencies)
+
+        error = check_selectors(index, queries, truth, args.k, settings[-1][1])
+        if error:
+            print(f"{factory:<40} {error}")
+            failed.append(factory)
+
+    if failed:
+        print(f"Id selectors broken for: {', '.join(failed)}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""
+Shared fixtures. The suite runs offline: the fake LLM (LLM_PROVIDER=fake) stands in for
+Gemini/OpenAI and a hashing embedder for the sentence-transformers model. The database,
+vector index and job spool live in a temporary directory, never in backend/.
+"""
+import hashlib
+import os
+import tempfile
+
+DATA_DIR = tempfile.mkdtemp(prefix="resume-screening-tests-")
+os.environ.update({
+    "DATABASE_URL": f"sqlite:///{os.path.join(DATA_DIR, 'talent_pool.db')}",
+    "VECTOR_INDEX_DIR": os.path.join(DATA_DIR, "vector_index"),
+    "JOBS_DIR": os.path.join(DATA_DIR, "ingest_jobs"),
+    "LLM_PROVIDER": "fake",
+    "FAKE_LLM_LATENCY": "0",
+    "LLM_REQUESTS_PER_MINUTE": "0",
+    "LLM_TOKENS_PER_MINUTE": "0",
+    "PDF_PARSER_WORKERS": "2",
+    "JOB_WORKERS": "1",
+})
+
+import numpy as np
+import pytest
+from langchain_core.embeddings import Embeddings
+
+from app.database import Base, SessionLocal, engine, add_missing_columns, create_missing_indexes
+from app.services.embedding_service import EmbeddingService
+from app.services.ingestion_service import ingestion_service, ProcessedResume
+from app.services.lexical_search import lexical_search
+from app.services.registry import service_registry
+from app.services.resume_cache import resume_cache
+from app.services.score_cache import score_cache
+from app.services.vector_db import VectorDBService
+
+DIMENSION = 384
+
+class HashEmbeddings(Embeddings):
+    """
+    Deterministic bag-of-words embedder: each word hashes to one of 384 dimensions and the
+    vector is L2-normalized, so texts sharing words land close together.
+    """
+    def _embed(self, text: str):
+        vector = np.zeros(DIMENSION, dtype=np.float32)
+        for word in text.lower().split():
+            vector[int(hashlib.md5(word.encode("utf-8")).hexdigest(), 16) % DIMENSION] += 1.0
+        norm = np.linalg.norm(vector)
+        return (vector / norm if norm else vector).tolist()
+
+    def embed_documents(self, texts):
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text):
+        return self._embed(text)
+
+service_registry.register("embeddings", lambda: EmbeddingService(embeddings=HashEmbeddings()))
+
+Base.metadata.create_all(bind=engine)
+add_missing_columns(engine)
+create_missing_indexes(engine)
+lexical_search.ensure_index(engine)
+
+@pytest.fixture
+def embed():
+    """Embeds texts with the stub model."""
+    return HashEmbeddings().embed_documents
+
+@pytest.fixture
+def db():
+    """
+    A session on an empty database. Rows are deleted rather than the tables dropped, so the
+    FTS5 table and its triggers stay in place (and in step with the candidates table).
+    """
+    with engine.begin() as conn:
+        for table in reversed(Base.metadata.sorted_tables):
+            conn.execute(table.delete())
+    score_cache.memory.clear()
+    resume_cache.entries.clear()
+    resume_cache.pdf_hashes.clear()
+    session = SessionLocal()
+    yield session
+    session.close()
+
+@pytest.fixture
+def vector_index(db, tmp_path):
+    """
+    Replaces the app's vector_db service with a fresh, empty index saved under tmp_path.
+    """
+    service = VectorDBService(index_dir=str(tmp_path / "vector_index"))
+    service_registry.register("vector_db", lambda: service)
+    yield service
+    service.stop_autosave()
+
+def pdf_bytes(text: str) -> bytes:
+    """A one-page PDF with each line of text drawn in Helvetica."""
+    content = "BT /F1 12 Tf 50 750 Td " + " ".join(f"({line}) Tj 0 -14 Td" for line in text.split("\n")) + " ET"
+    objects = [
+        "<< /Type /Catalog /Pages 2 0 R >>",
+        "<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        "<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents 4 0 R /Resources << /Font << /F1 5 0 R >> >> >>",
+        f"<< /Length {len(content)} >>\nstream\n{content}\nendstream",
+        "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    out = b"%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n{body}\nendobj\n".encode("latin-1")
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode("latin-1")
+    out += b"".join(f"{offset:010d} 00000 n \n".encode("latin-1") for offset in offsets)
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF".encode("latin-1")
+    return out
+
+@pytest.fixture
+def make_pdf():
+    return pdf_bytes
+
+@pytest.fixture
+def make_resume(embed):
+    """Builds a processed resume as the upload pipeline would (embedded=False: embedding failed)."""
+    def make(filename: str, text: str, skills, embedded: bool = True) -> ProcessedResume:
+        return ProcessedResume(
+            filename=filename,
+            text=text,
+            extracted_data={
+                "name": filename.split(".")[0].title(),
+                "skills": skills,
+                "experience_years": 4.0,
+                "education": ["BSc Computer Science"],
+                "tools": ["Docker", "Git"],
+                "job_roles": ["Backend Engineer"],
+            },
+            embedding=embed([text])[0] if embedded else None,
+        )
+    return make
+
+@pytest.fixture
+def save_and_index(db, vector_index):
+    """Upserts resumes and indexes the saved ones, like IngestionService.ingest_files."""
+    def save(resumes):
+        saved = ingestion_service._write_candidates(db, resumes)
+        ingestion_service.index_candidates([(resume, candidate) for resume, candidate in zip(resumes, saved) if candidate])
+        return saved
+    return save
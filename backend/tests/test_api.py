@@ -0,0 +1,113 @@
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.models import Candidate
+
+@pytest.fixture
+def client(db, vector_index):
+    with TestClient(app) as client:
+        # Services warm up in the background after startup
+        for _ in range(200):
+            if client.get("/ready").status_code == 200:
+                break
+            time.sleep(0.05)
+        else:
+            pytest.fail(f"services did not load: {client.get('/ready').json()}")
+        yield client
+
+@pytest.fixture
+def pool(db):
+    """23 candidates with repeated names, experience and upload dates, some missing."""
+    start = datetime(2024, 1, 1, 9, 0, 0)
+    rows = []
+    for i in range(23):
+        rows.append(Candidate(
+            filename=f"resume_{i}.pdf",
+            name=None if i % 10 == 9 else f"Name {i % 4}",
+            skills=["Python"] if i % 2 else ["Java"],
+            experience_years=None if i % 7 == 6 else float(i % 5),
+            education=[],
+            upload_date=start + timedelta(days=i % 6),
+        ))
+    db.add_all(rows)
+    db.commit()
+    return {
+        row.id: {"name": row.name or "", "experience_years": row.experience_years or 0.0, "upload_date": row.upload_date}
+        for row in rows
+    }
+
+def all_pages(client, **params):
+    ids, cursor, pages = [], None, 0
+    while True:
+        query = dict(params, **({"cursor": cursor} if cursor else {}))
+        body = client.get("/api/candidates", params=query).json()
+        ids.extend(item["id"] for item in body["items"])
+        pages += 1
+        cursor = body["next_cursor"]
+        if cursor is None:
+            return ids, pages
+
+@pytest.mark.parametrize("order", ["asc", "desc"])
+@pytest.mark.parametrize("sort", ["id", "name", "experience_years", "upload_date"])
+def test_keyset_pages_cover_the_pool_once_in_order(client, pool, sort, order):
+    ids, pages = all_pages(client, sort=sort, order=order, limit=5)
+    if sort == "id":
+        expected = sorted(pool, reverse=order == "desc")
+    else:
+        expected = sorted(pool, key=lambda i: (pool[i][sort], i), reverse=order == "desc")
+    assert ids == expected
+    assert pages == 5
+
+def test_keyset_pages_apply_filters(client, pool):
+    ids, _ = all_pages(client, sort="experience_years", skill="Python", min_experience=1, limit=2)
+    response = client.get("/api/candidates", params={"skill": "Python", "min_experience": 1, "limit": 500})
+    assert ids == sorted(
+        (item["id"] for item in response.json()["items"]), key=lambda i: (pool[i]["experience_years"], i)
+    )
+    assert ids
+
+def test_invalid_cursor_is_rejected(client, pool):
+    assert client.get("/api/candidates", params={"cursor": "not-a-cursor"}).status_code == 400
+
+def test_unchanged_listing_revalidates_with_304(client, pool, db):
+    first = client.get("/api/candidates", params={"limit": 5})
+    etag = first.headers["etag"]
+    again = client.get("/api/candidates", params={"limit": 5}, headers={"If-None-Match": etag})
+    assert again.status_code == 304
+    assert again.content == b""
+    assert again.headers["etag"] == etag
+
+    db.query(Candidate).filter(Candidate.id == min(pool)).update({"name": "Renamed"})
+    db.commit()
+    changed = client.get("/api/candidates", params={"limit": 5}, headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != etag
+
+def test_large_listings_are_gzipped(client, pool):
+    response = client.get("/api/candidates", params={"limit": 50}, headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert len(response.json()["items"]) == 23
+    small = client.get("/api/candidates", params={"limit": 1}, headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in small.headers
+
+def test_upload_reupload_and_delete(client, db, vector_index, make_pdf):
+    files = {"file": ("ann.pdf", make_pdf("Ann Lee\nPython FastAPI Docker"), "application/pdf")}
+    assert client.post("/api/upload-resume", files=files).status_code == 200
+    [candidate_id] = [row.id for row in db.query(Candidate)]
+
+    files = {"file": ("ann.pdf", make_pdf("Ann Lee\nPython Kubernetes Terraform"), "application/pdf")}
+    assert client.post("/api/upload-resume", files=files).status_code == 200
+    db.expire_all()
+    row = db.query(Candidate).one()
+    assert row.id == candidate_id
+    assert "Kubernetes" in row.extracted_text
+    assert list(vector_index.index_to_docstore_id.values()) == [str(candidate_id)]
+
+    response = client.delete(f"/api/candidates/{candidate_id}")
+    assert response.json() == {"id": candidate_id, "filename": "ann.pdf"}
+    assert client.delete(f"/api/candidates/{candidate_id}").status_code == 404
+    assert vector_index.search_similar("python kubernetes", k=5) == []
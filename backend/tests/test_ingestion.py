@@ -0,0 +1,123 @@
+import asyncio
+
+from app.models import Candidate
+from app.services.embedding_service import deserialize_embedding
+from app.services.ingestion_service import ingestion_service
+from app.services.scoring_service import scoring_service
+from app.services.vector_db import VectorDBService, resume_metadata
+
+JOB_DESCRIPTION = "Senior backend engineer: Python, FastAPI, Docker, Kubernetes."
+
+def test_reupload_updates_the_row_and_replaces_the_vector(db, make_resume, save_and_index, vector_index):
+    first = make_resume("alice.pdf", "python django postgres", ["Python", "Django"])
+    [created] = save_and_index([first])
+    assert not created.updated
+
+    second = make_resume("alice.pdf", "python fastapi docker kubernetes", ["Python", "FastAPI"])
+    [updated] = save_and_index([second])
+    assert updated.updated
+    assert updated.id == created.id
+    assert updated.embedding_version > created.embedding_version
+
+    rows = db.query(Candidate).all()
+    assert len(rows) == 1
+    assert rows[0].skills == ["Python", "FastAPI"]
+    assert rows[0].embedding_version == updated.embedding_version
+
+    # One live vector per candidate; the replaced one is tombstoned
+    assert list(vector_index.index_to_docstore_id.values()) == [str(created.id)]
+    assert len(vector_index._tombstones) == 1
+    hits = vector_index.search_similar("fastapi docker", k=5)
+    assert len(hits) == 1
+    assert hits[0][0]["skills"] == ["Python", "FastAPI"]
+    assert hits[0][0]["embedding_version"] == updated.embedding_version
+
+def test_same_filename_twice_in_one_batch_keeps_the_last_upload(db, make_resume, save_and_index, vector_index):
+    resumes = [
+        make_resume("bob.pdf", "java spring", ["Java"]),
+        make_resume("bob.pdf", "go kubernetes", ["Go"]),
+    ]
+    saved = save_and_index(resumes)
+    assert saved[0].id == saved[1].id
+    assert db.query(Candidate).one().skills == ["Go"]
+    assert vector_index.index.ntotal == 1
+
+def test_failed_embedding_keeps_the_stored_vector(db, make_resume, save_and_index, vector_index):
+    first = make_resume("carol.pdf", "rust systems", ["Rust"])
+    [created] = save_and_index([first])
+
+    retry = make_resume("carol.pdf", "rust systems embedded", ["Rust", "C"], embedded=False)
+    [updated] = save_and_index([retry])
+    assert updated.embedding_version == created.embedding_version
+
+    row = db.query(Candidate).one()
+    assert row.skills == ["Rust", "C"]
+    assert list(deserialize_embedding(row.embedding)) == first.embedding
+    assert row.embedding_version == created.embedding_version
+    # The index keeps the old vector too, so a restart does not see it as stale
+    assert vector_index.index.ntotal == 1
+    assert not vector_index._is_stale(db)
+
+def test_delete_removes_the_candidate_everywhere(db, make_resume, save_and_index, vector_index):
+    saved = save_and_index([
+        make_resume("dave.pdf", "python fastapi", ["Python"]),
+        make_resume("erin.pdf", "python flask", ["Python"]),
+    ])
+    assert asyncio.run(ingestion_service.delete_candidate(saved[0].id)) == "dave.pdf"
+    assert asyncio.run(ingestion_service.delete_candidate(saved[0].id)) is None
+
+    db.expire_all()
+    assert [row.filename for row in db.query(Candidate)] == ["erin.pdf"]
+    assert [metadata["candidate_id"] for metadata, _ in vector_index.search_similar("python", k=5)] == [saved[1].id]
+
+def test_rebuild_from_sqlite_restores_the_live_metadata(db, make_resume, save_and_index, vector_index, tmp_path):
+    resumes = [
+        make_resume("frank.pdf", "python fastapi docker", ["Python", "FastAPI"]),
+        make_resume("grace.pdf", "kubernetes terraform aws", ["Kubernetes", "AWS"]),
+    ]
+    saved = save_and_index(resumes)
+    live = {metadata["candidate_id"]: metadata for metadata, _ in vector_index.search_similar(JOB_DESCRIPTION, k=5)}
+    assert live[saved[0].id] == {
+        **resume_metadata(saved[0].id, "frank.pdf", resumes[0].extracted_data),
+        "embedding_version": saved[0].embedding_version,
+    }
+
+    # Scored before the restart; the cache key fingerprints the profile the prompt is built from
+    scoring_service.score_candidate_staged(live[saved[0].id], JOB_DESCRIPTION)
+
+    # No saved index (e.g. a fresh deploy): everything comes back from SQLite
+    rebuilt = VectorDBService(index_dir=str(tmp_path / "fresh"))
+    rebuilt.load(db)
+    restored = {metadata["candidate_id"]: metadata for metadata, _ in rebuilt.search_similar(JOB_DESCRIPTION, k=5)}
+    assert restored == live
+    assert restored[saved[0].id]["job_roles"] == ["Backend Engineer"]
+    assert restored[saved[0].id]["tools"] == ["Docker", "Git"]
+    assert scoring_service.score_candidate_staged(restored[saved[0].id], JOB_DESCRIPTION)[1] == "llm_cache"
+
+def test_saved_index_is_reused_until_sqlite_changes_behind_it(db, make_resume, save_and_index, vector_index):
+    saved = save_and_index([
+        make_resume("heidi.pdf", "python", ["Python"]),
+        make_resume("ivan.pdf", "java", ["Java"]),
+    ])
+    # A row without an embedding (its text could not be embedded) is not expected in the index
+    db.add(Candidate(filename="judy.pdf", name="Judy", skills=[], experience_years=0.0, education=[]))
+    db.commit()
+    vector_index.save()
+
+    restarted = VectorDBService(index_dir=vector_index.index_dir)
+    assert restarted._load_from_disk()
+    assert not restarted._is_stale(db)
+
+    # Re-uploaded while the index was not saved (the process died before the next autosave)
+    ingestion_service._write_candidates(db, [make_resume("heidi.pdf", "python rust", ["Python", "Rust"])])
+    assert restarted._is_stale(db)
+
+    restarted = VectorDBService(index_dir=vector_index.index_dir)
+    restarted.load(db)
+    assert not restarted._is_stale(db)
+    assert restarted.docstore.search(str(saved[0].id)).metadata["skills"] == ["Python", "Rust"]
+
+    # Deleted from SQLite only
+    db.query(Candidate).filter(Candidate.id == saved[1].id).delete()
+    db.commit()
+    assert restarted._is_stale(db)
@@ -0,0 +1,94 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from app.models import Candidate
+from app.services.matching_service import MatchingService
+from app.services.scoring_service import scoring_service
+from app.services.score_cache import hash_job_description
+from app.services.vector_db import candidate_metadata
+
+JD_A = "Backend engineer with Python and FastAPI."
+JD_B = "Data engineer with Spark and Airflow."
+
+def profile(candidate_id: int):
+    return {"candidate_id": candidate_id, "filename": f"{candidate_id}.pdf", "name": f"Candidate {candidate_id}", "skills": []}
+
+def hits(*candidate_ids):
+    # Increasing distances, so the local re-rank keeps this order
+    return [(profile(candidate_id), 0.1 * rank) for rank, candidate_id in enumerate(candidate_ids, start=1)]
+
+def fused_ids(fused):
+    return [metadata["candidate_id"] for metadata, _ in fused]
+
+def test_rrf_fuses_by_rank_with_weights():
+    service = MatchingService(vector_weight=1.0, lexical_weight=1.0, rrf_k=60)
+    dense = hits(1, 2, 3)
+    lexical = [(3, -9.0), (2, -5.0)]
+    # 1: 1/61; 2: 1/62 + 1/63; 3: 1/63 + 1/61
+    assert fused_ids(service._fuse(JD_A, dense, lexical, k=3)) == [3, 2, 1]
+    assert fused_ids(service._fuse(JD_A, dense, lexical, k=2)) == [3, 2]
+
+    service.lexical_weight = 0.0
+    assert fused_ids(service._fuse(JD_A, dense, lexical, k=3)) == [1, 2, 3]
+    # Ties keep the vector order
+    service = MatchingService(vector_weight=1.0, lexical_weight=1.0, rrf_k=60)
+    assert fused_ids(service._fuse(JD_A, hits(1, 2), [(2, -1.0), (1, -1.0)], k=2)) == [1, 2]
+
+def test_keyword_only_hits_get_the_full_profile_and_exact_distance(db, embed, make_resume, save_and_index):
+    resume = make_resume("kate.pdf", "spark airflow kafka", ["Spark", "Airflow"])
+    [saved] = save_and_index([resume])
+    service = MatchingService(vector_weight=1.0, lexical_weight=1.0, rrf_k=60)
+
+    fused = service._fuse(JD_B, hits(1001), [(saved.id, -3.0)], k=2)
+    assert fused_ids(fused) == [1001, saved.id]
+    metadata, distance = fused[1]
+    row = db.get(Candidate, saved.id)
+    assert metadata == candidate_metadata(row)
+    assert metadata["job_roles"] == ["Backend Engineer"]
+    query = np.asarray(embed([JD_B])[0], dtype=np.float32)
+    assert distance == pytest.approx(float(np.sum((np.asarray(resume.embedding) - query) ** 2)), abs=1e-5)
+
+@pytest.fixture
+def matcher(db, monkeypatch):
+    service = MatchingService()
+    # Retrieval is stubbed: each JD always gets the same four hits
+    shortlists = {hash_job_description(JD_A): hits(1, 2, 3, 4), hash_job_description(JD_B): hits(5, 6, 7, 8)}
+    monkeypatch.setattr(
+        service, "retrieve_batch", lambda jds, **kwargs: [shortlists[hash_job_description(jd)] for jd in jds]
+    )
+    return service
+
+def planned(plan):
+    return sorted(candidate_id for _, candidate_id in plan)
+
+def test_llm_budget_is_shared_round_robin_across_jds(matcher):
+    _, plan = matcher._shortlist([JD_A, JD_B], k=4, filters=None, retrieval_k=4, llm_top_n=3, llm_budget=3)
+    # Rank 1 of both JDs, then rank 2 of the first
+    assert planned(plan) == [1, 2, 5]
+
+    _, plan = matcher._shortlist([JD_A, JD_B], k=4, filters=None, retrieval_k=4, llm_top_n=3, llm_budget=None)
+    assert planned(plan) == [1, 2, 3, 5, 6, 7]
+
+def test_cached_scores_do_not_count_against_the_budget(matcher):
+    scoring_service.score_candidate_staged(profile(1), JD_A)
+    scoring_service.score_candidate_staged(profile(2), JD_A)
+
+    _, plan = matcher._shortlist([JD_A, JD_B], k=4, filters=None, retrieval_k=4, llm_top_n=3, llm_budget=1)
+    assert planned(plan) == [1, 2, 5]
+    _, plan = matcher._shortlist([JD_A, JD_B], k=4, filters=None, retrieval_k=4, llm_top_n=3, llm_budget=0)
+    assert planned(plan) == [1, 2]
+
+def test_duplicate_jds_share_their_pairs(matcher):
+    _, plan = matcher._shortlist([JD_A, "  backend ENGINEER with python and fastapi. "], k=4, filters=None,
+                                 retrieval_k=4, llm_top_n=2, llm_budget=None)
+    assert planned(plan) == [1, 2]
+    assert {jd_hash for jd_hash, _ in plan} == {hash_job_description(JD_A)}
+
+def test_match_reports_which_stage_scored_each_candidate(matcher):
+    scoring_service.score_candidate_staged(profile(1), JD_A)
+    results = asyncio.run(matcher.amatch_jobs_batch([JD_A, JD_B], k=4, retrieval_k=4, llm_top_n=2, llm_budget=1))
+    stages = [{match["filename"]: match["stage"] for match in matches} for matches in results]
+    assert stages[0] == {"1.pdf": "llm_cache", "2.pdf": "local", "3.pdf": "local", "4.pdf": "local"}
+    assert stages[1] == {"5.pdf": "llm", "6.pdf": "local", "7.pdf": "local", "8.pdf": "local"}
@@ -0,0 +1,33 @@
+import asyncio
+import os
+import signal
+import time
+
+from app.services import resume_parser
+from app.services.resume_parser import extract_text_from_pdf_data, extract_texts_from_pdfs, get_pdf_executor
+
+def kill_worker(executor):
+    # One dead worker breaks the whole pool (the pool then stops the others itself)
+    pid = executor.submit(os.getpid).result()
+    os.kill(pid, signal.SIGKILL)
+    # Wait until the pool has noticed, so the next file isn't just served by a surviving worker
+    deadline = time.monotonic() + 10
+    while not executor._broken and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+def test_pdfs_are_parsed_in_input_order(make_pdf):
+    texts = asyncio.run(extract_texts_from_pdfs([make_pdf(f"Resume {i}") for i in range(4)] + [b"not a pdf"]))
+    assert texts == ["Resume 0", "Resume 1", "Resume 2", "Resume 3", None]
+
+def test_a_dead_worker_does_not_break_later_uploads(make_pdf):
+    broken = get_pdf_executor()
+    kill_worker(broken)
+
+    assert asyncio.run(extract_text_from_pdf_data(make_pdf("Grace Hopper"))) == "Grace Hopper"
+    assert resume_parser._executor is not broken
+    # Every file in flight when the pool breaks is retried in a new pool
+    broken = get_pdf_executor()
+    kill_worker(broken)
+    texts = asyncio.run(extract_texts_from_pdfs([make_pdf(f"Resume {i}") for i in range(3)]))
+    assert texts == ["Resume 0", "Resume 1", "Resume 2"]
+    assert resume_parser._executor is not broken
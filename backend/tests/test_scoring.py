@@ -0,0 +1,43 @@
+import asyncio
+
+import pytest
+
+from app.services.rate_limiter import RateLimiter
+from app.services.scoring_service import scoring_service
+
+JOB_DESCRIPTION = "Backend engineer with Python and FastAPI."
+RESUME = {"name": "Ann Lee", "skills": ["Python"], "experience_years": 3.0, "job_roles": ["Developer"]}
+
+@pytest.fixture
+def limiter(monkeypatch):
+    limiter = RateLimiter(requests_per_minute=60, tokens_per_minute=100_000)
+    monkeypatch.setattr(scoring_service, "rate_limiter", limiter)
+    return limiter
+
+def used(limiter):
+    return round(limiter.requests.capacity - limiter.requests.tokens), limiter.tokens.capacity - limiter.tokens.tokens
+
+@pytest.mark.parametrize("call", [
+    lambda: scoring_service.generate_interview_questions(RESUME, JOB_DESCRIPTION),
+    lambda: asyncio.run(scoring_service.agenerate_interview_questions(RESUME, JOB_DESCRIPTION)),
+    lambda: scoring_service.estimate_salary(RESUME, JOB_DESCRIPTION),
+    lambda: asyncio.run(scoring_service.aestimate_salary(RESUME, JOB_DESCRIPTION)),
+], ids=["questions", "async-questions", "salary", "async-salary"])
+def test_every_llm_call_reserves_quota(limiter, call):
+    call()
+    requests, tokens = used(limiter)
+    assert requests == 1
+    # Prompt plus the completion allowance
+    assert tokens > 100
+
+def test_scoring_reserves_quota_once_per_uncached_call(db, limiter):
+    resume = dict(RESUME, candidate_id=1)
+    assert scoring_service.score_candidate_staged(resume, JOB_DESCRIPTION)[1] == "llm"
+    assert scoring_service.score_candidate_staged(resume, JOB_DESCRIPTION)[1] == "llm_cache"
+    assert used(limiter)[0] == 1
+
+def test_empty_bucket_delays_the_next_call():
+    limiter = RateLimiter(requests_per_minute=60, tokens_per_minute=0)
+    for _ in range(60):
+        assert limiter._reserve(0) == 0.0
+    assert limiter._reserve(0) == pytest.approx(1.0, abs=0.05)
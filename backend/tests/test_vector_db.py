@@ -0,0 +1,146 @@
+import numpy as np
+import pytest
+
+from app.models import Candidate
+from app.services import vector_db as vector_db_module
+from app.services.ann_index import check_factory
+from app.services.embedding_service import serialize_embedding, deserialize_embedding
+from app.services.vector_db import VectorDBService
+
+QUERY = "python fastapi docker kubernetes backend engineer"
+
+def resume_text(i: int) -> str:
+    return f"skill{i % 37} tool{i % 11} role{i % 7} python{i % 3} docker{i % 5} name{i}"
+
+def seed(db, count: int):
+    """
+    Inserts count candidates with random unit-vector embeddings (no distance ties);
+    returns {id: embedding}.
+    """
+    texts = [resume_text(i) for i in range(count)]
+    vectors = np.random.default_rng(count).standard_normal((count, 384)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    rows = [
+        Candidate(
+            filename=f"resume_{i}.pdf",
+            name=f"Candidate {i}",
+            skills=[f"skill{i % 37}"],
+            experience_years=float(i % 15),
+            education=[],
+            resume_data={"name": f"Candidate {i}", "skills": [f"skill{i % 37}"], "tools": [f"tool{i % 11}"]},
+            extracted_text=text,
+            embedding=serialize_embedding(vector),
+            embedding_version=1,
+        )
+        for i, (text, vector) in enumerate(zip(texts, vectors))
+    ]
+    db.add_all(rows)
+    db.commit()
+    return {row.id: deserialize_embedding(row.embedding) for row in rows}
+
+def exact_top(vectors, query, k, candidate_ids=None):
+    ids = sorted(candidate_ids if candidate_ids is not None else vectors)
+    distances = {i: float(np.sum((vectors[i] - query) ** 2)) for i in ids}
+    return sorted(ids, key=lambda i: (distances[i], i))[:k], distances
+
+def query_vector(embed):
+    return np.asarray(embed([QUERY])[0], dtype=np.float32)
+
+def hit_ids(hits):
+    return [metadata["candidate_id"] for metadata, _ in hits]
+
+def build(tmp_path, db, factory: str, **kwargs) -> VectorDBService:
+    service = VectorDBService(index_dir=str(tmp_path / "index"), index_factory=factory, train_threshold=1, **kwargs)
+    service.sync_from_db(db)
+    service._maybe_build_ann_index()
+    assert service.active_factory == factory
+    return service
+
+@pytest.mark.parametrize("factory", ["PQ8", "PQ8x4fs", "LSH", "HNSW32_PQ8", "PCA64,Flat"])
+def test_factories_without_id_selector_support_are_refused(factory):
+    with pytest.raises(ValueError):
+        check_factory(factory, 384)
+
+@pytest.mark.parametrize("factory", ["Flat", "SQ8", "HNSW32", "HNSW32_SQ8", "IVF16,Flat", "IVF16,PQ8", "OPQ8,IVF16,PQ8"])
+def test_filterable_factories_are_accepted(factory):
+    check_factory(factory, 384)
+
+def test_refused_factory_falls_back_to_exact_search(tmp_path):
+    service = VectorDBService(index_dir=str(tmp_path / "index"), index_factory="PQ8")
+    assert service.index_factory == "Flat"
+
+@pytest.mark.parametrize("factory", ["Flat", "HNSW32"])
+def test_deleted_candidates_are_never_returned_and_compaction_reclaims_them(tmp_path, db, embed, factory):
+    vectors = seed(db, 40)
+    service = build(tmp_path, db, factory)
+    query = query_vector(embed)
+    expected, _ = exact_top(vectors, query, 5)
+
+    deleted = expected[:2]
+    assert service.delete_candidates(deleted + [10_000]) == 2
+    assert service.index.ntotal == 40  # tombstoned, not yet removed
+    assert service.needs_compaction(ratio=0.05)
+
+    live = set(vectors) - set(deleted)
+    expected, _ = exact_top(vectors, query, 5, live)
+    assert hit_ids(service.search_similar(QUERY, k=5)) == expected
+    # Filtered searches skip tombstones too
+    assert hit_ids(service.search_similar(QUERY, k=5, candidate_ids=list(vectors))) == expected
+
+    assert service.compact() == 2
+    assert service.index.ntotal == 38
+    assert not service._tombstones
+    assert hit_ids(service.search_similar(QUERY, k=5)) == expected
+
+@pytest.mark.parametrize("brute_force_max", [10_000, 0], ids=["brute-force", "id-selector"])
+@pytest.mark.parametrize("factory", ["Flat", "IVF4,Flat"])
+def test_filtered_search_ranks_only_allowed_candidates(tmp_path, db, embed, monkeypatch, factory, brute_force_max):
+    monkeypatch.setattr(vector_db_module, "VECTOR_FILTER_BRUTE_FORCE_MAX", brute_force_max)
+    vectors = seed(db, 60)
+    service = build(tmp_path, db, factory)
+    query = query_vector(embed)
+
+    allowed = sorted(vectors)[::3]
+    expected, distances = exact_top(vectors, query, 5, allowed)
+    # nprobe covers every list, so the IVF search is exhaustive over the allowed ids
+    hits = service.search_similar(QUERY, k=5, candidate_ids=allowed, search_params={"nprobe": 4})
+    assert hit_ids(hits) == expected
+    for metadata, distance in hits:
+        assert distance == pytest.approx(distances[metadata["candidate_id"]], abs=1e-4)
+
+    assert service.search_similar(QUERY, k=5, candidate_ids=[]) == []
+    assert hit_ids(service.search_similar(QUERY, k=5, candidate_ids=allowed[:2])) == exact_top(vectors, query, 5, allowed[:2])[0]
+
+@pytest.mark.parametrize("factory, expected_factor", [("SQ8", 4), ("IVF4,PQ16x4", 16)])
+def test_compressed_indexes_over_fetch_and_rerank_exactly(tmp_path, db, embed, factory, expected_factor):
+    vectors = seed(db, 300)
+    service = build(tmp_path, db, factory, rerank_factor=4, pq_rerank_factor=16)
+    assert service._fetch_factor == expected_factor
+    query = query_vector(embed)
+
+    hits = service.search_similar(QUERY, k=5, search_params={"nprobe": 4})
+    assert len(hits) == 5
+    _, distances = exact_top(vectors, query, 5)
+    # Distances come from the float32 embeddings in SQLite, not the compressed codes
+    for metadata, distance in hits:
+        assert distance == pytest.approx(distances[metadata["candidate_id"]], abs=1e-4)
+    assert [distance for _, distance in hits] == sorted(distance for _, distance in hits)
+
+def test_exact_indexes_do_not_over_fetch(tmp_path, db):
+    seed(db, 20)
+    assert build(tmp_path, db, "Flat")._fetch_factor == 1
+    assert build(tmp_path, db, "HNSW32")._fetch_factor == 1
+
+def test_ann_index_build_keeps_labels_and_carries_over_only_live_vectors(tmp_path, db, embed):
+    vectors = seed(db, 30)
+    service = VectorDBService(index_dir=str(tmp_path / "index"), index_factory="HNSW32", train_threshold=25)
+    service.sync_from_db(db)
+    service.delete_candidates([min(vectors)])
+    service._maybe_build_ann_index()
+    assert service.active_factory == "HNSW32"
+    assert service.index.ntotal == 29
+    assert not service._tombstones
+
+    query = query_vector(embed)
+    expected, _ = exact_top(vectors, query, 5, set(vectors) - {min(vectors)})
+    assert hit_ids(service.search_similar(QUERY, k=5)) == expected
@@ -9,6 +9,8 @@ import plotly.express as px
 import os
 # Configuration
 BACKEND_URL = os.getenv("BACKEND_URL", "http://localhost:8000/api")
+# Most job descriptions /match-jobs accepts per request (BatchMatchRequest.job_descriptions)
+MATCH_JOBS_BATCH_SIZE = 50
 
 st.set_page_config(
     page_title="AI Resume Screener",
@@ -185,20 +187,52 @@ with st.sidebar:
 # --- APP CONTENT STARTS HERE ---
 
 # Fetch Data from DB
-def fetch_all_candidates():
+def fetch_analytics():
+    # Aggregates are computed by the backend; the response is a few KB whatever the pool size
     try:
-        response = requests.get(f"{BACKEND_URL}/candidates")
+        response = requests.get(f"{BACKEND_URL}/analytics")
         if response.status_code == 200:
             return response.json()
     except:
         pass
+    return None
+
+def fetch_candidate_page(limit=100):
+    try:
+        response = requests.get(f"{BACKEND_URL}/candidates", params={"limit": limit, "sort": "upload_date", "order": "desc"})
+        if response.status_code == 200:
+            return response.json()["items"]
+    except:
+        pass
     return []
 
-# Initialize session state with DB data if empty
-if 'batch_data' not in st.session_state or not st.session_state['batch_data']:
-    db_data = fetch_all_candidates()
-    if db_data:
-        st.session_state['batch_data'] = db_data
+def stream_events(url, payload):
+    """
+    POSTs payload and yields (event, data) pairs from the Server-Sent Events response as they arrive.
+    """
+    with requests.post(url, json=payload, stream=True) as response:
+        if response.status_code != 200:
+            yield "error", {"message": response.text}
+            return
+        event, lines = "message", []
+        for line in response.iter_lines(decode_unicode=True):
+            if line.startswith("event:"):
+                event = line[len("event:"):].strip()
+            elif line.startswith("data:"):
+                lines.append(line[len("data:"):].strip())
+            elif not line and lines:
+                yield event, json.loads("\n".join(lines))
+                event, lines = "message", []
+
+def render_match_rows(placeholder, rows):
+    import pandas as pd
+    table = [{
+        "Candidate": row['filename'],
+        "Score": row['score'],
+        "Scored by": "AI scoring..." if row.get('pending') else row.get('stage', 'llm'),
+        "Matched Skills": ", ".join(row.get('matched_skills') or [])
+    } for row in rows]
+    placeholder.dataframe(pd.DataFrame(table), use_container_width=True, hide_index=True)
 
 # Custom CSS for UI styling (Global)
 st.markdown("""
@@ -282,11 +316,26 @@ with st.sidebar:
                     if uploaded_file.name.endswith(".zip"):
                         # Batch Upload
                         files = {"file": (uploaded_file.name, uploaded_file, "application/zip")}
+                        # Queue a background ingest job, then poll it for progress
                         response = requests.post(f"{BACKEND_URL}/upload-zip", files=files)
-                        if response.status_code == 200:
-                            st.success("Batch processing complete!")
-                            st.session_state['batch_data'] = response.json()
-                            st.info(f"Processed {len(st.session_state['batch_data'])} resumes.")
+                        if response.status_code in (200, 202):
+                            job = response.json()
+                            progress_bar = st.progress(0)
+                            progress_text = st.empty()
+                            while job['status'] in ("queued", "running"):
+                                done = job['processed_files'] + job['failed_files']
+                                if job['total_files']:
+                                    progress_bar.progress(done / job['total_files'])
+                                progress_text.text(f"Processed {done}/{job['total_files']} resumes...")
+                                time.sleep(1)
+                                job = requests.get(f"{BACKEND_URL}/jobs/{job['job_id']}").json()
+                            progress_bar.empty()
+                            progress_text.empty()
+                            if job['status'] == "completed":
+                                st.success("Batch processing complete!")
+                            else:
+                                st.warning(f"Batch job {job['status']}: {job.get('error') or ''}")
+                            st.info(f"Processed {job['processed_files']} resumes ({job['failed_files']} failed).")
                         else:
                             st.error(f"Error processing batch: {response.text}")
                     else:
@@ -324,82 +373,96 @@ tab1, tab2, tab3 = st.tabs(["Single Job Match", "Multi-Job Comparison", "Analyti
 # --- ANALYTICS TAB ---
 with tab3:
     st.header("📊 Talent Pool Analytics (Persistent Database)")
-    if 'batch_data' not in st.session_state or not st.session_state['batch_data']:
+    analytics = fetch_analytics()
+    if not analytics or not analytics['total_candidates']:
         st.info("No candidates found in the database. Upload resumes to build your talent pool.")
         # Try fetching again
         if st.button("Refresh Results"):
-            st.session_state['batch_data'] = fetch_all_candidates()
             st.rerun()
     else:
-        batch_data = st.session_state['batch_data']
-        if not batch_data:
-            st.warning("No valid data found in the uploaded batch.")
-        else:
-            # 1. Total Candidates
-            st.metric("Total Candidates Processed", len(batch_data))
-            
-            # Prepare Dataframes
-            import pandas as pd
-            all_skills = []
-            experiences = []
-            
-            for item in batch_data:
-                data = item.get('extracted_data', {})
-                if data:
-                    # Flatten skills
-                    all_skills.extend(data.get('skills', []))
-                    experiences.append(data.get('experience_years', 0))
-            
-            # 2. Top Skills Interactive Chart
-            if all_skills:
-                st.subheader("Top Skills Found")
-                skill_counts = pd.Series(all_skills).value_counts().head(10).reset_index()
-                skill_counts.columns = ['Skill', 'Count']
-                
-                fig = px.bar(skill_counts, x='Skill', y='Count', color='Count',
-                             color_continuous_scale='Viridis', title="Most Common Candidate Skills")
-                fig.update_layout(paper_bgcolor="rgba(0,0,0,0)", plot_bgcolor="rgba(0,0,0,0)", font=dict(color="white"))
-                st.plotly_chart(fig, use_container_width=True)
-            
-            # 3. Experience Distribution Area Chart
-            if experiences:
-                st.subheader("Experience Level Distribution")
-                exp_df = pd.DataFrame(experiences, columns=["Years of Experience"])
-                
-                fig2 = px.histogram(exp_df, x="Years of Experience", nbins=10, 
-                                    template="plotly_dark", title="Experience Distribution")
-                fig2.update_traces(marker_color='#00d2ff')
-                fig2.update_layout(paper_bgcolor="rgba(0,0,0,0)", plot_bgcolor="rgba(0,0,0,0)", font=dict(color="white"))
-                st.plotly_chart(fig2, use_container_width=True)
-                
-            st.divider()
-            
-            # 4. Data Table
-            st.subheader("Candidate Overview")
-            overview_data = []
-            for item in batch_data:
-                d = item.get('extracted_data', {})
-                overview_data.append({
-                    "Name": d.get('name', 'Unknown'),
-                    "Experience": d.get('experience_years', 0),
-                    "Skills (Count)": len(d.get('skills', [])),
-                    "Filename": item.get('filename')
-                })
-            st.dataframe(pd.DataFrame(overview_data), use_container_width=True)
+        # 1. Total Candidates
+        m1, m2, m3 = st.columns(3)
+        m1.metric("Total Candidates Processed", analytics['total_candidates'])
+        m2.metric("Average Experience (Years)", analytics['average_experience'])
+        m3.metric("Distinct Skills", analytics['distinct_skills'])
+
+        import pandas as pd
+
+        # 2. Top Skills Interactive Chart
+        if analytics['top_skills']:
+            st.subheader("Top Skills Found")
+            skill_counts = pd.DataFrame(analytics['top_skills'])
+            skill_counts.columns = ['Skill', 'Count']
+
+            fig = px.bar(skill_counts, x='Skill', y='Count', color='Count',
+                         color_continuous_scale='Viridis', title="Most Common Candidate Skills")
+            fig.update_layout(paper_bgcolor="rgba(0,0,0,0)", plot_bgcolor="rgba(0,0,0,0)", font=dict(color="white"))
+            st.plotly_chart(fig, use_container_width=True)
+
+        # 3. Experience Distribution (pre-bucketed by the backend)
+        if analytics['experience_distribution']:
+            st.subheader("Experience Level Distribution")
+            exp_df = pd.DataFrame(analytics['experience_distribution'])
+            exp_df.columns = ['Years of Experience', 'Candidates']
+
+            fig2 = px.bar(exp_df, x="Years of Experience", y="Candidates",
+                          template="plotly_dark", title="Experience Distribution")
+            fig2.update_traces(marker_color='#00d2ff')
+            fig2.update_layout(paper_bgcolor="rgba(0,0,0,0)", plot_bgcolor="rgba(0,0,0,0)", font=dict(color="white"))
+            st.plotly_chart(fig2, use_container_width=True)
+
+        st.divider()
+
+        # 4. Data Table (most recent uploads only; the full pool stays on the server)
+        st.subheader("Candidate Overview")
+        st.caption("Showing the 100 most recent uploads.")
+        overview_data = []
+        for item in fetch_candidate_page():
+            d = item.get('extracted_data', {})
+            overview_data.append({
+                "Name": d.get('name', 'Unknown'),
+                "Experience": d.get('experience_years', 0),
+                "Skills (Count)": len(d.get('skills') or []),
+                "Filename": item.get('filename')
+            })
+        st.dataframe(pd.DataFrame(overview_data), use_container_width=True)
 
 # --- SINGLE JOB MODE ---
 with tab1:
     job_description = st.text_area("Enter Job Description", height=200, placeholder="Paste the job description here...", key="single_jd")
+    with st.expander("Filters"):
+        f1, f2 = st.columns(2)
+        min_exp = f1.number_input("Minimum experience (years)", min_value=0.0, value=0.0, step=1.0, key="filter_min_exp")
+        required_skills = f2.text_input("Required skills (comma-separated)", key="filter_skills")
     match_btn = st.button("Match Candidate", type="primary", use_container_width=True, key="single_btn")
 
     if match_btn and job_description:
         with st.spinner("AI is analyzing the match..."):
             try:
                 payload = {"job_description": job_description, "min_score": 0.0}
-                response = requests.post(f"{BACKEND_URL}/match-job", json=payload)
-                
-                if response.status_code == 200:
-                    results = response.json().get("matches", [])
+                skills = [s.strip() for s in required_skills.split(",") if s.strip()]
+                if min_exp or skills:
+                    payload["filters"] = {"min_experience": min_exp or None, "skills": skills}
+
+                # Streamed: the shortlist shows right after the vector search, and each row
+                # updates as its AI score arrives
+                results, error = None, None
+                rows, live_table = [], st.empty()
+                for event, event_data in stream_events(f"{BACKEND_URL}/match-job/stream", payload):
+                    if event == "shortlist":
+                        rows = event_data["matches"]
+                    elif event == "score":
+                        rows = [event_data if row['filename'] == event_data['filename'] else row for row in rows]
+                    elif event == "done":
+                        results = rows = event_data["matches"]
+                    elif event == "error":
+                        error = event_data["message"]
+                        break
+                    render_match_rows(live_table, rows)
+                if results is None and error is None:
+                    error = "The match stream ended early."
+
+                if error is None:
                     current_file = st.session_state.get('filename')
                     
                     if current_file:
@@ -430,7 +493,7 @@ with tab1:
                             </div>
                             """, unsafe_allow_html=True)
                         with c2:
-                            st.caption(f"Match Confidence: {score}/100")
+                            st.caption(f"Match Confidence: {score}/100 (scored by: {match.get('stage', 'llm')})")
                             st.progress(int(score))
                             st.write(f"**AI Reason:** {match.get('ai_explanation', 'No explanation provided.')}")
 
@@ -591,7 +654,7 @@ with tab1:
                     else:
                         st.warning("No matches found.")
                 else:
-                    st.error(f"Error matching: {response.text}")
+                    st.error(f"Error matching: {error}")
             except Exception as e:
                 st.error(f"Connection error: {e}")
 
@@ -609,36 +672,33 @@ with tab2:
             st.warning("No valid job descriptions found. Please separate them with '---'.")
         else:
             results_list = []
-            progress_bar = st.progress(0)
-            status_text = st.empty()
-            
-            for i, jd in enumerate(jds):
-                status_text.text(f"Analyzing Job {i+1}/{len(jds)}...")
+            with st.spinner(f"Analyzing {len(jds)} jobs..."):
                 try:
-                    payload = {"job_description": jd, "min_score": 0.0}
-                    response = requests.post(f"{BACKEND_URL}/match-job", json=payload)
-                    
-                    if response.status_code == 200:
-                        matches = response.json().get("matches", [])
-                        current_file = st.session_state.get('filename')
-                        match = next((m for m in matches if m['filename'] == current_file), matches[0] if matches else None)
-                        
-                        if match:
-                            results_list.append({
-                                "Job ID": f"Job {i+1}",
-                                "Score": match['score'],
-                                "Status": "Strong" if match['score'] >= 75 else "Moderate" if match['score'] >= 50 else "Low",
-                                "Matched Skills": len(match.get('matched_skills', [])),
-                                "Missing Skills": len(match.get('missing_skills', [])),
-                                "Full Result": match  # hidden from table but used for details
-                            })
+                    # One request per batch of JDs: the backend embeds, searches and scores each batch together
+                    current_file = st.session_state.get('filename')
+                    for start in range(0, len(jds), MATCH_JOBS_BATCH_SIZE):
+                        payload = {"job_descriptions": jds[start:start + MATCH_JOBS_BATCH_SIZE], "min_score": 0.0}
+                        response = requests.post(f"{BACKEND_URL}/match-jobs", json=payload)
+                        if response.status_code != 200:
+                            st.error(f"Error comparing jobs: {response.text}")
+                            break
+
+                        for i, result in enumerate(response.json().get("results", []), start=start):
+                            matches = result.get("matches", [])
+                            match = next((m for m in matches if m['filename'] == current_file), matches[0] if matches else None)
+
+                            if match:
+                                results_list.append({
+                                    "Job ID": f"Job {i+1}",
+                                    "Score": match['score'],
+                                    "Status": "Strong" if match['score'] >= 75 else "Moderate" if match['score'] >= 50 else "Low",
+                                    "Matched Skills": len(match.get('matched_skills', [])),
+                                    "Missing Skills": len(match.get('missing_skills', [])),
+                                    "Full Result": match  # hidden from table but used for details
+                                })
                 except Exception as e:
-                    st.error(f"Error processing Job {i+1}: {e}")
-                
-                progress_bar.progress((i + 1) / len(jds))
-            
-            status_text.empty()
-            
+                    st.error(f"Error comparing jobs: {e}")
+
             if results_list:
                 # Sort best first
                 results_list.sort(key=lambda x: x['Score'], reverse=True)